@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useEffect, Dispatch, SetStateAction } from "react" 
+import { useState, Dispatch, SetStateAction } from "react" 
 import { Upload, File as FileIcon } from "lucide-react" 
 import type React from "react"
 import { File } from "lucide-react"
@@ -66,37 +66,10 @@ export function ImageUpload({
             setFiles((prev) => [...prev, ...filesWithPreview])
         }
     }
-    // Polling 로직 
-    useEffect(() => {
-        let intervalId: NodeJS.Timeout | null = null;
-        
-        if (isProcessing && uploadedCount > 0) {
-            intervalId = setInterval(async () => {
-                try {
-                    const res = await fetch("http://localhost:5000/api/analysis-progress");
-                    if (!res.ok) throw new Error("진행률 API 응답 오류");
-
-                    const data = await res.json();
-                    
-                    setProcessingCount(data.completed_count); 
-
-                    if (data.completed_count >= uploadedCount) {
-                        if (intervalId) clearInterval(intervalId);
-                    }
-                } catch (error) {
-                    console.error("Polling 중 오류 발생:", error);
-                    if (intervalId) clearInterval(intervalId);
-                }
-            }, 500); 
-        }
-        
-        return () => {
-            if (intervalId) {
-                clearInterval(intervalId);
-            }
-        };
-    }, [isProcessing, uploadedCount, setProcessingCount]);
+    const API_BASE = "http://localhost:5000"
+    const POLL_INTERVAL_MS = 1000
 
+    const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms))
 
     const handleStartAnalysis = async () => {
         if (files.length === 0) return
@@ -104,15 +77,14 @@ export function ImageUpload({
         onAnalysisStart(files.length)
         setProcessingCount(0); 
 
-        await new Promise(resolve => setTimeout(resolve, 50));
-
         try {
             const formData = new FormData()
             files.forEach((item) => { 
                 formData.append("files", item.file as Blob)
             })
 
-            const response = await fetch("http://localhost:5000/api/analyze-batch", {
+            // 1. 작업 생성 (분석은 서버 백그라운드에서 진행)
+            const response = await fetch(`${API_BASE}/api/jobs`, {
                 method: "POST",
                 body: formData,
             })
@@ -121,11 +93,38 @@ export function ImageUpload({
                 throw new Error(`API 오류: ${response.statusText}`)
             }
 
-            const data = await response.json()
+            const job = await response.json()
+            const collected: any[] = []
+            let since = 0
+            let isRunning = job.is_running
+
+            // 2. 작업 진행률 Polling + 새로 완료된 결과만 증분 조회
+            while (true) {
+                if (isRunning) {
+                    await sleep(POLL_INTERVAL_MS)
+                    const progressRes = await fetch(`${API_BASE}/api/jobs/${job.job_id}`)
+                    if (!progressRes.ok) throw new Error("진행률 API 응답 오류")
+                    const progress = await progressRes.json()
+                    setProcessingCount(progress.completed_count)
+                    isRunning = progress.is_running
+                }
+
+                const resultsRes = await fetch(`${API_BASE}/api/jobs/${job.job_id}/results?since=${since}`)
+                if (!resultsRes.ok) throw new Error("결과 API 응답 오류")
+                const data = await resultsRes.json()
+                collected.push(...data.results)
+                since = data.next_since
+
+                if (!isRunning) break
+            }
+
             setProcessingCount(files.length);
+
+            // 업로드 순서대로 정렬
+            collected.sort((a, b) => a.index - b.index)
             
-            const results = data.results.map((result: any, index: number) => {
-                const fileItem = files.find(item => item.name === result.filename); 
+            const results = collected.map((result: any, index: number) => {
+                const fileItem = files[result.index] ?? files.find(item => item.name === result.filename); 
                 
                 return {
                     id: result.id || index,
@@ -135,6 +134,8 @@ export function ImageUpload({
                     confidence: result.confidence || 0,
                     timestamp: result.timestamp,
                     details: result.details || {},
+                    // 작업 결과에는 base64 주석 이미지가 없으므로 저장된 이미지 URL로 표시
+                    imageUrl: result.image_url ? `${API_BASE}${result.image_url}` : null,
                     file: fileItem ? fileItem.file : null, 
                     previewUrl: fileItem ? fileItem.previewUrl : null,
                 };
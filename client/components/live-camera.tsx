@@ -7,6 +7,8 @@ import { Play, Square } from "lucide-react"
 export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
     const [isRunning, setIsRunning] = useState(false)
     const [frameCount, setFrameCount] = useState(0)
+    // 서버 카메라 세션 기준 처리 FPS / 버린 프레임 수 / 지연 시간
+    const [liveStats, setLiveStats] = useState({ fps: 0, dropped: 0, latencyMs: 0 })
     const [isStreamReady, setIsStreamReady] = useState(false)
     
     const BRIGHTNESS_MAX = 50; // 이전 코드의 기준값
@@ -21,6 +23,14 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
     const canvasRef = useRef<HTMLCanvasElement>(null)
     const streamRef = useRef<MediaStream | null>(null)
     const intervalRef = useRef<NodeJS.Timeout | null>(null)
+    const overlayCanvasRef = useRef<HTMLCanvasElement>(null)
+    const socketRef = useRef<WebSocket | null>(null)
+    // 결과 JSON 다음에 이어지는 결과 이미지(바이너리)를 기다리는 중인 결과
+    const pendingResultRef = useRef<any | null>(null)
+
+    const CAMERA_ID = "default"
+    const WS_URL = `ws://localhost:5000/ws/live?camera_id=${CAMERA_ID}`
+    const FRAME_INTERVAL_MS = 1000
 
     // --- 카메라 스트림 제어 함수 ---
 
@@ -60,11 +70,28 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
     }, [setIsProcessing])
 
 
+    const closeSocket = () => {
+        if (socketRef.current) {
+            socketRef.current.onclose = null
+            socketRef.current.close()
+            socketRef.current = null
+        }
+        pendingResultRef.current = null
+    }
+
+    const clearOverlay = () => {
+        const overlayCanvas = overlayCanvasRef.current
+        const ctx = overlayCanvas?.getContext("2d")
+        if (overlayCanvas && ctx) ctx.clearRect(0, 0, overlayCanvas.width, overlayCanvas.height)
+    }
+
     const handleStop = useCallback((stopStream: boolean) => {
         if (intervalRef.current) {
             clearInterval(intervalRef.current)
             intervalRef.current = null
         }
+        closeSocket()
+        clearOverlay()
         
         if (stopStream) {
             stopCameraStream()
@@ -110,70 +137,133 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
         }
     };
     
-    // --- 프레임 캡처 및 분석 함수 ---
+    // --- 서버 결과 overlay (BBox) 그리기 ---
+
+    const drawOverlay = (overlay: any[], status: string) => {
+        const video = videoRef.current
+        const overlayCanvas = overlayCanvasRef.current
+        const ctx = overlayCanvas?.getContext("2d")
+        if (!video || !overlayCanvas || !ctx || !video.videoWidth) return
+
+        overlayCanvas.width = overlayCanvas.clientWidth
+        overlayCanvas.height = overlayCanvas.clientHeight
+        ctx.clearRect(0, 0, overlayCanvas.width, overlayCanvas.height)
+
+        // video의 object-cover 배치와 같은 비율/오프셋으로 프레임 좌표 변환
+        const scale = Math.max(overlayCanvas.width / video.videoWidth, overlayCanvas.height / video.videoHeight)
+        const offsetX = (overlayCanvas.width - video.videoWidth * scale) / 2
+        const offsetY = (overlayCanvas.height - video.videoHeight * scale) / 2
+
+        ctx.font = "14px sans-serif"
+        ctx.lineWidth = 2
+        overlay.forEach((item) => {
+            const [x1, y1, x2, y2] = item.bbox
+            const [b, g, r] = item.color
+            const x = offsetX + x1 * scale
+            const y = offsetY + y1 * scale
+            ctx.strokeStyle = `rgb(${r}, ${g}, ${b})`
+            ctx.strokeRect(x, y, (x2 - x1) * scale, (y2 - y1) * scale)
+            ctx.fillStyle = "white"
+            ctx.fillText(item.label, x, Math.max(y - 6, 14))
+        })
+
+        ctx.font = "bold 24px sans-serif"
+        ctx.fillStyle = status === "PASS" ? "rgb(0, 255, 0)" : "rgb(255, 0, 0)"
+        ctx.fillText(status, 12, 32)
+    }
+
+    const addResult = (result: any, imageBlob: Blob | null) => {
+        setResults((prev: any[]) => [
+            {
+                id: `${Date.now()}-${result.frame}`, 
+                ...result,
+                name: `Frame ${result.frame}`, 
+                imageUrl: imageBlob ? URL.createObjectURL(imageBlob) : null, 
+                timestamp: new Date().toLocaleTimeString(),
+                brightness: brightness, 
+                exposure: exposure, 
+            },
+            ...prev,
+        ])
+    }
+
+    const handleSocketMessage = (event: MessageEvent) => {
+        // 바이너리 메시지: 직전 결과 JSON의 결과 이미지 (JPEG)
+        if (typeof event.data !== "string") {
+            const result = pendingResultRef.current
+            pendingResultRef.current = null
+            if (result) addResult(result, new Blob([event.data], { type: "image/jpeg" }))
+            return
+        }
+
+        const message = JSON.parse(event.data)
+        if (message.type === "error") {
+            console.error("프레임 분석 오류:", message.detail)
+            return
+        }
+        if (message.type !== "result") return
+
+        setFrameCount(message.frame)
+        setLiveStats({ fps: message.effective_fps, dropped: message.dropped_frames, latencyMs: message.latency_ms })
+        // 최근 프레임 다수결로 안정화된 판정이 있으면 그것을 표시 (프레임별 깜빡임 방지)
+        drawOverlay(message.overlay || [], message.stable?.status ?? message.status)
+        if (message.image) {
+            pendingResultRef.current = message
+        } else {
+            addResult(message, null)
+        }
+    }
+
+    const openSocket = () => new Promise<WebSocket>((resolve, reject) => {
+        const socket = new WebSocket(WS_URL)
+        socket.binaryType = "arraybuffer"
+        socket.onopen = () => {
+            // 결과 이미지는 썸네일로만 받고, 실시간 BBox는 overlay 좌표로 직접 그림
+            socket.send(JSON.stringify({
+                type: "config",
+                brightness: brightness,
+                exposure_gain: exposure,
+                render: "thumbnail",
+                overlay: true,
+                // 프레임마다 저장하지 않고 제품 단위로 통합된 결과 1건만 저장
+                save: true,
+                save_mode: "unit",
+            }))
+            resolve(socket)
+        }
+        socket.onerror = () => reject(new Error("WebSocket 연결 실패"))
+        socket.onmessage = handleSocketMessage
+        socket.onclose = () => {
+            setError("백엔드 서버 연결 실패")
+            handleStop(true)
+        }
+    })
+
+    // --- 프레임 캡처 및 전송 함수 ---
     
-    const captureFrame = async () => {
+    const captureFrame = () => {
         if (!videoRef.current || !canvasRef.current) return
 
+        const socket = socketRef.current
         const video = videoRef.current
         const canvas = canvasRef.current
         const ctx = canvas.getContext("2d")
 
+        if (!socket || socket.readyState !== WebSocket.OPEN) return
         if (!ctx || video.readyState !== video.HAVE_ENOUGH_DATA) return
+        // 이전 프레임이 아직 전송 중이면 이번 프레임은 건너뜀 (서버도 밀린 프레임은 버림)
+        if (socket.bufferedAmount > 0) return
 
         internalFrameCountRef.current += 1
-        const currentFrameNumber = internalFrameCountRef.current
-        setFrameCount(currentFrameNumber)
 
         canvas.width = video.videoWidth
         canvas.height = video.videoHeight
 
         ctx.drawImage(video, 0, 0, canvas.width, canvas.height)
 
-        canvas.toBlob(async (blob) => {
-            if (!blob) return
-
-            try {
-                const formData = new FormData()
-                formData.append("file", blob, "frame.jpg")
-                formData.append("brightness", brightness.toString())
-                formData.append("exposure_gain", exposure.toString()) 
-
-                const response = await fetch("http://localhost:5000/api/analyze-frame", {
-                    method: "POST",
-                    body: formData,
-                })
-
-                if (!response.ok) {
-                    throw new Error(`서버 오류: ${response.status} ${response.statusText}`)
-                }
-
-                const result = await response.json()
-
-                const uniqueId = `${Date.now()}-${currentFrameNumber}`;
-                // 백엔드가 처리한 이미지 URL 또는 Base64 데이터
-                const analyzedImageUrl = result.analyzed_image_base64 || result.details?.annotated_image; 
-                
-                setResults((prev: any[]) => [
-                    {
-                        id: uniqueId, 
-                        ...result,
-                        name: `Frame ${currentFrameNumber}`, 
-                        // imageUrl 필드가 base64로 오면 앞에 접두사 추가
-                        imageUrl: analyzedImageUrl ? `data:image/jpeg;base64,${analyzedImageUrl}` : null, 
-                        timestamp: new Date().toLocaleTimeString(),
-                        brightness: brightness, 
-                        exposure: exposure, 
-                    },
-                    ...prev,
-                ])
-            } catch (error: any) {
-                console.error("프레임 분석 오류:", error)
-                if (error.message?.includes("Failed to fetch") || error.message?.includes("NetworkError")) {
-                    setError("백엔드 서버 연결 실패")
-                    handleStop(true) // 서버 오류 시 완전히 멈춤
-                }
-            }
+        canvas.toBlob((blob) => {
+            if (!blob || socket.readyState !== WebSocket.OPEN) return
+            socket.send(blob)
         }, "image/jpeg", 0.9)
     }
 
@@ -201,6 +291,16 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
             })
             clearTimeout(timeoutId)
             
+            if (healthCheck.status === 503) {
+                // 서버는 떠 있지만 모델 로드/워밍업이 끝나지 않음
+                const health = await healthCheck.json().catch(() => ({}))
+                const message = health.state === "failed"
+                    ? "모델 로드에 실패했습니다. 서버 로그를 확인하세요."
+                    : "모델을 준비하는 중입니다. 잠시 후 다시 시도하세요."
+                setError(message)
+                alert(message)
+                return
+            }
             if (!healthCheck.ok) {
                 throw new Error("서버가 응답하지 않습니다")
             }
@@ -215,16 +315,24 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
             return 
         }
 
-        // 서버 연결 성공, 감지 시작 로직
+        // 서버 연결 성공, 실시간 스트림 연결
+        try {
+            socketRef.current = await openSocket()
+        } catch (err: any) {
+            setError("백엔드 서버에 연결할 수 없습니다")
+            return
+        }
+
         setIsProcessing(true)
         setIsRunning(true)
         internalFrameCountRef.current = 0
         setFrameCount(0)
+        setLiveStats({ fps: 0, dropped: 0, latencyMs: 0 })
 
-        // 주기적으로 프레임 캡처 및 분석 (1초마다)
+        // 주기적으로 프레임 캡처 및 전송
         intervalRef.current = setInterval(() => {
             captureFrame()
-        }, 1000)
+        }, FRAME_INTERVAL_MS)
     }
     
     // --- 렌더링 ---
@@ -243,6 +351,7 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
                         style={{ filter: `brightness(${(100 + brightness * 2)}%) contrast(${exposure})` }} 
                     />
                     <canvas ref={canvasRef} className="hidden" />
+                    <canvas ref={overlayCanvasRef} className="absolute inset-0 w-full h-full pointer-events-none" />
                     
                     {/* 미리보기 화면이 준비되지 않았거나 (에러), 감지 중이 아닐 때의 오버레이 */}
                     {!streamRef.current && !error && (
@@ -278,7 +387,11 @@ export function LiveCamera({ setIsProcessing, setResults, onDownload }: any) {
                     <div className="flex items-center gap-4 text-sm text-muted-foreground">
                         <span>해상도: 1280 × 800</span>
                         <span>•</span>
-                        <span>FPS: 15</span>
+                        <span>FPS: {liveStats.fps.toFixed(1)}</span>
+                        <span>•</span>
+                        <span>Dropped: {liveStats.dropped}</span>
+                        <span>•</span>
+                        <span>Latency: {Math.round(liveStats.latencyMs)} ms</span>
                         <span>•</span>
                         <span>Status: {isRunning ? "감지 중" : streamRef.current ? "미리보기" : "대기 중"}</span>
                     </div>
@@ -0,0 +1,110 @@
+# 서버 시작 / import 시간 측정 (cd server, python benchmark_startup.py [--models])
+# 모듈마다 새 파이썬 프로세스에서 import 시간을 재고, ML 라이브러리를 끌어오는지 확인
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# API / DB 계층 (ML 라이브러리 없이 import되어야 함)
+LIGHT_MODULES = [
+    "database.db",
+    "database.report",
+    "jobs.manager",
+    "live.session",
+    "live.units",
+    "models.scheduler",
+    "models.result_cache",
+    "main",
+]
+# 모델 로드 시 import하는 모듈
+HEAVY_MODULES = [
+    "numpy",
+    "cv2",
+    "torch",
+    "transformers",
+    "ultralytics",
+    "models.inference",
+]
+ML_PACKAGES = ("torch", "transformers", "ultralytics", "cv2")
+
+_IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"sec": elapsed, "ml": [name for name in {ml!r} if name in sys.modules]}}))
+"""
+
+_MODELS_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from models import inference
+import_sec = time.perf_counter() - start
+inference.initialize_models()
+print(json.dumps({"import_sec": import_sec, "total_sec": time.perf_counter() - start,
+                  "load": inference.model_load_info}, default=str))
+"""
+
+
+def run_snippet(code: str) -> dict:
+    """서버 디렉터리에서 새 파이썬 프로세스로 실행하고 마지막 줄의 JSON 결과 반환"""
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=server_dir, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["알 수 없는 오류"])[-1]
+        return {"error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    samples = []
+    ml = []
+    for _ in range(repeat):
+        result = run_snippet(_IMPORT_SNIPPET.format(module=module, ml=ML_PACKAGES))
+        if "error" in result:
+            return {"module": module, "error": result["error"]}
+        samples.append(result["sec"])
+        ml = result["ml"]
+    return {"module": module, "median_sec": statistics.median(samples), "max_sec": max(samples), "ml": ml}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈별 import 시간 및 모델 로드 시간 측정")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 측정 횟수 (중앙값 출력)")
+    parser.add_argument("--models", action="store_true", help="initialize_models 단계별 로드 시간도 측정")
+    args = parser.parse_args()
+
+    print(f"{'module':<24}{'median(s)':>11}{'max(s)':>9}  ML 라이브러리")
+    print("-" * 64)
+    leaks = []
+    for module in LIGHT_MODULES + HEAVY_MODULES:
+        row = measure_import(module, args.repeat)
+        if "error" in row:
+            print(f"{module:<24}{'-':>11}{'-':>9}  import 실패: {row['error']}")
+            continue
+        print(f"{module:<24}{row['median_sec']:>11.3f}{row['max_sec']:>9.3f}  {', '.join(row['ml']) or '-'}")
+        if module in LIGHT_MODULES and row["ml"]:
+            leaks.append(module)
+
+    if args.models:
+        print("\n--- 모델 로드 (initialize_models) ---")
+        result = run_snippet(_MODELS_SNIPPET)
+        if "error" in result:
+            print(f"모델 로드 실패: {result['error']}")
+        else:
+            print(f"inference import {result['import_sec']:.2f}s, 전체 {result['total_sec']:.2f}s")
+            for name, info in result["load"].items():
+                print(f"  {name}: {json.dumps(info, ensure_ascii=False)}")
+
+    if leaks:
+        print(f"\n🚨 ML 라이브러리를 import하는 API/DB 모듈: {', '.join(leaks)}")
+        sys.exit(1)
+    print("\n✅ API/DB 계층은 ML 라이브러리 없이 import됩니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,74 @@
 결과 저장 및 조회
 """
 
+import base64
 import sqlite3
+import threading
+import queue
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 import json
 
+from .image_store import save_base64_image
+
 DB_PATH = "results.db"
 
+# 연결마다 적용하는 SQLite 설정 (WAL: 읽기와 쓰기가 서로 막지 않음)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# 한 트랜잭션으로 묶어서 커밋하는 최대 저장 요청 수
+WRITE_BATCH_SIZE = 256
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
 
-def get_connection():
-    """데이터베이스 연결"""
-    conn = sqlite3.connect(DB_PATH)
+def get_connection(check_same_thread: bool = True):
+    """데이터베이스 연결 (새 연결, 사용 후 호출자가 close)"""
+    conn = sqlite3.connect(DB_PATH, timeout=5.0, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
-def init_db():
-    """데이터베이스 초기화 (테이블 생성)"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+def _thread_connection():
+    """현재 스레드에서 재사용하는 연결 (스레드별 연결 풀)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DB_PATH:
+        conn = get_connection()
+        _local.conn = conn
+        _local.path = DB_PATH
+    return conn
+
+
+# details JSON에서 별도 컬럼으로 승격한 필드 (필터/리포트 조회용)
+DETAIL_COLUMNS = (
+    "product_model",
+    "language",
+    "model_status",
+    "text_count",
+    "home_status",
+    "id_back_status",
+    "status_status",
+    "screen_status",
+)
+
+# INSERT 대상 컬럼 (id 제외)
+RESULT_COLUMNS = ("filename", "status", "reason", "confidence", "details", "timestamp", "image_ref") + DETAIL_COLUMNS
+
+
+def _migrate_v1(conn):
+    """v1: 기본 테이블"""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS analysis_results (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             filename TEXT NOT NULL,
@@ -34,58 +81,315 @@ def init_db():
             timestamp TEXT NOT NULL
         )
     """)
-    
-    conn.commit()
-    conn.close()
 
 
-def save_result(
+def _migrate_v2(conn):
+    """v2: details 필드를 컬럼으로 승격 (기존 행 채우기) + timestamp 인덱스"""
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(analysis_results)")}
+    for column in DETAIL_COLUMNS:
+        if column not in existing:
+            column_type = "INTEGER" if column == "text_count" else "TEXT"
+            conn.execute(f"ALTER TABLE analysis_results ADD COLUMN {column} {column_type}")
+
+    # 기존 행의 details JSON에서 값 채우기 (메모리 사용량을 위해 나눠서 처리)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, details FROM analysis_results WHERE id > ? ORDER BY id LIMIT 1000",
+            (last_id,)
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            details = json.loads(row["details"]) if row["details"] else {}
+            updates.append(tuple(_detail_values(details)) + (row["id"],))
+        conn.executemany(
+            f"UPDATE analysis_results SET {', '.join(f'{c} = ?' for c in DETAIL_COLUMNS)} WHERE id = ?",
+            updates
+        )
+        last_id = rows[-1]["id"]
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_results_timestamp ON analysis_results (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_results_status_timestamp ON analysis_results (status, timestamp)")
+
+
+def _migrate_v3(conn):
+    """v3: details의 base64 주석 이미지를 이미지 저장소로 이동하고 참조(image_ref)만 기록"""
+    existing = {row["name"] for row in conn.execute("PRAGMA table_info(analysis_results)")}
+    if "image_ref" not in existing:
+        conn.execute("ALTER TABLE analysis_results ADD COLUMN image_ref TEXT")
+
+    moved = 0
+    last_id = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, details FROM analysis_results
+            WHERE id > ? AND details LIKE '%"annotated_image"%'
+            ORDER BY id LIMIT 200
+        """, (last_id,)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            details = json.loads(row["details"])
+            image_ref = save_base64_image(details.pop("annotated_image", None))
+            updates.append((json.dumps(details) if details else None, image_ref, row["id"]))
+        conn.executemany("UPDATE analysis_results SET details = ?, image_ref = ? WHERE id = ?", updates)
+        moved += len(rows)
+        last_id = rows[-1]["id"]
+
+    # 이미지를 옮긴 행이 있으면 마이그레이션 후 VACUUM으로 파일 크기 회수
+    return moved > 0
+
+
+# 통계 롤업 테이블: 버킷 (시간: YYYY-MM-DDTHH, 일: YYYY-MM-DD) 별 결과 개수
+# 그룹 키의 NULL은 UPSERT 충돌 판정을 위해 빈 문자열로 저장
+ROLLUP_TABLES = {
+    "result_rollups_hourly": 13,
+    "result_rollups_daily": 10,
+}
+ROLLUP_KEYS = ("status", "reason", "product_model", "language")
+
+
+def _migrate_v4(conn):
+    """v4: 시간/일 단위 통계 롤업 테이블 생성 및 기존 결과로 채우기"""
+    for table, bucket_len in ROLLUP_TABLES.items():
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket TEXT NOT NULL,
+                status TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                product_model TEXT NOT NULL,
+                language TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                confidence_sum REAL NOT NULL,
+                PRIMARY KEY (bucket, status, reason, product_model, language)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"""
+            INSERT INTO {table} (bucket, {', '.join(ROLLUP_KEYS)}, count, confidence_sum)
+            SELECT substr(timestamp, 1, {bucket_len}),
+                   {', '.join(f"COALESCE({k}, '')" for k in ROLLUP_KEYS)},
+                   COUNT(*), COALESCE(SUM(confidence), 0)
+            FROM analysis_results
+            GROUP BY 1, 2, 3, 4, 5
+        """)
+
+
+# 스키마 마이그레이션 (인덱스 + 1 = 버전, PRAGMA user_version에 현재 버전 기록)
+MIGRATIONS = (
+    _migrate_v1,
+    _migrate_v2,
+    _migrate_v3,
+    _migrate_v4,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """현재 버전 이후의 마이그레이션을 순서대로 적용"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    vacuum = False
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        print(f"DB 마이그레이션 적용: {migration.__doc__}")
+        with conn:
+            # 마이그레이션이 True를 반환하면 완료 후 VACUUM 수행
+            vacuum = bool(migration(conn)) or vacuum
+            conn.execute(f"PRAGMA user_version = {target}")
+
+    if vacuum:
+        conn.execute("VACUUM")
+
+
+def init_db():
+    """데이터베이스 초기화 (테이블 생성 및 마이그레이션, 프로세스당 한 번)"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+
+        conn = get_connection()
+        migrate(conn)
+        conn.close()
+        _schema_ready = True
+
+
+class _ResultWriter:
+    """
+    단일 쓰기 스레드: 동시에 들어온 저장 요청을 모아 한 트랜잭션으로 커밋 (group commit)
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, row: Dict) -> Future:
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((row, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = None
+        while True:
+            # 첫 요청을 기다린 뒤, 그동안 쌓인 요청을 최대 WRITE_BATCH_SIZE개까지 함께 처리
+            pending = [self._queue.get()]
+            while len(pending) < WRITE_BATCH_SIZE:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                if conn is None:
+                    init_db()
+                    conn = get_connection()
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            try:
+                ids = self._write(conn, [row for row, _ in pending])
+            except Exception as e:
+                conn.rollback()
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                    continue
+                # 한 행의 오류로 배치 전체가 실패하지 않도록 행마다 따로 커밋하고 실패한 요청만 오류 처리
+                for row, future in pending:
+                    self._write_one(conn, row, future)
+            else:
+                for (_, future), result_id in zip(pending, ids):
+                    future.set_result(result_id)
+
+    def _write_one(self, conn, row: Dict, future: Future):
+        try:
+            result_id = self._write(conn, [row])[0]
+        except Exception as e:
+            conn.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result_id)
+
+    @staticmethod
+    def _write(conn, rows: List[Dict]) -> List[int]:
+        cursor = conn.cursor()
+        ids = []
+        for row in rows:
+            cursor.execute(INSERT_RESULT_SQL, row)
+            ids.append(cursor.lastrowid)
+        # 같은 트랜잭션에서 통계 롤업 갱신
+        _update_rollups(cursor, rows)
+        conn.commit()
+        return ids
+
+
+def _update_rollups(cursor, rows: List[Dict]):
+    """저장된 결과를 버킷/그룹 키별로 모아 롤업 테이블에 누적"""
+    for table, bucket_len in ROLLUP_TABLES.items():
+        counts: Dict[tuple, List] = {}
+        for row in rows:
+            key = (row["timestamp"][:bucket_len],) + tuple(row[k] or "" for k in ROLLUP_KEYS)
+            entry = counts.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += row["confidence"] or 0.0
+
+        cursor.executemany(f"""
+            INSERT INTO {table} (bucket, {', '.join(ROLLUP_KEYS)}, count, confidence_sum)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (bucket, {', '.join(ROLLUP_KEYS)}) DO UPDATE SET
+                count = count + excluded.count,
+                confidence_sum = confidence_sum + excluded.confidence_sum
+        """, [key + (count, confidence_sum) for key, (count, confidence_sum) in counts.items()])
+
+
+_writer = _ResultWriter()
+
+INSERT_RESULT_SQL = f"""
+    INSERT INTO analysis_results ({', '.join(RESULT_COLUMNS)})
+    VALUES ({', '.join(':' + c for c in RESULT_COLUMNS)})
+"""
+
+
+def _detail_values(details: Dict) -> List:
+    return [details.get(column) for column in DETAIL_COLUMNS]
+
+
+def _result_row(
     filename: str,
     status: str,
     reason: Optional[str] = None,
     confidence: float = 0.0,
     details: Optional[Dict] = None
 ) -> Dict:
-    """
-    분석 결과 저장
-    
-    Returns:
-        저장된 결과 딕셔너리
-    """
-    init_db()
-    
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    timestamp = datetime.now().isoformat()
-    details_json = json.dumps(details) if details else None
-    
-    cursor.execute("""
-        INSERT INTO analysis_results (filename, status, reason, confidence, details, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (filename, status, reason, confidence, details_json, timestamp))
-    
-    result_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return {
-        "id": result_id,
+    # 주석 이미지는 이미지 저장소에 따로 저장하고 DB에는 참조만 기록
+    stored_details = dict(details or {})
+    image_ref = save_base64_image(stored_details.pop("annotated_image", None))
+
+    row = {
         "filename": filename,
         "status": status,
         "reason": reason,
         "confidence": confidence,
+        "details": json.dumps(stored_details) if stored_details else None,
+        "timestamp": datetime.now().isoformat(),
+        "image_ref": image_ref,
+    }
+    row.update(zip(DETAIL_COLUMNS, _detail_values(stored_details)))
+    return row
+
+
+def _saved_dict(result_id: int, row: Dict, details: Optional[Dict]) -> Dict:
+    return {
+        "id": result_id,
+        "filename": row["filename"],
+        "status": row["status"],
+        "reason": row["reason"],
+        "confidence": row["confidence"],
         "details": details,
-        "timestamp": timestamp
+        "timestamp": row["timestamp"],
+        "image_url": image_url(result_id) if row["image_ref"] else None
     }
 
 
+def save_result(
+    filename: str,
+    status: str,
+    reason: Optional[str] = None,
+    confidence: float = 0.0,
+    details: Optional[Dict] = None
+) -> Dict:
+    """
+    분석 결과 저장 (쓰기 스레드에서 다른 저장 요청과 함께 커밋)
+    
+    Returns:
+        저장된 결과 딕셔너리
+    """
+    row = _result_row(filename, status, reason, confidence, details)
+    result_id = _writer.submit(row).result()
+    return _saved_dict(result_id, row, details)
+
+
 def get_results(
     status: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    product_model: Optional[str] = None,
+    language: Optional[str] = None
 ) -> List[Dict]:
     """
     분석 결과 조회
@@ -96,10 +400,12 @@ def get_results(
         end_date: 종료일 (ISO 형식)
         limit: 최대 조회 개수
         offset: 시작 위치
+        product_model: 필터링할 제품 모델
+        language: 필터링할 텍스트 언어 코드
     """
     init_db()
     
-    conn = get_connection()
+    conn = _thread_connection()
     cursor = conn.cursor()
     
     query = "SELECT * FROM analysis_results WHERE 1=1"
@@ -118,13 +424,20 @@ def get_results(
         query += " AND timestamp <= ?"
         params.append(end_date + "T23:59:59")
 
+    if product_model:
+        query += " AND product_model = ?"
+        params.append(product_model)
+
+    if language:
+        query += " AND language = ?"
+        params.append(language)
+
     query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
     params.extend([limit, offset])
     
     cursor.execute(query, tuple(params))
     
     rows = cursor.fetchall()
-    conn.close()
     
     results = []
     for row in rows:
@@ -135,18 +448,235 @@ def get_results(
             "reason": row["reason"],
             "confidence": row["confidence"],
             "details": json.loads(row["details"]) if row["details"] else {},
-            "timestamp": row["timestamp"]
+            "timestamp": row["timestamp"],
+            "image_url": image_url(row["id"]) if row["image_ref"] else None
         })
     
     return results
 
 
+# 목록 요약 모드에서 반환하는 필드 (results-grid 화면에 필요한 값만)
+SUMMARY_FIELDS = ("id", "filename", "status", "reason", "confidence", "timestamp", "image_url") + DETAIL_COLUMNS
+
+# 기본 응답 필드 (get_results와 같은 형식)
+DEFAULT_FIELDS = ("id", "filename", "status", "reason", "confidence", "timestamp", "image_url", "details")
+
+# 선택 가능한 필드 전체 (DETAIL_COLUMNS는 응답의 "details" 안에 담김)
+RESULT_FIELDS = DEFAULT_FIELDS + DETAIL_COLUMNS
+
+
+def encode_cursor(timestamp: str, result_id: int) -> str:
+    """다음 페이지 조회용 커서 (마지막 행의 timestamp, id)"""
+    raw = json.dumps([timestamp, result_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, result_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), int(result_id)
+    except Exception:
+        raise ValueError(f"잘못된 커서입니다: {cursor}")
+
+
+def get_results_page(
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    product_model: Optional[str] = None,
+    language: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Dict:
+    """
+    분석 결과 목록 조회 (timestamp, id 기준 키셋 페이지네이션)
+
+    OFFSET 대신 이전 페이지 마지막 행 이후부터 인덱스로 바로 조회하므로
+    페이지 깊이와 관계없이 일정한 시간이 걸림
+
+    Args:
+        cursor: 이전 응답의 next_cursor (생략 시 첫 페이지)
+        fields: 반환할 필드 (생략 시 DEFAULT_FIELDS, 요약은 SUMMARY_FIELDS)
+
+    Returns:
+        {"results": [...], "next_cursor": 다음 페이지 커서 또는 None}
+    """
+    init_db()
+
+    fields = tuple(fields) if fields else DEFAULT_FIELDS
+    unknown = [f for f in fields if f not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드입니다: {', '.join(unknown)}")
+
+    # 응답 필드 → 조회 컬럼 (id, timestamp는 커서 계산에 항상 필요)
+    columns = ["id", "timestamp"]
+    for field in fields:
+        column = "image_ref" if field == "image_url" else field
+        if column not in columns:
+            columns.append(column)
+
+    query = f"SELECT {', '.join(columns)} FROM analysis_results WHERE 1=1"
+    params = []
+
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    if start_date:
+        query += " AND timestamp >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND timestamp <= ?"
+        params.append(end_date + "T23:59:59")
+    if product_model:
+        query += " AND product_model = ?"
+        params.append(product_model)
+    if language:
+        query += " AND language = ?"
+        params.append(language)
+    if cursor:
+        query += " AND (timestamp, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+
+    limit = max(1, limit)
+    # 다음 페이지 존재 여부 확인을 위해 한 행 더 조회
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = _thread_connection().execute(query, tuple(params)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    results = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            if field == "image_url":
+                item["image_url"] = image_url(row["id"]) if row["image_ref"] else None
+            elif field == "details":
+                item.setdefault("details", {}).update(json.loads(row["details"]) if row["details"] else {})
+            elif field in DETAIL_COLUMNS:
+                item.setdefault("details", {}).setdefault(field, row[field])
+            else:
+                item[field] = row[field]
+        results.append(item)
+
+    next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"]) if has_more else None
+    return {"results": results, "next_cursor": next_cursor}
+
+
+def iter_results(
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    chunk_size: int = 1000
+) -> Iterator[sqlite3.Row]:
+    """
+    리포트용 결과 행을 timestamp 내림차순으로 하나씩 반환 (행 수 제한 없음)
+
+    details JSON은 읽지 않고 승격된 컬럼만 조회하며, 커서에서 chunk_size씩 가져오므로
+    조회 기간과 관계없이 메모리 사용량이 일정함
+    (StreamingResponse는 매 반복을 다른 스레드에서 실행할 수 있어 전용 연결 사용)
+    """
+    init_db()
+
+    query = f"""
+        SELECT id, filename, status, reason, confidence, timestamp, {', '.join(DETAIL_COLUMNS)}
+        FROM analysis_results WHERE 1=1
+    """
+    params = []
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    if start_date:
+        query += " AND timestamp >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND timestamp <= ?"
+        params.append(end_date + "T23:59:59")
+    query += " ORDER BY timestamp DESC, id DESC"
+
+    conn = get_connection(check_same_thread=False)
+    try:
+        cursor = conn.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def image_url(result_id: int) -> str:
+    """결과 주석 이미지 조회 API 경로"""
+    return f"/api/results/{result_id}/image"
+
+
+def get_result_image_ref(result_id: int) -> Optional[str]:
+    """결과의 주석 이미지 참조 조회 (없으면 None)"""
+    init_db()
+
+    row = _thread_connection().execute(
+        "SELECT image_ref FROM analysis_results WHERE id = ?", (result_id,)
+    ).fetchone()
+    return row["image_ref"] if row else None
+
+
+# 시간 버킷 (YYYY-MM-DDTHH)에 붙이면 그 시간의 마지막 타임스탬프 이상이 되는 값
+HOUR_END = ":59:59.999999"
+
+
+def _rollup_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, Optional[List], List]:
+    """
+    날짜 조건에 맞는 롤업 테이블과 버킷 조건, 원본 테이블에서 집계할 경계 시간 선택
+
+    날짜만 (YYYY-MM-DD) 지정하면 일 단위, 시간까지 지정하면 시간 단위 롤업 사용
+    시작/종료 시각이 걸친 (일부만 포함되는) 시간은 롤업 대신 analysis_results에서 정확히 집계
+    종료일을 날짜만 지정하면 get_results와 같이 해당 날짜 전체 포함
+
+    Returns:
+        (롤업 테이블, 버킷 조건 [(연산자, 값), ...] (롤업을 쓰지 않으면 None),
+         analysis_results에서 집계할 시간 버킷 목록)
+    """
+    if all(d is None or len(d) <= 10 for d in (start_date, end_date)):
+        conditions = []
+        if start_date:
+            conditions.append((">=", start_date))
+        if end_date:
+            conditions.append(("<=", end_date))
+        return "result_rollups_daily", conditions, []
+
+    start_hour = start_date[:13] if start_date and len(start_date) > 10 else None
+    end_hour = end_date[:13] if end_date and len(end_date) > 10 else None
+    if start_hour is not None and start_hour == end_hour:
+        return "result_rollups_hourly", None, [start_hour]
+
+    conditions = []
+    edges = []
+    if start_hour:
+        conditions.append((">", start_hour))
+        edges.append(start_hour)
+    elif start_date:
+        conditions.append((">=", start_date))
+    if end_hour:
+        conditions.append(("<", end_hour))
+        edges.append(end_hour)
+    elif end_date:
+        conditions.append(("<=", end_date + "T23"))
+    return "result_rollups_hourly", conditions, edges
+
+
 def get_statistics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ) -> Dict:
     """
-    통계 조회
+    통계 조회 (save_result 시 갱신되는 시간/일 단위 롤업 테이블에서 집계)
+
+    start_date / end_date는 날짜 (YYYY-MM-DD) 또는 시각 (ISO 형식), 둘 다 경계 포함
+    시각으로 지정한 경계는 초 단위까지 정확히 반영 (경계 시간만 analysis_results에서 집계)
+    종료일을 날짜만 지정하면 해당 날짜 전체 포함
     
     Returns:
         {
@@ -154,60 +684,86 @@ def get_statistics(
             "pass": Pass 개수,
             "fail": Fail 개수,
             "pass_rate": Pass 비율,
-            "fail_reasons": {reason: count, ...}
+            "avg_confidence": 평균 신뢰도,
+            "fail_reasons": {reason: count, ...},
+            "by_product_model": {model: {"total", "pass", "fail"}, ...},
+            "by_language": {lang: {"total", "pass", "fail"}, ...}
         }
     """
     init_db()
-    
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # 날짜 필터 조건
-    date_filter = ""
+
+    table, conditions, edges = _rollup_range(start_date, end_date)
+
+    queries = []
     params = []
-    if start_date:
-        date_filter += " AND timestamp >= ?"
-        params.append(start_date)
-    if end_date:
-        date_filter += " AND timestamp <= ?"
-        params.append(end_date)
-    
-    # 전체 통계
-    cursor.execute(f"""
-        SELECT 
-            COUNT(*) as total,
-            SUM(CASE WHEN status = 'PASS' THEN 1 ELSE 0 END) as pass_count,
-            SUM(CASE WHEN status = 'FAIL' THEN 1 ELSE 0 END) as fail_count
-        FROM analysis_results
-        WHERE 1=1 {date_filter}
-    """, params)
-    
-    stats_row = cursor.fetchone()
-    total = stats_row["total"] or 0
-    pass_count = stats_row["pass_count"] or 0
-    fail_count = stats_row["fail_count"] or 0
+    if conditions is not None:
+        # 범위 안에 온전히 들어가는 버킷은 롤업 테이블에서
+        queries.append(f"""
+            SELECT {', '.join(ROLLUP_KEYS)}, count, confidence_sum
+            FROM {table}
+            WHERE 1=1 {''.join(f" AND bucket {op} ?" for op, _ in conditions)}
+        """)
+        params.extend(value for _, value in conditions)
+    if edges:
+        # 일부만 포함되는 시작/종료 시간은 원본 결과에서 (타임스탬프 인덱스 사용)
+        edge_filter = " OR ".join("(timestamp >= ? AND timestamp <= ?)" for _ in edges)
+        date_filter = ""
+        for edge in edges:
+            params.extend([edge, edge + HOUR_END])
+        if start_date:
+            date_filter += " AND timestamp >= ?"
+            params.append(start_date)
+        if end_date:
+            date_filter += " AND timestamp <= ?"
+            params.append(end_date if len(end_date) > 10 else end_date + "T23" + HOUR_END)
+        queries.append(f"""
+            SELECT {', '.join(f"COALESCE({k}, '') AS {k}" for k in ROLLUP_KEYS)},
+                   1 AS count, COALESCE(confidence, 0) AS confidence_sum
+            FROM analysis_results
+            WHERE ({edge_filter}) {date_filter}
+        """)
+
+    rows = _thread_connection().execute(f"""
+        SELECT {', '.join(ROLLUP_KEYS)}, SUM(count) AS count, SUM(confidence_sum) AS confidence_sum
+        FROM ({' UNION ALL '.join(queries)})
+        GROUP BY {', '.join(ROLLUP_KEYS)}
+    """, params).fetchall()
+
+    total = pass_count = fail_count = 0
+    confidence_sum = 0.0
+    fail_reasons: Dict[str, int] = {}
+    by_product_model: Dict[str, Dict] = {}
+    by_language: Dict[str, Dict] = {}
+
+    for row in rows:
+        count = row["count"]
+        total += count
+        confidence_sum += row["confidence_sum"]
+        is_pass = row["status"] == "PASS"
+        is_fail = row["status"] == "FAIL"
+        pass_count += count if is_pass else 0
+        fail_count += count if is_fail else 0
+
+        # Fail 사유별 통계
+        if is_fail and row["reason"]:
+            fail_reasons[row["reason"]] = fail_reasons.get(row["reason"], 0) + count
+
+        # 제품 모델 / 언어별 통계 (값이 없으면 "Unknown")
+        for breakdown, key in ((by_product_model, row["product_model"]), (by_language, row["language"])):
+            entry = breakdown.setdefault(key or "Unknown", {"total": 0, "pass": 0, "fail": 0})
+            entry["total"] += count
+            entry["pass"] += count if is_pass else 0
+            entry["fail"] += count if is_fail else 0
+
     pass_rate = (pass_count / total * 100) if total > 0 else 0
     
-    # Fail 사유별 통계
-    cursor.execute(f"""
-        SELECT reason, COUNT(*) as count
-        FROM analysis_results
-        WHERE status = 'FAIL' AND reason IS NOT NULL {date_filter}
-        GROUP BY reason
-        ORDER BY count DESC
-    """, params)
-    
-    fail_reasons = {}
-    for row in cursor.fetchall():
-        fail_reasons[row["reason"]] = row["count"]
-    
-    conn.close()
-    
     return {
         "total": total,
         "pass": pass_count,
         "fail": fail_count,
         "pass_rate": round(pass_rate, 2),
-        "fail_reasons": fail_reasons
+        "avg_confidence": round(confidence_sum / total, 2) if total > 0 else 0,
+        "fail_reasons": dict(sorted(fail_reasons.items(), key=lambda item: item[1], reverse=True)),
+        "by_product_model": by_product_model,
+        "by_language": by_language
     }
-
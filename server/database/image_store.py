@@ -0,0 +1,72 @@
+"""
+결과 이미지 저장소
+주석(annotated) 이미지를 내용 해시(SHA-256) 기반 파일로 저장하고 DB에는 참조만 기록
+"""
+
+import base64
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import Optional
+
+IMAGE_STORE_DIR = "annotated_images"
+
+# 참조 형식: <sha256 hex>.jpg
+_REF_PATTERN = re.compile(r"^[0-9a-f]{64}\.jpg$")
+
+
+def image_path(ref: str) -> str:
+    """참조를 실제 파일 경로로 변환 (형식이 잘못된 참조는 ValueError)"""
+    if not _REF_PATTERN.match(ref or ""):
+        raise ValueError(f"잘못된 이미지 참조입니다: {ref}")
+    # 한 디렉터리에 파일이 몰리지 않도록 해시 앞 2자리로 하위 디렉터리 구분
+    return os.path.join(IMAGE_STORE_DIR, ref[:2], ref)
+
+
+def save_image(data: bytes) -> str:
+    """
+    JPEG 바이트 저장 (같은 내용은 한 번만 저장)
+
+    Returns:
+        이미지 참조 문자열
+    """
+    ref = f"{hashlib.sha256(data).hexdigest()}.jpg"
+    path = image_path(ref)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return ref
+
+
+def _write_atomic(path: str, data: bytes):
+    """
+    같은 디렉터리의 고유한 임시 파일에 쓴 뒤 교체 (읽는 쪽에서 반쯤 쓰인 파일을 보지 않도록 함)
+    같은 내용을 여러 스레드가 동시에 저장해도 서로의 임시 파일을 건드리지 않음
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # 다른 스레드가 먼저 같은 내용을 저장함 (Windows에서는 사용 중인 파일을 교체할 수 없음)
+        if not os.path.exists(path):
+            raise
+
+
+def save_base64_image(encoded: str) -> Optional[str]:
+    """base64 인코딩된 JPEG 저장 (빈 값이면 None)"""
+    if not encoded:
+        return None
+    return save_image(base64.b64decode(encoded))
+
+
+def clear_images():
+    """저장된 이미지 전체 삭제 (DB 초기화 시 사용)"""
+    if os.path.isdir(IMAGE_STORE_DIR):
+        shutil.rmtree(IMAGE_STORE_DIR)
@@ -0,0 +1,105 @@
+"""
+분석 결과 리포트 (CSV / Excel) 생성
+DB 커서에서 행을 읽는 즉시 변환하여 내보내므로 결과 수와 관계없이 메모리 사용량이 일정함
+"""
+
+import csv
+import io
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List
+
+# CSV 헤더
+REPORT_HEADER = [
+    "ID",
+    "Filename",
+    "Timestamp",
+    "Final Status",
+    "Home Button",
+    "Status Button",
+    "Screen",
+    "ID/Back Button",
+    "Text Language",
+    "Fail Reason",
+    "Confidence",
+    "Product Model",
+]
+
+
+def report_row(row) -> List:
+    """DB 행 하나를 리포트 행으로 변환"""
+    # 분석 오류 등으로 상세 결과가 없는 행은 세부 항목을 N/A로 표시
+    has_details = row["model_status"] is not None
+
+    def detail(column):
+        return row[column] if has_details else "N/A"
+
+    return [
+        row["id"],
+        row["filename"],
+        row["timestamp"],
+        row["status"],
+        detail("home_status"),
+        detail("status_status"),
+        detail("screen_status"),
+        detail("id_back_status"),
+        detail("language"),
+        row["reason"],
+        row["confidence"],
+        detail("product_model"),
+    ]
+
+
+def iter_csv(rows: Iterable, flush_rows: int = 500) -> Iterator[str]:
+    """결과 행을 CSV 텍스트 조각으로 변환 (flush_rows 행마다 한 조각씩 반환)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_HEADER)
+
+    count = 0
+    for row in rows:
+        writer.writerow(report_row(row))
+        count += 1
+        if count % flush_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows: Iterable) -> BinaryIO:
+    """
+    결과 행을 Excel(xlsx) 파일로 작성 (openpyxl 필요)
+
+    write-only 모드로 행을 바로 기록하고 임시 파일 (일정 크기 이상은 디스크)에 저장
+
+    Returns:
+        처음 위치로 되감긴 파일 객체
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Excel 리포트를 만들려면 openpyxl 패키지가 필요합니다. (pip install openpyxl)")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Analysis Report")
+    sheet.append(REPORT_HEADER)
+    for row in rows:
+        sheet.append(report_row(row))
+
+    output = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def iter_file(fileobj: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """파일 객체를 chunk_size씩 읽어서 반환 후 닫음"""
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
@@ -0,0 +1,224 @@
+# 모델 변환 (cd server, python export_models.py --format onnx)
+# YOLO.pt / CNN_classifier.pt를 ONNX 또는 TorchScript로 변환하고 eager 모델과 출력 일치 여부를 확인
+# 변환된 모델은 INFERENCE_BACKEND=onnx (또는 torchscript) 환경변수로 서버에서 사용
+# --checkpoint: CNN 가중치와 ViT 설정을 하나의 .safetensors 파일로 저장 (mmap 로드로 서버 시작 시간 단축)
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+from models.backends import BACKEND_ONNX, BACKEND_TORCHSCRIPT, exported_model_path
+from models.cnn_model import CNNModel, ViTExportWrapper, build_classifier, load_vit_config, read_checkpoint
+from models.yolo_model import YOLO_IMGSZ
+
+EXPORT_FORMATS = (BACKEND_ONNX, BACKEND_TORCHSCRIPT)
+ONNX_OPSET = 17
+
+
+def export_cnn(cnn_path: str, fmt: str) -> str:
+    """ViT 분류기를 변환 (입력: (B, 3, 224, 224), 출력: 버튼/텍스트 헤드 로짓)"""
+    cnn = CNNModel(model_path=cnn_path)
+    wrapper = ViTExportWrapper(cnn.model.cpu()).eval()
+    example = torch.randn(2, 3, 224, 224)
+    path = exported_model_path(cnn_path, fmt)
+
+    with torch.no_grad():
+        if fmt == BACKEND_ONNX:
+            torch.onnx.export(
+                wrapper, (example,), path,
+                input_names=["pixel_values"],
+                output_names=["btn_logits", "txt_logits"],
+                dynamic_axes={
+                    "pixel_values": {0: "batch"},
+                    "btn_logits": {0: "batch"},
+                    "txt_logits": {0: "batch"},
+                },
+                opset_version=ONNX_OPSET,
+                do_constant_folding=True,
+            )
+        else:
+            traced = torch.jit.trace(wrapper, example, strict=False)
+            frozen = torch.jit.freeze(traced.eval())
+            torch.jit.save(frozen, path)
+    return path
+
+
+def save_cnn_checkpoint(cnn_path: str) -> str:
+    """
+    CNN 체크포인트를 .safetensors로 저장 (metadata["vit_config"]에 ViT 설정 포함)
+    같은 이름의 .safetensors가 있으면 서버가 .pt 대신 사용
+    """
+    try:
+        from safetensors.torch import save_file
+    except ImportError:
+        raise RuntimeError("체크포인트 저장에는 safetensors 패키지가 필요합니다. (pip install safetensors)")
+
+    state_dict, config = read_checkpoint(cnn_path)
+    config = load_vit_config(config)
+    # 모델 구조와 정확히 맞는지 확인한 뒤 저장
+    model = build_classifier(state_dict, config)
+    tensors = {key: value.contiguous() for key, value in model.state_dict().items()}
+    path = os.path.splitext(cnn_path)[0] + ".safetensors"
+    save_file(tensors, path, metadata={"vit_config": json.dumps(config.to_diff_dict())})
+    return path
+
+
+def export_yolo(yolo_path: str, fmt: str) -> str:
+    """YOLO 모델을 ultralytics export로 변환 (ONNX는 배치 크기 가변)"""
+    from ultralytics import YOLO
+    if not os.path.exists(yolo_path):
+        raise FileNotFoundError(f"YOLO 모델 파일을 찾을 수 없습니다: {yolo_path}")
+    model = YOLO(yolo_path)
+    if fmt == BACKEND_ONNX:
+        exported = model.export(format="onnx", imgsz=YOLO_IMGSZ, dynamic=True, opset=ONNX_OPSET)
+    else:
+        exported = model.export(format="torchscript", imgsz=YOLO_IMGSZ)
+    path = exported_model_path(yolo_path, fmt)
+    if os.path.abspath(str(exported)) != os.path.abspath(path):
+        os.replace(str(exported), path)
+    return path
+
+
+def check_cnn_parity(cnn_path: str, fmt: str, atol: float, batch_size: int = 8) -> bool:
+    """eager 모델과 변환 모델의 헤드 로짓 비교 (최대 절대 오차, 예측 클래스 일치율)"""
+    eager = CNNModel(model_path=cnn_path)
+    exported = CNNModel(model_path=cnn_path, backend=fmt)
+
+    torch.manual_seed(0)
+    x = torch.rand(batch_size, 3, 224, 224) * 2 - 1
+    wrapper = ViTExportWrapper(eager.model.cpu()).eval()
+    with torch.no_grad():
+        expected = [t.numpy() for t in wrapper(x)]
+        if fmt == BACKEND_ONNX:
+            actual = exported.session.run(None, {"pixel_values": x.numpy()})
+        else:
+            actual = [t.cpu().numpy() for t in exported.model(x)]
+
+    ok = True
+    for name, e, a in zip(("btn_logits", "txt_logits"), expected, actual):
+        max_diff = float(np.abs(e - a).max())
+        agree = float((e.argmax(axis=1) == a.argmax(axis=1)).mean())
+        passed = max_diff <= atol and agree == 1.0
+        ok = ok and passed
+        print(f"  CNN {name}: max_abs_diff={max_diff:.2e}, argmax 일치율={agree:.0%} -> {'OK' if passed else 'FAIL'}")
+    return ok
+
+
+def check_yolo_parity(yolo_path: str, fmt: str, samples: list, iou_threshold: float = 0.9) -> bool:
+    """샘플 이미지에서 eager 모델과 변환 모델의 검출 결과 비교 (클래스 + IoU로 짝지음)"""
+    import cv2
+    from models.yolo_model import YOLOModel
+    from models.matching import iou
+
+    if not samples:
+        print("  YOLO: --samples 이미지가 없어 비교를 건너뜁니다.")
+        return True
+
+    eager = YOLOModel(model_path=yolo_path)
+    exported = YOLOModel(model_path=yolo_path, backend=fmt)
+
+    ok = True
+    for sample in samples:
+        image = cv2.imread(sample, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"  YOLO: 이미지를 읽을 수 없습니다: {sample}")
+            ok = False
+            continue
+        # 서버와 같은 RGB 입력
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        expected = eager.detect(image)["detections"]
+        actual = exported.detect(image)["detections"]
+
+        matched = 0
+        used = set()
+        for e in expected:
+            for k, a in enumerate(actual):
+                if k not in used and a["class"] == e["class"] and iou(a["bbox"], e["bbox"]) >= iou_threshold:
+                    used.add(k)
+                    matched += 1
+                    break
+        passed = matched == len(expected) == len(actual)
+        ok = ok and passed
+        print(f"  YOLO {os.path.basename(sample)}: eager={len(expected)}, {fmt}={len(actual)}, "
+              f"일치={matched} -> {'OK' if passed else 'FAIL'}")
+    return ok
+
+
+def benchmark_cnn(cnn_path: str, fmt: str, batch_size: int = 8, repeat: int = 10):
+    """eager / 변환 모델의 ViT 배치 추론 시간 비교"""
+    x = torch.rand(batch_size, 3, 224, 224) * 2 - 1
+    conditions = ["Btn_Home"] * (batch_size // 2) + ["Text"] * (batch_size - batch_size // 2)
+    for backend in ("torch", fmt):
+        model = CNNModel(model_path=cnn_path, backend=backend)
+        with torch.no_grad():
+            model._forward_logits(x, conditions)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                model._forward_logits(x, conditions)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"  CNN {backend}: 배치 {batch_size}장 {elapsed * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO / ViT 모델을 ONNX 또는 TorchScript로 변환")
+    parser.add_argument("--format", choices=EXPORT_FORMATS + ("all", "none"), default=BACKEND_ONNX,
+                        help="none이면 변환 없이 --checkpoint만 수행")
+    parser.add_argument("--yolo", default="models/YOLO.pt")
+    parser.add_argument("--cnn", default="models/CNN_classifier.pt")
+    parser.add_argument("--samples", nargs="*", default=[],
+                        help="YOLO 출력 비교에 사용할 이미지 파일 또는 디렉터리")
+    parser.add_argument("--atol", type=float, default=1e-3, help="CNN 로짓 허용 오차")
+    parser.add_argument("--skip-check", action="store_true", help="eager 모델과의 출력 비교 생략")
+    parser.add_argument("--benchmark", action="store_true", help="CNN eager / 변환 모델 추론 시간 비교")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="CNN 가중치 + ViT 설정을 하나의 .safetensors 체크포인트로 저장")
+    args = parser.parse_args()
+
+    if args.checkpoint:
+        print(f"CNN 체크포인트 저장 완료: {save_cnn_checkpoint(args.cnn)}")
+
+    if args.format == "none":
+        formats = ()
+    else:
+        formats = EXPORT_FORMATS if args.format == "all" else (args.format,)
+    samples = []
+    for sample in args.samples:
+        if os.path.isdir(sample):
+            samples.extend(sorted(glob.glob(os.path.join(sample, "*.jpg")) + glob.glob(os.path.join(sample, "*.png"))))
+        else:
+            samples.append(sample)
+
+    all_ok = True
+    for fmt in formats:
+        print(f"--- {fmt} 변환 시작 ---")
+        try:
+            print(f"CNN 변환 완료: {export_cnn(args.cnn, fmt)}")
+            print(f"YOLO 변환 완료: {export_yolo(args.yolo, fmt)}")
+        except Exception as e:
+            print(f"🚨 {fmt} 변환 실패: {e}")
+            all_ok = False
+            continue
+
+        if not args.skip_check:
+            print(f"--- {fmt} 출력 비교 (eager 기준) ---")
+            cnn_ok = check_cnn_parity(args.cnn, fmt, args.atol)
+            yolo_ok = check_yolo_parity(args.yolo, fmt, samples)
+            all_ok = all_ok and cnn_ok and yolo_ok
+
+        if args.benchmark:
+            print(f"--- {fmt} 추론 시간 ---")
+            benchmark_cnn(args.cnn, fmt)
+
+    if not all_ok:
+        print("🚨 변환 또는 출력 비교에 실패했습니다.")
+        sys.exit(1)
+    print("✅ 모델 변환 및 출력 비교 완료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+배치 분석 작업(Job) 관리
+작업별 진행률/ETA/처리량 및 결과를 보관 (동시 업로드 간 진행 상황이 섞이지 않도록)
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_CANCELLED = "cancelled"
+
+
+def strip_annotated_image(result: Dict) -> Dict:
+    """details의 annotated_image를 뺀 결과 사본 (원본 결과는 그대로 둠)"""
+    details = result.get("details")
+    if not isinstance(details, dict) or "annotated_image" not in details:
+        return result
+    stored = dict(result)
+    stored["details"] = {key: value for key, value in details.items() if key != "annotated_image"}
+    return stored
+
+
+class AnalysisJob:
+    """배치 분석 작업 하나의 상태"""
+
+    def __init__(self, total_count: int):
+        self.id = uuid.uuid4().hex
+        self.status = JOB_QUEUED
+        self.total_count = total_count
+        self.completed_count = 0
+        self.error_count = 0
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # 완료된 순서대로 쌓이는 결과 (각 결과의 "index"는 업로드 순서)
+        self.results: List[Dict] = []
+        self.last_processed_info = {
+            "filename": "N/A",
+            "elapsed_time_sec": 0.0,
+            "status": "Ready"
+        }
+        # 작업을 실행하는 태스크 (취소 시 함께 취소, 파일별 태스크를 묶은 gather future일 수 있음)
+        self.task: Optional[asyncio.Future] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+    def start(self):
+        self.status = JOB_RUNNING
+        self.started_at = time.time()
+
+    def add_result(self, index: int, result: Dict) -> bool:
+        """
+        파일 하나의 결과 기록 (취소 등으로 끝난 작업에 늦게 도착한 결과는 무시, 기록 여부 반환)
+        완료 작업은 최대 max_finished_jobs개를 finished_ttl_sec 동안 보관하므로
+        base64 주석 이미지(annotated_image)는 빼고 보관 (이미지는 결과의 image_url로 조회)
+        """
+        if not self.is_running:
+            return False
+        result["index"] = index
+        self.results.append(strip_annotated_image(result))
+        self.completed_count += 1
+        if result.get("status") == "ERROR":
+            self.error_count += 1
+        self.last_processed_info = {
+            "filename": result.get("filename", "N/A"),
+            "elapsed_time_sec": result.get("elapsed_time", 0.0),
+            "status": result.get("status", "ERROR")
+        }
+        return True
+
+    def finish(self, status: str = JOB_COMPLETED):
+        self.status = status
+        self.finished_at = time.time()
+
+    def get_progress(self) -> Dict:
+        """진행률, 경과 시간, 처리량(장/초), 남은 예상 시간"""
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+
+        throughput = self.completed_count / elapsed if elapsed > 0 else 0.0
+        remaining = self.total_count - self.completed_count
+        if not self.is_running or remaining == 0:
+            eta = 0.0
+        elif throughput > 0:
+            eta = remaining / throughput
+        else:
+            eta = None
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "is_running": self.is_running,
+            "total_count": self.total_count,
+            "completed_count": self.completed_count,
+            "error_count": self.error_count,
+            "progress_percent": round(self.completed_count / self.total_count * 100, 2) if self.total_count else 100.0,
+            "elapsed_sec": round(elapsed, 2),
+            "throughput_per_sec": round(throughput, 2),
+            "eta_sec": round(eta, 2) if eta is not None else None,
+            "created_at": self.created_at,
+            "last_processed_info": self.last_processed_info
+        }
+
+    def get_results(self, since: int = 0, limit: Optional[int] = None) -> Dict:
+        """since 번째 이후의 결과 (완료 순서 기준)를 증분으로 반환"""
+        since = max(0, since)
+        end = len(self.results) if limit is None else min(len(self.results), since + max(0, limit))
+        return {
+            "job_id": self.id,
+            "results": self.results[since:end],
+            "next_since": end,
+            "is_running": self.is_running
+        }
+
+
+class JobManager:
+    """작업 생성/조회 및 오래된 완료 작업 정리"""
+
+    def __init__(self, max_finished_jobs: int = 50, finished_ttl_sec: float = 3600.0):
+        self.max_finished_jobs = max_finished_jobs
+        self.finished_ttl_sec = finished_ttl_sec
+        self._jobs: Dict[str, AnalysisJob] = {}
+
+    def create_job(self, total_count: int) -> AnalysisJob:
+        self._evict()
+        job = AnalysisJob(total_count)
+        self._jobs[job.id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[AnalysisJob]:
+        return self._jobs.get(job_id)
+
+    def latest_job(self) -> Optional[AnalysisJob]:
+        if not self._jobs:
+            return None
+        return next(reversed(self._jobs.values()))
+
+    def cancel_job(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.is_running:
+            if job.task is not None:
+                job.task.cancel()
+            job.finish(JOB_CANCELLED)
+        return job
+
+    def _evict(self):
+        now = time.time()
+        finished = [job for job in self._jobs.values() if not job.is_running]
+        for job in finished:
+            if now - job.finished_at > self.finished_ttl_sec:
+                self._jobs.pop(job.id, None)
+        finished = [job for job in self._jobs.values() if not job.is_running]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            self._jobs.pop(job.id, None)
+
+
+# 서버 전역 작업 관리자
+job_manager = JobManager()
@@ -0,0 +1,226 @@
+"""
+실시간 카메라 세션 관리
+카메라별로 분석 대기 프레임을 최신 한 장만 유지 (latest-frame-wins)하여
+추론이 카메라 주기보다 느려도 결과 지연이 쌓이지 않도록 함
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+# 프레임 처리 함수: (프레임 바이트, 옵션 + camera_id/frame) -> 분석 결과
+FrameProcessor = Callable[[bytes, Dict], Awaitable[Dict]]
+# 세션 종료 시 호출 함수: (세션) -> None
+SessionCloseHook = Callable[["LiveSession"], Awaitable[None]]
+
+# FPS 계산에 사용하는 최근 구간 (초)
+FPS_WINDOW_SEC = 5.0
+
+
+class FrameSkipped(Exception):
+    """더 최신 프레임이 도착하여 분석하지 않고 건너뛴 프레임"""
+
+    def __init__(self, frame: int):
+        super().__init__(f"더 최신 프레임이 도착하여 프레임 {frame}을 건너뛰었습니다.")
+        self.frame = frame
+
+
+class LiveSession:
+    """카메라 하나의 실시간 분석 세션 (대기 프레임 1장 + 순차 처리 루프)"""
+
+    def __init__(self, camera_id: str, processor: FrameProcessor, on_close: Optional[SessionCloseHook] = None):
+        self.camera_id = camera_id
+        self.processor = processor
+        self.on_close = on_close
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        # 프레임 간 추적 상태 키 (스트림이 끝나면 새로 발급하여 재연결 시 이전 상태를 이어받지 않음)
+        self.track_key = self._new_track_key()
+
+        # (frame, 바이트, 옵션, 수신 시각, Future)
+        self._pending: Optional[tuple] = None
+        self._frame_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._processing_frame: Optional[int] = None
+
+        # 메트릭
+        self.received_frames = 0
+        self.processed_frames = 0
+        self.dropped_frames = 0
+        self.error_frames = 0
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+        self._received_times = deque()
+        self._processed_times = deque()
+
+    def push(self, contents: bytes, options: Optional[Dict] = None) -> asyncio.Future:
+        """
+        프레임 하나를 분석 대기열에 넣음 (이전 대기 프레임은 FrameSkipped로 종료)
+
+        Returns:
+            분석 결과 Future (결과 dict에 "frame" 순번 포함)
+        """
+        if self._task is None:
+            self._frame_ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+        now = time.perf_counter()
+        self.last_active = time.time()
+        self.received_frames += 1
+        self._record(self._received_times, now)
+
+        if self._pending is not None:
+            # 아직 분석을 시작하지 못한 이전 프레임은 버림
+            frame, _, _, _, future = self._pending
+            self.dropped_frames += 1
+            if not future.done():
+                future.set_exception(FrameSkipped(frame))
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending = (self.received_frames, contents, options or {}, now, future)
+        self._frame_ready.set()
+        return future
+
+    async def _run(self):
+        while True:
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            pending, self._pending = self._pending, None
+            if pending is None:
+                continue
+
+            frame, contents, options, received_at, future = pending
+            if future.done():
+                # 요청한 쪽이 이미 취소함 (클라이언트 연결 종료 등)
+                self.dropped_frames += 1
+                continue
+
+            self._processing_frame = frame
+            try:
+                result = await self.processor(contents, {**options, "camera_id": self.camera_id, "frame": frame})
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.error_frames += 1
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            finally:
+                self._processing_frame = None
+
+            now = time.perf_counter()
+            self.processed_frames += 1
+            self.last_latency = now - received_at
+            self.total_latency += self.last_latency
+            self._record(self._processed_times, now)
+
+            result["frame"] = frame
+            result["latency_ms"] = round(self.last_latency * 1000, 1)
+            if not future.done():
+                future.set_result(result)
+
+    def _new_track_key(self) -> str:
+        return f"{self.camera_id}:{uuid.uuid4().hex[:8]}"
+
+    def rotate_track_key(self) -> str:
+        """추적 상태 키를 새로 발급하고 이전 키 반환 (이전 키의 추적 상태는 호출한 쪽에서 해제)"""
+        old_key, self.track_key = self.track_key, self._new_track_key()
+        return old_key
+
+    @staticmethod
+    def _record(times: deque, now: float):
+        times.append(now)
+        while times and now - times[0] > FPS_WINDOW_SEC:
+            times.popleft()
+
+    @staticmethod
+    def _fps(times: deque) -> float:
+        now = time.perf_counter()
+        while times and now - times[0] > FPS_WINDOW_SEC:
+            times.popleft()
+        if len(times) < 2:
+            return 0.0
+        span = max(now - times[0], times[-1] - times[0])
+        return (len(times) - 1) / span if span > 0 else 0.0
+
+    @property
+    def is_idle(self) -> bool:
+        return self._pending is None and self._processing_frame is None
+
+    async def close(self):
+        """처리 루프 종료 (대기 중인 프레임은 취소)"""
+        if self._pending is not None:
+            future = self._pending[4]
+            if not future.done():
+                future.cancel()
+            self._pending = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.on_close is not None:
+            try:
+                await self.on_close(self)
+            except Exception as e:
+                print(f"[WARN] 실시간 세션 종료 처리 실패 ({self.camera_id}): {e}")
+
+    def get_metrics(self) -> Dict:
+        """입력/처리 FPS, 버린 프레임 수, 지연 시간"""
+        return {
+            "camera_id": self.camera_id,
+            "received_frames": self.received_frames,
+            "processed_frames": self.processed_frames,
+            "dropped_frames": self.dropped_frames,
+            "error_frames": self.error_frames,
+            "drop_rate": round(self.dropped_frames / self.received_frames, 4) if self.received_frames else 0.0,
+            "input_fps": round(self._fps(self._received_times), 2),
+            "effective_fps": round(self._fps(self._processed_times), 2),
+            "last_latency_ms": round(self.last_latency * 1000, 1),
+            "avg_latency_ms": round(self.total_latency / self.processed_frames * 1000, 1) if self.processed_frames else 0.0,
+            "processing_frame": self._processing_frame,
+            "has_pending_frame": self._pending is not None,
+            "idle_sec": round(time.time() - self.last_active, 1),
+        }
+
+
+class LiveSessionManager:
+    """카메라 ID별 세션 생성/조회 및 오래 사용하지 않은 세션 정리"""
+
+    def __init__(self, idle_ttl_sec: float = 300.0):
+        self.idle_ttl_sec = idle_ttl_sec
+        self._sessions: Dict[str, LiveSession] = {}
+
+    async def get_session(self, camera_id: str, processor: FrameProcessor,
+                          on_close: Optional[SessionCloseHook] = None) -> LiveSession:
+        await self._evict()
+        session = self._sessions.get(camera_id)
+        if session is None:
+            session = LiveSession(camera_id, processor, on_close)
+            self._sessions[camera_id] = session
+        return session
+
+    def get_metrics(self) -> Dict:
+        return {camera_id: session.get_metrics() for camera_id, session in self._sessions.items()}
+
+    async def close_all(self):
+        for session in list(self._sessions.values()):
+            await session.close()
+        self._sessions.clear()
+
+    async def _evict(self):
+        now = time.time()
+        for camera_id, session in list(self._sessions.items()):
+            if now - session.last_active > self.idle_ttl_sec and session.is_idle:
+                self._sessions.pop(camera_id, None)
+                await session.close()
+
+
+# 서버 전역 실시간 세션 관리자
+live_sessions = LiveSessionManager()
@@ -0,0 +1,175 @@
+"""
+실시간 프레임 결과의 제품(Unit) 단위 통합
+카메라 아래에 같은 제품이 머무는 동안의 프레임 결과를 하나로 모아
+제품이 바뀌거나 (검출 BBox 집합 변화) 화면에서 사라지면 통합 결과 1건을 만듦
+"""
+
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models.matching import iou, majority
+
+# 직전 프레임과의 검출 유사도가 이 값보다 낮으면 새 제품으로 판단
+UNIT_SIMILARITY_THRESHOLD = float(os.getenv("LIVE_UNIT_SIMILARITY", "0.5"))
+# 검출이 없는 프레임이 연속으로 이 수만큼 나오면 제품이 빠진 것으로 판단
+UNIT_EMPTY_FRAMES = int(os.getenv("LIVE_UNIT_EMPTY_FRAMES", "2"))
+# 이 시간 (초) 동안 프레임이 없으면 진행 중인 제품 결과를 마감
+UNIT_IDLE_SEC = float(os.getenv("LIVE_UNIT_IDLE_SEC", "10"))
+
+
+def detection_similarity(previous: List[Dict], current: List[Dict]) -> float:
+    """
+    두 프레임 검출 결과의 유사도 (0~1)
+    같은 클래스끼리 IoU가 가장 큰 BBox를 짝지은 IoU 합을 두 검출 수 중 큰 값으로 나눔
+    """
+    if not previous or not current:
+        return 0.0
+    used = set()
+    total = 0.0
+    for detection in current:
+        best, best_iou = None, 0.0
+        for k, candidate in enumerate(previous):
+            if k in used or candidate["class"] != detection["class"]:
+                continue
+            overlap = iou(candidate["bbox"], detection["bbox"])
+            if overlap > best_iou:
+                best, best_iou = k, overlap
+        if best is not None:
+            used.add(best)
+            total += best_iou
+    return total / max(len(previous), len(current))
+
+
+class UnitSegmenter:
+    """카메라 하나의 프레임 결과를 제품 단위로 묶는 상태"""
+
+    def __init__(self, camera_id: str):
+        self.camera_id = camera_id
+        self.unit_count = 0
+        self._unit: Optional[Dict] = None
+        self._empty_frames = 0
+
+    def add(self, result: Dict, frame: Optional[int] = None) -> List[Dict]:
+        """
+        프레임 결과 하나 추가
+
+        Returns:
+            이 프레임으로 마감된 제품의 통합 결과 리스트 (save_result 인수 형식)
+        """
+        finished = []
+        now = time.time()
+        if self._unit is not None and now - self._unit["last_at"] > UNIT_IDLE_SEC:
+            finished.append(self._finish())
+
+        details = result.get("details") or {}
+        if "yolo_detections" not in details:
+            # 분석 오류 프레임은 제품 구분에 사용하지 않음
+            return finished
+
+        detections = details["yolo_detections"]
+        if not detections:
+            if self._unit is not None:
+                self._empty_frames += 1
+                if self._empty_frames >= UNIT_EMPTY_FRAMES:
+                    finished.append(self._finish())
+            return finished
+
+        self._empty_frames = 0
+        if self._unit is not None and \
+                detection_similarity(self._unit["detections"], detections) < UNIT_SIMILARITY_THRESHOLD:
+            finished.append(self._finish())
+
+        if self._unit is None:
+            self.unit_count += 1
+            self._unit = {
+                "number": self.unit_count,
+                "started_at": now,
+                "first_frame": frame,
+                "statuses": [],
+                "reasons": [],
+                "confidences": [],
+                # 판정별 신뢰도가 가장 높은 프레임 결과 (대표 결과)
+                "best": {},
+            }
+
+        unit = self._unit
+        status = result["status"]
+        confidence = result.get("confidence", 0) or 0
+        unit["statuses"].append(status)
+        unit["reasons"].append((status, result.get("reason")))
+        unit["confidences"].append(confidence)
+        unit["detections"] = detections
+        unit["last_at"] = now
+        unit["last_frame"] = frame
+        if status not in unit["best"] or confidence >= unit["best"][status][0]:
+            unit["best"][status] = (confidence, result)
+        return finished
+
+    def flush(self) -> Optional[Dict]:
+        """진행 중인 제품 결과를 마감 (스트림 종료 시)"""
+        if self._unit is None:
+            return None
+        return self._finish()
+
+    def current_unit(self) -> Optional[Dict]:
+        if self._unit is None:
+            return None
+        return {"unit": self._unit["number"], "frame_count": len(self._unit["statuses"])}
+
+    def _finish(self) -> Dict:
+        unit, self._unit = self._unit, None
+        self._empty_frames = 0
+
+        statuses = unit["statuses"]
+        status = majority(statuses)
+        _, representative = unit["best"][status]
+        reasons = [reason for s, reason in unit["reasons"] if s == status]
+        confidences = unit["confidences"]
+
+        details = dict(representative.get("details") or {})
+        details.pop("tracking", None)
+        details["unit"] = {
+            "camera_id": self.camera_id,
+            "unit": unit["number"],
+            "frame_count": len(statuses),
+            "first_frame": unit["first_frame"],
+            "last_frame": unit["last_frame"],
+            "started_at": datetime.fromtimestamp(unit["started_at"]).isoformat(),
+            "ended_at": datetime.fromtimestamp(unit["last_at"]).isoformat(),
+            "status_votes": dict(Counter(statuses)),
+            "confidence_avg": round(sum(confidences) / len(confidences), 2),
+            "confidence_min": round(min(confidences), 2),
+            "confidence_max": round(max(confidences), 2),
+        }
+
+        started = datetime.fromtimestamp(unit["started_at"]).strftime('%Y%m%d_%H%M%S')
+        return {
+            "filename": f"CAMERA_{started}_{self.camera_id}_unit{unit['number']}.jpg",
+            "status": status,
+            "reason": majority(reasons) if reasons else None,
+            "confidence": details["unit"]["confidence_avg"],
+            "details": details,
+        }
+
+
+# 카메라 ID별 제품 단위 통합 상태
+_segmenters: Dict[str, UnitSegmenter] = {}
+
+
+def get_segmenter(camera_id: str) -> UnitSegmenter:
+    segmenter = _segmenters.get(camera_id)
+    if segmenter is None:
+        segmenter = UnitSegmenter(camera_id)
+        _segmenters[camera_id] = segmenter
+    return segmenter
+
+
+def flush_segmenter(camera_id: str) -> Optional[Dict]:
+    """카메라의 진행 중인 제품 결과를 마감하고 상태 삭제"""
+    segmenter = _segmenters.pop(camera_id, None)
+    if segmenter is None:
+        return None
+    return segmenter.flush()
@@ -1,81 +1,103 @@
 """
 FastAPI 백엔드 서버
 YOLO + OCR 모델을 사용한 이미지 분석 API
+
+ML 라이브러리 (torch, ultralytics, transformers, cv2)는 이 모듈에서 import하지 않음
+모델은 서버 시작 후 백그라운드 작업에서 로드 (상태는 /api/model_status)
 """
 
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from typing import List, Optional
 import uvicorn
 from datetime import datetime
-import numpy as np
-from PIL import Image
-import io
-import csv
-from models.yolo_model import YOLOModel
-from models.cnn_model import CNNModel
+import json
 import os
+import sys
 import asyncio
 import base64
-from urllib.parse import quote
+import importlib
+import traceback
 import time
 
-import models.inference as inference_module
-from models.inference import analyze_image, analyze_frame, initialize_models, convert_numpy_types
+from models.render import RENDER_FULL, RENDER_NONE, validate_render_options
+from models.readiness import ModelNotReadyError, model_readiness
+from models.executor import inference_executor
+from models.scheduler import scheduler as inference_scheduler
+from models.result_cache import result_cache
+from models.backends import DEFAULT_BACKEND, DEFAULT_QUANTIZE, model_files
 
-from database.db import save_result, get_statistics, get_results
+from database.db import (
+    init_db, save_result, get_statistics, get_results, get_results_page, get_result_image_ref,
+    iter_results, SUMMARY_FIELDS, DETAIL_COLUMNS
+)
+from database.report import iter_csv, iter_file, write_xlsx
+from database.image_store import image_path
+from jobs.manager import job_manager, AnalysisJob, JOB_CANCELLED
+from live.session import live_sessions, FrameSkipped
+from live.units import get_segmenter, flush_segmenter
 
-yolo_model = None
-cnn_model = None
 app = FastAPI(title="Cannon Project API", version="1.0.0")
 
 # 모델 실행 확인
 @app.get("/api/model_status")
 async def get_model_status():
     """모델 로드 상태를 확인하는 임시 엔드포인트"""
-    global cnn_model, yolo_model
-    
+    # 모델 로드 전에는 inference 모듈 (ML 라이브러리)을 import하지 않음
+    inference_module = sys.modules.get("models.inference")
     status = {
-        "cnn_loaded": inference_module.cnn_model is not None,
-        "yolo_loaded": inference_module.yolo_model is not None
+        "cnn_loaded": inference_module is not None and inference_module.cnn_model is not None,
+        "yolo_loaded": inference_module is not None and inference_module.yolo_model is not None
     }
     
-    if status["cnn_loaded"]:
+    worker_load = None
+    if inference_executor.uses_processes:
+        # 프로세스 풀 (process / shm) 모드에서는 모델이 워커 프로세스에만 로드됨
+        # (워커는 모두 같은 모델 파일을 로드하므로 첫 워커의 결과)
+        running = inference_executor.get_info()["running"]
+        if running and inference_executor.worker_warmup:
+            worker_load = inference_executor.worker_warmup[0].get("load")
+        status["cnn_loaded"] = bool(worker_load and worker_load.get("cnn", {}).get("loaded"))
+        status["yolo_loaded"] = bool(worker_load and worker_load.get("yolo", {}).get("loaded"))
+    
+    if status["cnn_loaded"] and inference_module is not None and inference_module.cnn_model is not None:
         # 로드된 경우, 모델 타입도 확인
         status["cnn_type"] = type(inference_module.cnn_model).__name__
     
+    # 모델별 로드 단계 시간 / 실패 사유 (체크포인트 불일치면 누락/불필요한 키 포함)
+    if worker_load is not None:
+        status["load"] = worker_load
+    elif not inference_executor.uses_processes and inference_module is not None:
+        status["load"] = inference_module.model_load_info
+
+    # 백그라운드 로드 진행 상태 (pending / loading / ready / failed)
+    status["readiness"] = model_readiness.get_info()
+    status["backend"] = DEFAULT_BACKEND
+    status["quantize"] = DEFAULT_QUANTIZE
+    status["executor"] = inference_executor.get_info()
     return status
 
-analysis_progress = {
-    "total_count": 0,
-    "completed_count": 0,
-    "is_running": False,
-    "last_processed_info": { 
-        "filename": "N/A",
-        "elapsed_time_sec": 0.0,
-        "status": "Ready"
-    }
-}
-
 @app.get("/api/analysis-progress")
-async def get_analysis_progress():
-    """프론트엔드 Polling 요청에 현재 분석 진행 상황을 제공"""
-    global analysis_progress
+async def get_analysis_progress(job_id: Optional[str] = None):
+    """프론트엔드 Polling 요청에 분석 진행 상황을 제공 (job_id 생략 시 가장 최근 작업)"""
+    job = job_manager.get_job(job_id) if job_id else job_manager.latest_job()
+    if job is None:
+        if job_id:
+            raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+        return {"total_count": 0, "completed_count": 0, "is_running": False}
     
-    # 이 엔드포인트는 진행 상황 객체를 그대로 반환합니다.
+    progress = job.get_progress()
     return {
-        "total_count": analysis_progress["total_count"],
-        "completed_count": analysis_progress["completed_count"],
-        "is_running": analysis_progress["is_running"]
+        "job_id": job.id,
+        "total_count": progress["total_count"],
+        "completed_count": progress["completed_count"],
+        "is_running": progress["is_running"]
     }
 
 
-# 서버 시작 시 모델 초기화
-@app.on_event("startup")
-async def startup_event():
-    """서버 시작 시 모델 로드"""
-    print("모델 초기화 중...")
+def model_paths():
+    """(YOLO, CNN) 모델 경로 (server/models 기준, 없으면 현재 디렉터리 기준 상대 경로)"""
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     
     # 모델 경로 설정 
@@ -87,13 +109,190 @@ async def startup_event():
         yolo_path = "models/YOLO.pt"
     if not os.path.exists(cnn_path):
         cnn_path = "models/CNN_classifier.pt"
+    return yolo_path, cnn_path
 
-    
-    initialize_models(
-        yolo_path=yolo_path,
-        cnn_path=cnn_path
+
+def check_model_load(load_info: dict):
+    """모델별 로드 결과 (inference.model_load_info)에 실패가 있으면 사유를 모아 예외 발생"""
+    failed = [name for name, info in load_info.items() if not info.get("loaded")]
+    if failed:
+        raise RuntimeError("; ".join(f"{name}: {load_info[name].get('error')}" for name in failed))
+
+
+async def load_models(yolo_path: str, cnn_path: str):
+    """
+    백그라운드 모델 로드 (ML 라이브러리 import → 모델 로드 → 워커 풀 시작 → 워밍업)
+    진행 상태와 단계별 시간은 model_readiness에 기록
+    """
+    model_readiness.start()
+    print("모델 초기화 중...")
+    try:
+        # 스레드 풀 모드는 API 프로세스의 모델을 공유, 프로세스 풀 모드는 워커마다 모델을 로드
+        if not inference_executor.uses_processes:
+            stage_start = time.perf_counter()
+            inference_module = await asyncio.to_thread(importlib.import_module, "models.inference")
+            model_readiness.record("import_sec", time.perf_counter() - stage_start)
+
+            stage_start = time.perf_counter()
+            await asyncio.to_thread(
+                inference_module.initialize_models,
+                yolo_path=yolo_path,
+                cnn_path=cnn_path,
+                num_threads=inference_executor.torch_threads
+            )
+            model_readiness.record("models_sec", time.perf_counter() - stage_start)
+            check_model_load(inference_module.model_load_info)
+
+        stage_start = time.perf_counter()
+        await asyncio.to_thread(inference_executor.start, yolo_path, cnn_path)
+        model_readiness.record("workers_sec", time.perf_counter() - stage_start)
+
+        # 워밍업: 더미 추론으로 첫 요청의 초기화 비용을 미리 지불 (끝나야 ready)
+        if not inference_executor.uses_processes:
+            model_readiness.set_warming()
+            stage_start = time.perf_counter()
+            model_readiness.warmup = await inference_executor.run(inference_module.warmup_models)
+            model_readiness.record("warmup_sec", time.perf_counter() - stage_start)
+        else:
+            # process / shm 모드는 워커 초기화 (workers_sec)에서 워커마다 워밍업까지 수행
+            model_readiness.warmup = {"workers": inference_executor.worker_warmup}
+            for worker in inference_executor.worker_warmup:
+                check_model_load(worker.get("load") or {})
+            failed = [worker for worker in inference_executor.worker_warmup
+                      if (worker.get("warmup") or {}).get("error")]
+            if failed:
+                raise RuntimeError(f"워커 워밍업 실패: {failed[0]['warmup']['error']}")
+    except Exception as e:
+        traceback.print_exc()
+        model_readiness.set_failed(f"{type(e).__name__}: {e}")
+        print(f"🚨 모델 초기화 실패: {e}")
+        return
+
+    model_readiness.set_ready()
+    print(f"모델 초기화 완료 ({model_readiness.get_info()['elapsed_sec']:.2f}s)")
+
+
+# 서버 시작 시 DB 초기화 후 모델은 백그라운드에서 로드
+@app.on_event("startup")
+async def startup_event():
+    """서버 시작 시 DB 스키마 준비, 모델 로드는 백그라운드 작업으로 시작"""
+    await asyncio.to_thread(init_db)
+
+    yolo_path, cnn_path = model_paths()
+
+    # 결과 캐시는 모델 파일 또는 백엔드/양자화 설정이 바뀌면 무효화
+    await asyncio.to_thread(
+        result_cache.set_model_files,
+        model_files([yolo_path], DEFAULT_BACKEND) + model_files([cnn_path], DEFAULT_BACKEND, DEFAULT_QUANTIZE),
+        f"{DEFAULT_BACKEND}/{DEFAULT_QUANTIZE}"
     )
-    print("모델 초기화 완료")
+
+    # 요청 간 마이크로 배치 스케줄러 시작
+    await inference_scheduler.start()
+
+    app.state.model_loader = asyncio.create_task(load_models(yolo_path, cnn_path))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 모델 로드 작업, 실시간 세션, 스케줄러 및 워커 풀 정리"""
+    loader = getattr(app.state, "model_loader", None)
+    if loader is not None and not loader.done():
+        loader.cancel()
+    await live_sessions.close_all()
+    await inference_scheduler.stop()
+    await asyncio.to_thread(inference_executor.shutdown)
+
+
+@app.get("/api/inference-metrics")
+async def get_inference_metrics():
+    """추론 스케줄러 큐 길이 및 배치 크기 메트릭"""
+    return inference_scheduler.get_metrics()
+
+
+@app.get("/api/result-cache")
+async def get_result_cache_metrics():
+    """결과 캐시 적중/미스 및 사용량"""
+    return result_cache.get_metrics()
+
+
+@app.delete("/api/result-cache")
+async def clear_result_cache():
+    """결과 캐시 전체 삭제"""
+    await asyncio.to_thread(result_cache.clear)
+    return result_cache.get_metrics()
+
+
+class ImageDecodeError(ValueError):
+    """업로드된 파일/프레임을 이미지로 디코딩하지 못함"""
+
+
+def decode_image(contents: bytes):
+    """
+    업로드된 이미지 바이트를 BGR numpy 배열로 디코딩 (워커 스레드에서 호출)
+
+    추론 파이프라인이 BGR 기준이므로 cv2로 한 번만 디코딩 (RGBA/흑백도 3채널 BGR로 변환됨)
+    cv2/numpy는 첫 디코딩 때 import (모델 로드와 함께 이미 import되어 있음)
+    """
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다.")
+    return image
+
+
+def render_options(render: str = RENDER_FULL, jpeg_quality: Optional[int] = None,
+                   max_dim: Optional[int] = None) -> dict:
+    """
+    결과 이미지 렌더링 옵션 (none / thumbnail / full, JPEG 품질, 최대 크기) 검사 후 dict로 반환
+    PASS/FAIL만 필요한 경우 render=none으로 그리기/인코딩 비용을 생략할 수 있음
+    """
+    try:
+        validate_render_options(render, jpeg_quality, max_dim)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"render": render, "jpeg_quality": jpeg_quality, "max_dim": max_dim}
+
+
+async def analyze_contents(contents: bytes, options: Optional[dict] = None, timings: Optional[dict] = None) -> dict:
+    """
+    업로드 이미지 바이트 분석: 결과 캐시를 먼저 확인하고 없으면 디코딩 → 추론 후 캐시에 저장
+    (같은 이미지 + 같은 옵션 + 같은 모델 파일이면 이전 판정을 바로 반환)
+
+    timings를 주면 단계별 소요 시간(초)과 캐시 적중 여부를 기록
+    """
+    options = options or {}
+    timings = timings if timings is not None else {}
+    model_readiness.require_ready()
+
+    stage_start = time.perf_counter()
+    cache_key, cached = await asyncio.to_thread(result_cache.lookup, contents, options)
+    timings["cache_sec"] = round(time.perf_counter() - stage_start, 4)
+    timings["cache_hit"] = cached is not None
+    if cached is not None:
+        return cached
+
+    try:
+        stage_start = time.perf_counter()
+        image_array = await asyncio.to_thread(decode_image, contents)
+        timings["decode_sec"] = round(time.perf_counter() - stage_start, 4)
+    except Exception as e:
+        raise ImageDecodeError(str(e))
+
+    # 스케줄러가 다른 파일/요청과 묶어서 배치 추론
+    stage_start = time.perf_counter()
+    result = await inference_scheduler.submit(image_array, **options)
+    del image_array
+    timings["inference_sec"] = round(time.perf_counter() - stage_start, 4)
+    timings.update(result.get("timings", {}))
+
+    # 분석 오류 결과 (details 없음)는 캐시하지 않음
+    if result.get("details"):
+        await asyncio.to_thread(result_cache.put, cache_key, result)
+    return result
+
 
 # CORS 설정 (Next.js 프론트엔드와 통신)
 app.add_middleware(
@@ -106,31 +305,30 @@ app.add_middleware(
 
 
 @app.post("/api/analyze-image")
-async def analyze_image_endpoint(file: UploadFile = File(...)):
+async def analyze_image_endpoint(file: UploadFile = File(...), render: str = RENDER_FULL,
+                                 jpeg_quality: Optional[int] = None, max_dim: Optional[int] = None):
     """
     이미지 파일을 분석하여 Pass/Fail 결과 반환
+    (render/jpeg_quality/max_dim 쿼리로 결과 이미지 렌더링 방식 지정)
     """
+    options = render_options(render, jpeg_quality, max_dim)
     try:
         # 이미지 파일 읽기
         contents = await file.read()
         if not contents:
             raise HTTPException(status_code=400, detail="빈 파일입니다.")
         
+        # 모델 추론 실행 (결과 캐시 확인 후, 스케줄러가 다른 요청과 묶어서 배치 처리)
         try:
-            image = Image.open(io.BytesIO(contents))
-            # 이미지를 RGB로 변환 (RGBA나 다른 형식 대응)
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-        except Exception as e:
+            result = await analyze_contents(contents, options)
+        except ImageDecodeError as e:
             raise HTTPException(status_code=400, detail=f"이미지 파일 형식 오류: {str(e)}")
-        
-        image_array = np.array(image)
-        
-        # 모델 추론 실행
-        result = analyze_image(image_array)
+        except ModelNotReadyError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
         
         # 결과 저장
-        saved_result = save_result(
+        saved_result = await asyncio.to_thread(
+            save_result,
             filename=file.filename,
             status=result["status"],
             reason=result.get("reason"),
@@ -145,7 +343,8 @@ async def analyze_image_endpoint(file: UploadFile = File(...)):
             "reason": result.get("reason"),
             "confidence": result.get("confidence", 0),
             "details": result.get("details", {}),
-            "timestamp": saved_result["timestamp"]
+            "timestamp": saved_result["timestamp"],
+            "image_url": saved_result["image_url"]
         })
     
     except HTTPException:
@@ -157,112 +356,293 @@ async def analyze_image_endpoint(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
 
 
-@app.post("/api/analyze-batch")
-async def analyze_batch_endpoint(files: List[UploadFile] = File(...)):
-    global analysis_progress
-    
-    analysis_progress["total_count"] = len(files)
-    analysis_progress["completed_count"] = 0
-    analysis_progress["is_running"] = True
-    analysis_progress["last_processed_info"] = {
-        "filename": "N/A", 
-        "elapsed_time_sec": 0.0, 
-        "status": "Running"
-    } 
-    
-    await asyncio.sleep(0.01)
-    results = []
-    
-    for file in files:
-        file_result = None
-        elapsed_time = 0.0
-        start_time = time.time()
-        await asyncio.sleep(0.2)
+# 배치 분석 시 동시에 처리하는 최대 파일 수 (디코딩된 이미지의 메모리 사용량 제한)
+BATCH_CONCURRENCY = int(os.getenv("ANALYZE_BATCH_CONCURRENCY", "16"))
+
+
+def batch_error_result(filename: str, reason: str, elapsed_time: float = 0.0, timings: Optional[dict] = None) -> dict:
+    return {
+        "filename": filename,
+        "status": "ERROR",
+        "reason": reason,
+        "confidence": 0,
+        "elapsed_time": round(elapsed_time, 4),
+        "timings": timings or {}
+    }
+
+
+async def analyze_upload(filename: str, contents: bytes, semaphore: asyncio.Semaphore,
+                         options: Optional[dict] = None) -> dict:
+    """
+    배치 파일 하나를 (캐시 확인) 디코딩 → 추론 → 저장하고 단계별 소요 시간(초)을 기록
+    """
+    async with semaphore:
+        start_time = time.perf_counter()
+        timings = {}
+
+        if not contents:
+            return batch_error_result(filename, "빈 파일입니다.")
+
         try:
-            contents = await file.read()
-            if not contents:
-                results.append({
-                    "filename": file.filename,
-                    "status": "ERROR",
-                    "reason": "빈 파일입니다.",
-                    "confidence": 0,
-                    "elapsed_time": 0.0
-                })
-                continue
+            # 결과 캐시 확인 → 디코딩 → 추론
+            result = await analyze_contents(contents, options, timings)
+        except ImageDecodeError as e:
+            return batch_error_result(filename, f"이미지 파일 형식 오류: {str(e)}",
+                                      time.perf_counter() - start_time, timings)
+        except Exception as e:
+            return batch_error_result(filename, f"처리 실패: {str(e)}",
+                                      time.perf_counter() - start_time, timings)
 
-            try:
-                image = Image.open(io.BytesIO(contents))
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                    
-            except Exception as e:
-                results.append({
-                    "filename": file.filename,
-                    "status": "ERROR",
-                    "reason": f"이미지 파일 형식 오류: {str(e)}",
-                    "confidence": 0,
-                    "elapsed_time": round(elapsed_time, 4)
-                })
-                continue
-            start_time = time.time()
-            
-            image_array = np.array(image)
-            result_raw = analyze_image(image_array)
-            
-            result = convert_numpy_types(result_raw)
-            
-            lapsed_time = time.time() - start_time
-            
-            saved_result = save_result(
-                filename=file.filename,
+        try:
+            stage_start = time.perf_counter()
+            saved_result = await asyncio.to_thread(
+                save_result,
+                filename=filename,
                 status=result["status"],
                 reason=result.get("reason"),
                 confidence=result.get("confidence", 0),
                 details=result.get("details", {})
             )
-            results.append({
-                "id": saved_result["id"],
-                "filename": file.filename,
-                "status": result["status"],
-                "reason": result.get("reason"),
-                "confidence": result.get("confidence", 0),
-                "details": result.get("details", {}),
-                "timestamp": saved_result["timestamp"],
-                "elapsed_time": round(elapsed_time, 4)
-            })
-        
+            timings["db_sec"] = round(time.perf_counter() - stage_start, 4)
         except Exception as e:
-            results.append({
-                "filename": file.filename,
-                "status": "ERROR",
-                "reason": f"처리 실패: {str(e)}",
-                "confidence": 0,
-                "elapsed_time": round(elapsed_time, 4)
-            })
-            
+            return batch_error_result(filename, f"처리 실패: {str(e)}",
+                                      time.perf_counter() - start_time, timings)
+
+        return {
+            "id": saved_result["id"],
+            "filename": filename,
+            "status": result["status"],
+            "reason": result.get("reason"),
+            "confidence": result.get("confidence", 0),
+            "details": result.get("details", {}),
+            "timestamp": saved_result["timestamp"],
+            "image_url": saved_result["image_url"],
+            "elapsed_time": round(time.perf_counter() - start_time, 4),
+            "timings": timings
+        }
+
+
+async def run_job_file(job: AnalysisJob, index: int, filename: str, contents: bytes,
+                       semaphore: asyncio.Semaphore, options: Optional[dict] = None,
+                       collected: Optional[List] = None) -> dict:
+    file_result = await analyze_upload(filename, contents, semaphore, options)
+    # 작업에는 annotated_image를 뺀 결과만 보관되므로 바로 응답할 전체 결과는 collected에 모음
+    if job.add_result(index, file_result) and collected is not None:
+        collected.append(file_result)
+    return file_result
+
+
+async def run_job(job: AnalysisJob, uploads: List, options: Optional[dict] = None,
+                  collected: Optional[List] = None):
+    """작업의 모든 파일을 동시에 처리 (백그라운드 태스크로 실행)"""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    job.start()
+    try:
+        await asyncio.gather(*[
+            run_job_file(job, index, filename, contents, semaphore, options, collected)
+            for index, (filename, contents) in enumerate(uploads)
+        ])
+    finally:
+        if job.is_running:
+            job.finish()
+
+
+async def read_uploads(files: List[UploadFile]) -> List:
+    # 업로드 파일은 응답 이후 닫힐 수 있으므로 내용을 먼저 읽어둠 (디코딩은 동시 처리 단계에서)
+    return [(file.filename, await file.read()) for file in files]
+
+
+@app.post("/api/analyze-batch")
+async def analyze_batch_endpoint(files: List[UploadFile] = File(...), stream: bool = False,
+                                 render: str = RENDER_FULL, jpeg_quality: Optional[int] = None,
+                                 max_dim: Optional[int] = None):
+    """
+    여러 이미지 파일을 동시에 분석
+
+    stream=true이면 완료되는 순서대로 결과를 NDJSON (한 줄에 결과 하나)으로 스트리밍,
+    아니면 모든 파일이 끝난 뒤 업로드 순서대로 {"results": [...]} 반환
+    진행 상황은 응답 헤더 X-Job-Id의 작업으로 조회 가능
+    render=none이면 결과 이미지를 만들지 않음 (PASS/FAIL만 필요한 경우)
+    """
+    options = render_options(render, jpeg_quality, max_dim)
+    uploads = await read_uploads(files)
+    job = job_manager.create_job(len(uploads))
+    headers = {"X-Job-Id": job.id, "Access-Control-Expose-Headers": "X-Job-Id"}
+
+    if not stream:
+        # DELETE /api/jobs/{id}로 취소할 수 있도록 태스크로 실행 (취소되면 완료된 결과까지만 반환)
+        collected = []
+        job.task = asyncio.create_task(run_job(job, uploads, options, collected))
+        try:
+            await asyncio.wait({job.task})
+        except asyncio.CancelledError:
+            job.task.cancel()
+            raise
+        if not job.task.cancelled():
+            job.task.result()
+        results = sorted(collected, key=lambda r: r["index"])
+        return JSONResponse(content={"results": results, "status": job.status}, headers=headers)
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    job.start()
+    tasks = [
+        asyncio.create_task(run_job_file(job, index, filename, contents, semaphore, options))
+        for index, (filename, contents) in enumerate(uploads)
+    ]
+    job.task = asyncio.gather(*tasks)
+
+    async def stream_results():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    file_result = await next_done
+                except asyncio.CancelledError:
+                    # 작업이 취소되면 남은 파일 없이 스트림 종료
+                    if job.status != JOB_CANCELLED:
+                        raise
+                    break
+                yield json.dumps(file_result, ensure_ascii=False) + "\n"
         finally:
-            analysis_progress["completed_count"] += 1
-            if file_result:
-                analysis_progress["last_processed_info"] = {
-                 "filename": file.filename,
-                 "elapsed_time_sec": file_result.get("elapsed_time", 0.0),
-                 "status": file_result.get("status", "ERROR")
-                }
-                results.append(file_result)
-                
-            analysis_progress["is_running"] = False
-    
-    return JSONResponse(content={"results": results})
+            # 클라이언트 연결이 끊긴 경우 남은 작업 취소
+            for task in tasks:
+                task.cancel()
+            if job.is_running:
+                job.finish()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson", headers=headers)
+
+
+@app.post("/api/jobs")
+async def create_job_endpoint(files: List[UploadFile] = File(...), render: str = RENDER_FULL,
+                              jpeg_quality: Optional[int] = None, max_dim: Optional[int] = None):
+    """
+    배치 분석 작업 생성: 작업 ID를 즉시 반환하고 분석은 백그라운드에서 진행
+    작업 결과에는 annotated_image가 없으므로 주석 이미지는 각 결과의 image_url로 조회
+    """
+    options = render_options(render, jpeg_quality, max_dim)
+    uploads = await read_uploads(files)
+    job = job_manager.create_job(len(uploads))
+    job.task = asyncio.create_task(run_job(job, uploads, options))
+    return JSONResponse(status_code=202, content=job.get_progress())
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_endpoint(job_id: str):
+    """작업 진행률 / ETA / 처리량 조회"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job.get_progress()
+
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_job_results_endpoint(job_id: str, since: int = 0, limit: Optional[int] = None):
+    """
+    작업 결과 증분 조회: 완료 순서 기준 since 번째 이후 결과와 다음 조회용 next_since 반환
+    """
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return JSONResponse(content=job.get_results(since=since, limit=limit))
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job_endpoint(job_id: str):
+    """진행 중인 작업 취소"""
+    job = job_manager.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job.get_progress()
+
+
+# 실시간 프레임 추론 옵션 (세션 옵션 중 analyze_images에 전달하는 값)
+LIVE_INFERENCE_OPTIONS = ("brightness", "exposure_gain", "render", "jpeg_quality", "max_dim", "track_key")
+
+# 실시간 결과 저장 방식 (frame: 프레임마다 저장, unit: 제품 단위로 통합하여 저장)
+SAVE_MODE_FRAME = "frame"
+SAVE_MODE_UNIT = "unit"
+SAVE_MODES = (SAVE_MODE_FRAME, SAVE_MODE_UNIT)
+
+
+async def process_live_frame(contents: bytes, options: dict) -> dict:
+    """
+    실시간 세션의 프레임 하나를 디코딩 → 추론 → (save 옵션이면) 저장
+    세션이 최신 프레임만 넘기므로 건너뛴 프레임은 디코딩 비용도 들지 않음
+    """
+    model_readiness.require_ready()
+    try:
+        image_array = await asyncio.to_thread(decode_image, contents)
+    except Exception as e:
+        raise ImageDecodeError(str(e))
+
+    result = await inference_scheduler.submit(
+        image_array, **{key: options[key] for key in LIVE_INFERENCE_OPTIONS if key in options}
+    )
+    del image_array
+
+    if not options.get("save"):
+        return result
+
+    if options.get("save_mode", SAVE_MODE_FRAME) == SAVE_MODE_UNIT:
+        # 제품 단위 저장: 제품이 바뀌거나 빠질 때 통합 결과 1건만 저장
+        segmenter = get_segmenter(options["camera_id"])
+        for unit in segmenter.add(result, options.get("frame")):
+            await asyncio.to_thread(save_result, **unit)
+        result["unit"] = segmenter.current_unit()
+    else:
+        result["saved"] = await asyncio.to_thread(
+            save_result,
+            filename=f"CAMERA_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{options.get('filename', 'frame.jpg')}",
+            status=result["status"],
+            reason=result.get("reason"),
+            confidence=result.get("confidence", 0),
+            details=result.get("details", {})
+        )
+    return result
+
+
+async def flush_live_units(camera_id: str):
+    """카메라 스트림 종료 시 진행 중인 제품 결과 저장"""
+    unit = flush_segmenter(camera_id)
+    if unit is not None:
+        await asyncio.to_thread(save_result, **unit)
+
+
+async def release_live_tracking(track_key: str):
+    """끝난 스트림의 프레임 간 추적 / 다수결 상태 해제"""
+    try:
+        await inference_executor.release_tracking(track_key)
+    except Exception as e:
+        print(f"[WARN] 추적 상태 해제 실패 ({track_key}): {e}")
+
+
+async def close_live_session(session):
+    """실시간 세션 종료 시 진행 중인 제품 결과 저장 및 추적 상태 해제"""
+    await release_live_tracking(session.track_key)
+    await flush_live_units(session.camera_id)
 
 
 @app.post("/api/analyze-frame")
 async def analyze_frame_endpoint(file: UploadFile = File(...),
     brightness: str = Form("0.0"), 
-    exposure_gain: str = Form("1.0")
+    exposure_gain: str = Form("1.0"),
+    camera_id: str = Form("default"),
+    save_mode: str = Form(SAVE_MODE_FRAME),
+    render: str = RENDER_FULL,
+    jpeg_quality: Optional[int] = None,
+    max_dim: Optional[int] = None
 ):
     """
     실시간 카메라 프레임 분석
+    (render/jpeg_quality/max_dim 쿼리로 processed_image_b64 렌더링 방식 지정)
+
+    같은 camera_id의 프레임은 최신 한 장만 대기하므로, 분석 대기 중에 더 새 프레임이
+    들어오면 이전 요청은 409로 건너뜀
+    save_mode=unit이면 프레임마다 저장하지 않고 제품 단위 통합 결과만 저장 (id는 null)
     """
+    options = render_options(render, jpeg_quality, max_dim)
+    if save_mode not in SAVE_MODES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 save_mode입니다: {save_mode}")
     try:
         contents = await file.read()
         if not contents:
@@ -275,43 +655,45 @@ async def analyze_frame_endpoint(file: UploadFile = File(...),
             print(f"[ERROR] 잘못된 명도/조도 값이 수신되었습니다. Brightness: {brightness}, Exposure: {exposure_gain}")
             brightness_val = 0.0
             exposure_val = 1.0
-            
+        
+        session = await live_sessions.get_session(camera_id, process_live_frame, close_live_session)
         try:
-            image = Image.open(io.BytesIO(contents))
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-        except Exception as e:
+            result = await session.push(contents, {
+                "brightness": brightness_val,
+                "exposure_gain": exposure_val,
+                "save": True,
+                "save_mode": save_mode,
+                "filename": file.filename,
+                "track_key": session.track_key,
+                **options
+            })
+        except FrameSkipped as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ImageDecodeError as e:
             raise HTTPException(status_code=400, detail=f"이미지 파일 형식 오류: {str(e)}")
-        
-        image_array = np.array(image)
-        print(f"[DEBUG - FastAPI] Final Brightness Value: {brightness_val}, Exposure Value: {exposure_val}")
-        
-        result: dict
-        processed_image: Image.Image
-        result = analyze_frame(
-            image_array, 
-            brightness=brightness_val, 
-            exposure_gain=exposure_val
-        )
-        encoded_image = result.get("details", {}).get("annotated_image")
-        
-        saved_result = save_result(
-            filename=f"CAMERA_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}",
-            status=result["status"],
-            reason=result.get("reason"),
-            confidence=result.get("confidence", 0),
-            details=result.get("details", {})
-        )
+        except ModelNotReadyError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+        # 제품 단위 저장 모드에서는 프레임별 저장 결과가 없음
+        saved_result = result.get("saved") or {}
+        metrics = session.get_metrics()
 
         return JSONResponse(content={
-            "id": saved_result["id"], 
-            "filename": saved_result["filename"], 
-            "timestamp": saved_result["timestamp"],
+            "id": saved_result.get("id"), 
+            "filename": saved_result.get("filename", file.filename), 
+            "timestamp": saved_result.get("timestamp", datetime.now().isoformat()),
             "status": result["status"],
             "reason": result.get("reason"),
             "confidence": result.get("confidence", 0),
             "details": result.get("details", {}),
-            "processed_image_b64": encoded_image
+            "image_url": saved_result.get("image_url"),
+            "processed_image_b64": result.get("details", {}).get("annotated_image"),
+            "stable": result.get("stable"),
+            "unit": result.get("unit"),
+            "frame": result["frame"],
+            "latency_ms": result["latency_ms"],
+            "effective_fps": metrics["effective_fps"],
+            "dropped_frames": metrics["dropped_frames"]
         })
     
     except HTTPException:
@@ -323,67 +705,175 @@ async def analyze_frame_endpoint(file: UploadFile = File(...),
         raise HTTPException(status_code=500, detail=f"프레임 분석 중 오류 발생: {str(e)}")
 
 
+# 실시간 스트림 기본 설정 (텍스트 메시지 {"type": "config", ...}로 변경 가능)
+LIVE_DEFAULT_CONFIG = {
+    "brightness": 0.0,
+    "exposure_gain": 1.0,
+    "render": RENDER_NONE,   # 기본은 이미지 없이 판정 결과 + overlay 좌표만 전송
+    "jpeg_quality": None,
+    "max_dim": None,
+    "overlay": True,
+    "save": False,           # True이면 save_mode에 따라 DB에 결과 저장
+    "save_mode": SAVE_MODE_UNIT,
+    "tracking": True,        # 프레임 간 추적으로 YOLO/CNN 결과 재사용 + 다수결 안정화 판정
+}
+
+
+def live_config_update(config: dict, message: dict) -> dict:
+    """실시간 스트림 설정 메시지 검사 후 새 설정 반환 (잘못된 값이면 ValueError)"""
+    if not isinstance(message, dict):
+        raise ValueError("설정 메시지는 JSON 객체여야 합니다.")
+    updated = dict(config)
+    for key in LIVE_DEFAULT_CONFIG:
+        if key in message:
+            updated[key] = message[key]
+    updated["brightness"] = float(updated["brightness"])
+    updated["exposure_gain"] = float(updated["exposure_gain"])
+    for key in ("jpeg_quality", "max_dim"):
+        if updated[key] is not None:
+            updated[key] = int(updated[key])
+    validate_render_options(updated["render"], updated["jpeg_quality"], updated["max_dim"])
+    updated["overlay"] = bool(updated["overlay"])
+    updated["save"] = bool(updated["save"])
+    if updated["save_mode"] not in SAVE_MODES:
+        raise ValueError(f"지원하지 않는 save_mode입니다: {updated['save_mode']}")
+    updated["tracking"] = bool(updated["tracking"])
+    return updated
+
+
+def live_result_message(result: dict, config: dict, metrics: dict) -> dict:
+    """실시간 결과 메시지 (판정 요약 + 선택적 overlay, 결과 이미지는 별도 바이너리 메시지)"""
+    details = result.get("details", {})
+    message = {
+        "type": "result",
+        "frame": result["frame"],
+        "status": result["status"],
+        "reason": result.get("reason"),
+        "confidence": result.get("confidence", 0),
+        "details": {column: details.get(column) for column in DETAIL_COLUMNS},
+        "latency_ms": result["latency_ms"],
+        "effective_fps": metrics["effective_fps"],
+        "input_fps": metrics["input_fps"],
+        "dropped_frames": metrics["dropped_frames"],
+        "image": bool(details.get("annotated_image")),
+    }
+    if result.get("unit") is not None:
+        message["unit"] = result["unit"]
+    if "stable" in result:
+        message["stable"] = result["stable"]
+        message["tracking"] = details.get("tracking")
+    if config["overlay"]:
+        message["overlay"] = details.get("overlay", [])
+    return message
+
+
+@app.websocket("/ws/live")
+async def live_websocket(websocket: WebSocket, camera_id: str = "default"):
+    """
+    실시간 카메라 스트림 분석 (WebSocket)
+
+    - 클라이언트 → 서버: 바이너리 메시지 = JPEG 프레임 한 장, 텍스트 메시지 = 설정 JSON
+    - 서버 → 클라이언트: 분석한 프레임마다 결과 JSON (frame은 카메라 세션의 수신 순번),
+      image가 true이면 바로 뒤에 결과 JPEG 바이너리 메시지가 이어짐
+    - 카메라(camera_id) 세션이 최신 프레임 한 장만 대기시키고 밀린 프레임은 버림
+    """
+    await websocket.accept()
+    session = await live_sessions.get_session(camera_id, process_live_frame, close_live_session)
+    config = dict(LIVE_DEFAULT_CONFIG)
+    send_lock = asyncio.Lock()
+    deliveries = set()
+
+    async def send_json(message: dict):
+        async with send_lock:
+            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+
+    async def deliver(future: asyncio.Future, frame_config: dict):
+        try:
+            result = await future
+        except FrameSkipped:
+            return
+        except Exception as e:
+            await send_json({"type": "error", "detail": f"프레임 분석 중 오류 발생: {str(e)}"})
+            return
+
+        message = live_result_message(result, frame_config, session.get_metrics())
+        encoded_image = result.get("details", {}).get("annotated_image")
+        async with send_lock:
+            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+            if encoded_image:
+                await websocket.send_bytes(base64.b64decode(encoded_image))
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                frame_options = {**config, "filename": f"{camera_id}.jpg"}
+                if config["tracking"]:
+                    frame_options["track_key"] = session.track_key
+                future = session.push(message["bytes"], frame_options)
+                task = asyncio.create_task(deliver(future, config))
+                deliveries.add(task)
+                task.add_done_callback(deliveries.discard)
+            elif message.get("text"):
+                try:
+                    config = live_config_update(config, json.loads(message["text"]))
+                except (ValueError, TypeError) as e:
+                    await send_json({"type": "error", "detail": f"잘못된 설정입니다: {str(e)}"})
+                    continue
+                await send_json({"type": "config", **config})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # 아직 분석하지 않은 이 연결의 프레임은 세션에서 건너뜀
+        for task in list(deliveries):
+            task.cancel()
+        # 스트림이 끝났으므로 진행 중인 제품 결과 저장
+        if config["save"] and config["save_mode"] == SAVE_MODE_UNIT:
+            try:
+                await flush_live_units(camera_id)
+            except Exception as e:
+                print(f"[WARN] 제품 단위 결과 저장 실패 ({camera_id}): {e}")
+        # 다시 연결한 카메라가 이전 추적 / 다수결 상태로 시작하지 않도록 키를 새로 발급하고 해제
+        await release_live_tracking(session.rotate_track_key())
+
+
+@app.get("/api/live/sessions")
+async def get_live_sessions():
+    """카메라 세션별 입력/처리 FPS, 버린 프레임 수, 지연 시간"""
+    return live_sessions.get_metrics()
+
+
 @app.get("/api/report")
 async def get_report_endpoint(
     status: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    format: str = "csv"
 ):
     """
-    분석 결과를 CSV 리포트로 다운로드
+    분석 결과를 CSV (기본) 또는 Excel(format=xlsx) 리포트로 다운로드
+
+    DB 커서에서 읽는 즉시 행을 내보내므로 행 수 제한이 없고 메모리 사용량이 일정함
     """
-    results = get_results(
-        status=status, 
-        start_date=start_date, 
-        end_date=end_date,
-        limit=10000 
-    )
+    rows = iter_results(status=status, start_date=start_date, end_date=end_date)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if format == "csv":
+        report_filename = f"analysis_report_{timestamp}.csv"
+        media_type = "text/csv"
+        content = iter_csv(rows)
+    elif format == "xlsx":
+        report_filename = f"analysis_report_{timestamp}.xlsx"
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        try:
+            content = iter_file(await asyncio.to_thread(write_xlsx, rows))
+        except RuntimeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 리포트 형식입니다: {format} (csv/xlsx)")
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # CSV 헤더 작성
-    header = [
-        "ID", 
-        "Filename", 
-        "Timestamp", 
-        "Final Status", 
-        "Home Button",
-        "Status Button", 
-        "Screen", 
-        "ID/Back Button", 
-        "Text Language",
-        "Fail Reason", 
-        "Confidence", 
-        "Product Model",
-    ]
-    writer.writerow(header)
-
-    # CSV 데이터 행 작성
-    for result in results:
-        details = result.get("details", {})
-        text_language = details.get("language", "N/A") 
-        product_model = details.get("product_model", "N/A")
-
-        row = [
-            result.get("id"),
-            result.get("filename"),
-            result.get("timestamp"),
-            result.get("status"),                                 
-            details.get("home_status", "N/A"),
-            details.get("status_status", "N/A"),
-            details.get("screen_status", "N/A"),
-            details.get("id_back_status", "N/A"),
-            text_language,                                         
-            result.get("reason"),  
-            result.get("confidence"),                              
-            product_model                                        
-        ]
-        writer.writerow(row)
-
-    output.seek(0)
-    
-    report_filename = f"analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     content_disposition = f"attachment; filename=\"{report_filename}\""
 
     headers = {
@@ -392,8 +882,8 @@ async def get_report_endpoint(
     }
 
     return StreamingResponse(
-        output,
-        media_type="text/csv",
+        content,
+        media_type=media_type,
         headers=headers
 )
 
@@ -404,6 +894,10 @@ async def get_statistics_endpoint(
 ):
     """
     분석 결과 통계 조회
+
+    start_date / end_date: 날짜 (YYYY-MM-DD) 또는 시각 (YYYY-MM-DDTHH:MM:SS), 경계 포함
+    - 시각으로 지정하면 초 단위까지 정확히 반영
+    - end_date를 날짜만 지정하면 그 날짜 전체 (/api/results와 같음)
     """
     try:
         stats = await asyncio.to_thread(get_statistics, start_date, end_date) 
@@ -415,21 +909,83 @@ async def get_statistics_endpoint(
 async def get_results_endpoint(
     status: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    product_model: Optional[str] = None,
+    language: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    fields: Optional[str] = None
 ):
     """
     분석 결과 목록 조회
+
+    - cursor: 이전 응답의 next_cursor로 다음 페이지 조회 (키셋 페이지네이션)
+    - summary=true: 목록 화면에 필요한 필드만 반환 (details 전체/검출 결과 제외)
+    - fields: 반환할 필드를 쉼표로 지정 (예: id,status,timestamp,product_model)
+    - offset: 기존 OFFSET 방식 (하위 호환용, cursor 사용 권장)
     """
     try:
-        results = await asyncio.to_thread(get_results, status=status, limit=limit, offset=offset)
-        return JSONResponse(content={"results": results})
+        if offset and not cursor:
+            results = await asyncio.to_thread(
+                get_results, status=status, start_date=start_date, end_date=end_date,
+                limit=limit, offset=offset, product_model=product_model, language=language
+            )
+            return JSONResponse(content={"results": results})
+
+        if fields:
+            selected = [f.strip() for f in fields.split(",") if f.strip()]
+        elif summary:
+            selected = list(SUMMARY_FIELDS)
+        else:
+            selected = None
+
+        page = await asyncio.to_thread(
+            get_results_page, status=status, start_date=start_date, end_date=end_date,
+            limit=limit, cursor=cursor, product_model=product_model, language=language,
+            fields=selected
+        )
+        return JSONResponse(content=page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"결과 조회 중 오류 발생: {str(e)}")
 
 
+@app.get("/api/results/{result_id}/image")
+async def get_result_image_endpoint(result_id: int):
+    """
+    분석 결과의 주석(annotated) 이미지 조회
+    """
+    image_ref = await asyncio.to_thread(get_result_image_ref, result_id)
+    if not image_ref:
+        raise HTTPException(status_code=404, detail="결과 이미지가 없습니다.")
+
+    path = image_path(image_ref)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="결과 이미지 파일을 찾을 수 없습니다.")
+
+    # 내용 해시 기반 파일이므로 같은 참조의 내용은 바뀌지 않음
+    return FileResponse(path, media_type="image/jpeg", headers={
+        "Cache-Control": "public, max-age=31536000, immutable"
+    })
+
+
 @app.get("/health")
 async def health_check():
-    """서버 상태 확인"""
+    """
+    서버 상태 확인
+    모델 로드와 워밍업이 끝나기 전 (또는 실패 시)에는 503을 반환하여 로드밸런서가 트래픽을 보내지 않도록 함
+    """
+    readiness = model_readiness.get_info()
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content={
+            "status": "unhealthy" if readiness["state"] == "failed" else "starting",
+            "state": readiness["state"],
+            "error": readiness["error"],
+            "timestamp": datetime.now().isoformat()
+        })
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 
@@ -0,0 +1,104 @@
+"""
+모델 추론 백엔드 설정
+- torch: 학습한 .pt 파일을 PyTorch eager 모드로 실행 (기본)
+- onnx: export_models.py로 변환한 .onnx 파일을 ONNX Runtime으로 실행
+- torchscript: export_models.py로 변환한 .torchscript 파일 (freeze 적용)을 실행
+
+CNN(ViT) 양자화 모드 (GPU가 없는 검사 PC용 int8 추론)
+- none: fp32 (기본)
+- dynamic: Linear 층 가중치를 int8로 저장하고 활성값은 실행 중에 양자화
+  (torch: 로드 시 변환, onnx: quantize_models.py로 만든 .int8-dynamic.onnx)
+- static: 저장된 ROI로 보정(calibration)한 int8 모델 (onnx 백엔드 전용, .int8-static.onnx)
+"""
+
+import os
+from typing import List, Optional
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKEND_TORCHSCRIPT = "torchscript"
+BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_TORCHSCRIPT)
+
+# 서버 기본 백엔드 (환경변수로 설정)
+DEFAULT_BACKEND = os.getenv("INFERENCE_BACKEND", BACKEND_TORCH)
+
+QUANTIZE_NONE = "none"
+QUANTIZE_DYNAMIC = "dynamic"
+QUANTIZE_STATIC = "static"
+QUANTIZE_MODES = (QUANTIZE_NONE, QUANTIZE_DYNAMIC, QUANTIZE_STATIC)
+
+DEFAULT_QUANTIZE = os.getenv("INFERENCE_QUANTIZE", QUANTIZE_NONE)
+
+_EXTENSIONS = {
+    BACKEND_ONNX: ".onnx",
+    BACKEND_TORCHSCRIPT: ".torchscript",
+}
+
+
+def check_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 INFERENCE_BACKEND입니다: {backend} ({'/'.join(BACKENDS)})")
+    return backend
+
+
+def check_quantize(backend: str, quantize: str) -> str:
+    """백엔드에서 지원하는 양자화 모드인지 검사"""
+    if quantize not in QUANTIZE_MODES:
+        raise ValueError(f"지원하지 않는 INFERENCE_QUANTIZE입니다: {quantize} ({'/'.join(QUANTIZE_MODES)})")
+    if quantize == QUANTIZE_STATIC and backend != BACKEND_ONNX:
+        raise ValueError("static 양자화는 onnx 백엔드에서만 사용할 수 있습니다.")
+    if quantize == QUANTIZE_DYNAMIC and backend == BACKEND_TORCHSCRIPT:
+        raise ValueError("torchscript 백엔드는 양자화를 지원하지 않습니다. (torch 또는 onnx 사용)")
+    return quantize
+
+
+def quantized_model_path(model_path: str, quantize: str) -> str:
+    """양자화된 ONNX 모델 경로 (models/CNN_classifier.pt → models/CNN_classifier.int8-static.onnx)"""
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.int8-{quantize}.onnx"
+
+
+def exported_model_path(model_path: str, backend: str) -> str:
+    """백엔드에서 사용할 모델 파일 경로 (models/YOLO.pt → models/YOLO.onnx 등)"""
+    if backend == BACKEND_TORCH:
+        return model_path
+    base, _ = os.path.splitext(model_path)
+    return base + _EXTENSIONS[backend]
+
+
+def model_files(paths: List[str], backend: str, quantize: str = QUANTIZE_NONE) -> List[str]:
+    """
+    백엔드가 실제로 읽는 모델 파일 목록 (원본 .pt 포함, 결과 캐시 버전 확인용)
+    quantize는 양자화 모델 파일이 있는 경우 (onnx 백엔드)에만 파일 목록에 반영
+    """
+    files = list(paths)
+    if backend == BACKEND_ONNX and quantize != QUANTIZE_NONE:
+        files.extend(quantized_model_path(path, quantize) for path in paths)
+    elif backend != BACKEND_TORCH:
+        files.extend(exported_model_path(path, backend) for path in paths)
+    return files
+
+
+def create_onnx_session(model_path: str, num_threads: Optional[int] = None):
+    """
+    ONNX Runtime 세션 생성 (onnxruntime 필요)
+
+    num_threads: 세션의 intra-op 스레드 수 (워커별 스레드 예산, 생략 시 ONNX Runtime 기본값)
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise RuntimeError("ONNX 백엔드를 사용하려면 onnxruntime 패키지가 필요합니다. (pip install onnxruntime)")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    # 워커 여러 개가 동시에 실행되므로 세션 내부 병렬도는 워커별 스레드 수로 제한
+    options.inter_op_num_threads = 1
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+
+    providers = ["CPUExecutionProvider"]
+    if "CUDAExecutionProvider" in ort.get_available_providers():
+        providers.insert(0, "CUDAExecutionProvider")
+    return ort.InferenceSession(model_path, sess_options=options, providers=providers)
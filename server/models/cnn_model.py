@@ -2,62 +2,236 @@
 CNN 모델 (ViTClassifier) 로드 및 추론
 """
 
+import json
+import os
+import time
+
+# 모델 구조는 번들된 설정으로 만들고 가중치는 로컬 체크포인트만 사용 (허브 접속 금지)
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
 import torch
 import torch.nn as nn
 from torchvision import transforms
-from transformers import ViTModel
+from transformers import ViTConfig, ViTModel
 from PIL import Image
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from .backends import (
+    BACKEND_ONNX, BACKEND_TORCH, QUANTIZE_DYNAMIC, QUANTIZE_NONE, check_backend, check_quantize,
+    create_onnx_session, exported_model_path, quantized_model_path
+)
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
+# google/vit-base-patch16-224-in21k 구조 설정 (학습 시 사용한 백본과 동일)
+VIT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vit_config.json")
+
+# 샘플별 조건 코드 (0: 버튼 헤드, 1: 텍스트 헤드)
+COND_BTN = 0
+COND_TXT = 1
+
+
+def condition_code(condition_str: str) -> int:
+    """조건 문자열 ('Btn_*' / 'Text')을 헤드 선택 코드로 변환"""
+    return COND_BTN if 'Btn' in condition_str else COND_TXT
+
+
+def load_vit_config(config: Optional[Dict] = None) -> ViTConfig:
+    """ViT 설정 (체크포인트에 설정이 들어 있으면 그 값, 없으면 번들된 vit_config.json)"""
+    if config is not None:
+        return ViTConfig.from_dict(config)
+    return ViTConfig.from_json_file(VIT_CONFIG_PATH)
+
+
+def checkpoint_path(model_path: str) -> str:
+    """같은 이름의 .safetensors 체크포인트가 있으면 우선 사용 (mmap으로 바로 읽음)"""
+    base, _ = os.path.splitext(model_path)
+    safetensors_path = base + ".safetensors"
+    return safetensors_path if os.path.exists(safetensors_path) else model_path
+
+
+def read_checkpoint(path: str) -> Tuple[Dict[str, torch.Tensor], Optional[Dict]]:
+    """
+    체크포인트 읽기 (CPU, 메모리 맵)
+
+    지원 형식:
+        - .safetensors (metadata["vit_config"]에 ViT 설정 JSON, export_models.py --checkpoint로 생성)
+        - {"state_dict": ..., "vit_config": ...} 형식의 .pt
+        - state_dict만 저장한 .pt (기존 학습 결과)
+
+    Returns:
+        (state_dict, ViT 설정 dict 또는 None)
+    """
+    if path.endswith(".safetensors"):
+        try:
+            from safetensors import safe_open
+        except ImportError:
+            raise RuntimeError(".safetensors 체크포인트를 읽으려면 safetensors 패키지가 필요합니다. (pip install safetensors)")
+        with safe_open(path, framework="pt", device="cpu") as f:
+            metadata = f.metadata() or {}
+            state_dict = {key: f.get_tensor(key) for key in f.keys()}
+        config = json.loads(metadata["vit_config"]) if "vit_config" in metadata else None
+        return state_dict, config
+
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    config = None
+    if isinstance(checkpoint, dict) and "state_dict" in checkpoint:
+        checkpoint, config = checkpoint["state_dict"], checkpoint.get("vit_config")
+    # DataParallel로 저장한 경우의 접두사 제거
+    state_dict = {key[len("module."):] if key.startswith("module.") else key: value
+                  for key, value in checkpoint.items()}
+    return state_dict, config
+
+
 class ViTClassifier(nn.Module):
     """Vision Transformer 기반 분류 모델"""
-    def __init__(self):
+    def __init__(self, config: Optional[ViTConfig] = None):
         super().__init__()
-        # 사전 학습된 ViT 모델 로드 (3-channel input)
-        self.vit = ViTModel.from_pretrained("google/vit-base-patch16-224-in21k")
+        # ViT 백본 구조만 생성 (가중치는 학습한 체크포인트에서 로드, 3-channel input)
+        self.vit = ViTModel(config or load_vit_config())
 
         # 분류 헤드 정의
         dim = self.vit.config.hidden_size
         self.head_btn = nn.Linear(dim, 2)
         self.head_txt = nn.Linear(dim, 5)
 
-    def forward(self, x, condition_str: str):
-        # condition_str에 따라 숫자 조건(cond) 생성
-        B = x.size(0)
-        cond_val = 0 if 'Btn' in condition_str else 1
-        cond = torch.tensor([cond_val] * B, device=x.device)
-        
-        # ViT 모델 추론
+    @staticmethod
+    def encode_conditions(condition, batch_size: int, device) -> torch.Tensor:
+        """
+        조건을 샘플별 코드 텐서 (B,)로 변환
+
+        condition은 배치 전체에 적용할 문자열, 샘플별 문자열 리스트,
+        또는 이미 인코딩된 코드 텐서 중 하나
+        """
+        if isinstance(condition, torch.Tensor):
+            return condition.to(device=device, dtype=torch.long)
+        if isinstance(condition, str):
+            return torch.full((batch_size,), condition_code(condition), dtype=torch.long, device=device)
+        return torch.tensor([condition_code(c) for c in condition], dtype=torch.long, device=device)
+
+    def forward_heads(self, x, condition):
+        """
+        샘플별 조건에 필요한 헤드만 계산
+
+        Returns:
+            (btn_indices, btn_logits, txt_indices, txt_logits, pooled)
+            btn_logits/txt_logits는 해당 인덱스의 샘플에 대해서만 계산되며,
+            해당 샘플이 없으면 None
+        """
+        cond = self.encode_conditions(condition, x.size(0), x.device)
+
+        # ViT 모델 추론 (버튼/텍스트 샘플을 한 번에)
         out = self.vit(x).pooler_output
-        btn_logits = self.head_btn(out)
-        txt_logits = self.head_txt(out)
 
-        # 최종 출력 텐서 초기화
-        final_logits = torch.zeros((B, 5), device=x.device)
+        btn_indices = (cond == COND_BTN).nonzero(as_tuple=True)[0]
+        txt_indices = (cond == COND_TXT).nonzero(as_tuple=True)[0]
 
-        # 조건에 따라 로짓 채우기
-        btn_indices = (cond == 0)
-        txt_indices = (cond == 1)
+        btn_logits = self.head_btn(out[btn_indices]) if btn_indices.numel() > 0 else None
+        txt_logits = self.head_txt(out[txt_indices]) if txt_indices.numel() > 0 else None
 
-        if btn_indices.sum() > 0:
-            final_logits[btn_indices, :2] = btn_logits[btn_indices]
-        if txt_indices.sum() > 0:
-            final_logits[txt_indices] = txt_logits[txt_indices]
+        return btn_indices, btn_logits, txt_indices, txt_logits, out
+
+    def forward(self, x, condition):
+        # 기존 인터페이스 유지: (B, 5) 로짓 (버튼 샘플은 앞 2개 열만 사용)
+        btn_indices, btn_logits, txt_indices, txt_logits, out = self.forward_heads(x, condition)
+
+        final_logits = out.new_zeros((x.size(0), 5))
+        if btn_logits is not None:
+            final_logits[btn_indices, :2] = btn_logits
+        if txt_logits is not None:
+            final_logits[txt_indices] = txt_logits
             
         return final_logits, out
 
+
+# 체크포인트 불일치 시 /api/model_status에 보여줄 최대 키 수
+MISMATCH_KEYS_SHOWN = 20
+
+
+class CheckpointMismatchError(RuntimeError):
+    """체크포인트의 가중치 키가 ViTClassifier 구조와 맞지 않음 (누락/불필요한 키)"""
+
+    def __init__(self, missing_keys: List[str], unexpected_keys: List[str]):
+        self.missing_keys = list(missing_keys)
+        self.unexpected_keys = list(unexpected_keys)
+        super().__init__(
+            f"체크포인트가 모델 구조와 맞지 않습니다 "
+            f"(누락 {len(self.missing_keys)}개: {', '.join(self.missing_keys[:3]) or '-'}, "
+            f"불필요 {len(self.unexpected_keys)}개: {', '.join(self.unexpected_keys[:3]) or '-'})"
+        )
+
+    def get_info(self) -> Dict:
+        return {
+            "missing_keys_count": len(self.missing_keys),
+            "missing_keys": self.missing_keys[:MISMATCH_KEYS_SHOWN],
+            "unexpected_keys_count": len(self.unexpected_keys),
+            "unexpected_keys": self.unexpected_keys[:MISMATCH_KEYS_SHOWN],
+        }
+
+
+def build_classifier(state_dict: Dict[str, torch.Tensor], config: Optional[ViTConfig] = None) -> ViTClassifier:
+    """
+    체크포인트 가중치로 ViTClassifier 생성
+    meta 디바이스에서 구조만 만든 뒤 가중치를 그대로 연결 (랜덤 초기화 / 복사 비용 없음)
+    meta 디바이스에는 채울 값이 없으므로 누락/불필요한 키가 있으면 CheckpointMismatchError
+    """
+    with torch.device("meta"):
+        model = ViTClassifier(config)
+    keys = model.load_state_dict(state_dict, strict=False, assign=True)
+    if keys.missing_keys or keys.unexpected_keys:
+        raise CheckpointMismatchError(keys.missing_keys, keys.unexpected_keys)
+    return model.eval()
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    """
+    Linear 층 (ViT attention/MLP, 분류 헤드) 가중치를 int8로 동적 양자화 (CPU 전용)
+    ViT-Base 연산의 대부분이 Linear라서 정확도 손실이 작고 CPU 추론 시간이 줄어듦
+    """
+    from torch.ao.quantization import quantize_dynamic
+    return quantize_dynamic(model.cpu().eval(), {nn.Linear}, dtype=torch.qint8)
+
+
+class ViTExportWrapper(nn.Module):
+    """
+    ONNX / TorchScript 변환용 래퍼
+    조건 분기 없이 모든 샘플에 대해 두 헤드의 로짓을 반환 (헤드는 Linear 한 층이라 비용이 작음)
+    """
+    def __init__(self, classifier: ViTClassifier):
+        super().__init__()
+        self.classifier = classifier
+
+    def forward(self, pixel_values):
+        out = self.classifier.vit(pixel_values).pooler_output
+        return self.classifier.head_btn(out), self.classifier.head_txt(out)
+
 LANG_LABEL = ["CN", "EN", "JP", "KR", "TW"]
 
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """로드 단계별 시간 로그 문자열"""
+    return ", ".join(f"{stage.replace('_sec', '')} {sec:.2f}s" for stage, sec in timings.items())
+
+
 class CNNModel:
     """CNN 모델 래퍼 클래스"""
     
-    def __init__(self, model_path: str = "models/CNN_classifier.pt", num_classes: int = 4):
+    def __init__(self, model_path: str = "models/CNN_classifier.pt", num_classes: int = 4,
+                 backend: str = BACKEND_TORCH, num_threads: Optional[int] = None,
+                 quantize: str = QUANTIZE_NONE):
         self.model_path = model_path
         self.num_classes = num_classes
+        self.backend = check_backend(backend)
+        self.quantize = check_quantize(self.backend, quantize)
+        self.num_threads = num_threads
+        # 양자화 모델은 CPU에서만 실행
+        self.device = "cpu" if self.quantize != QUANTIZE_NONE else DEVICE
         self.model = None
+        # ONNX 백엔드의 ONNX Runtime 세션
+        self.session = None
+        # 로드 단계별 소요 시간 (초)
+        self.load_timings: Dict[str, float] = {}
         
         try:
             resampling = Image.Resampling.LANCZOS
@@ -74,64 +248,131 @@ class CNNModel:
         self.conditions = ['Btn_Back', 'Btn_Home', 'Btn_ID', 'Btn_Stat', "Text"]
         self.load_model()
     
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None or self.session is not None
+
     def load_model(self):
-        """모델 로드"""
-        try:
-            self.model = ViTClassifier().to(DEVICE)
-            # 저장된 state_dict를 직접 로드합니다.
-            self.model.load_state_dict(torch.load(self.model_path, map_location=DEVICE), strict=False)
+        """
+        모델 로드 (backend에 따라 .safetensors / .pt / .torchscript / .onnx, quantize에 따라 int8 모델)
+        모델 파일이 없거나 체크포인트가 모델 구조와 맞지 않으면 예외 발생 (다른 모델로 대체하지 않음)
+        """
+        self.load_timings = {}
+        last = time.perf_counter()
+
+        def mark(stage: str):
+            nonlocal last
+            now = time.perf_counter()
+            self.load_timings[stage] = round(now - last, 4)
+            last = now
+
+        if self.backend == BACKEND_TORCH:
+            path = checkpoint_path(self.model_path)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"CNN 모델 파일을 찾을 수 없습니다: {path}")
+            state_dict, config = read_checkpoint(path)
+            mark("read_weights_sec")
+            config = load_vit_config(config)
+            mark("config_sec")
+            model = build_classifier(state_dict, config)
+            mark("build_sec")
+            self.model = model.to(self.device)
+            mark("to_device_sec")
+            if self.quantize == QUANTIZE_DYNAMIC:
+                self.model = quantize_dynamic_int8(self.model)
+                mark("quantize_sec")
+            print(f"CNN 모델 로드 완료: {path} (quantize={self.quantize}, {format_timings(self.load_timings)})")
+            return
+
+        # 변환된 모델 (python export_models.py / quantize_models.py로 생성)
+        if self.quantize != QUANTIZE_NONE:
+            path = quantized_model_path(self.model_path, self.quantize)
+            hint = "python quantize_models.py --onnx"
+        else:
+            path = exported_model_path(self.model_path, self.backend)
+            hint = f"python export_models.py --format {self.backend}"
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} 파일이 없습니다. 먼저 {hint}를 실행하세요.")
+        if self.backend == BACKEND_ONNX:
+            self.session = create_onnx_session(path, self.num_threads)
+        else:
+            self.model = torch.jit.load(path, map_location=self.device)
             self.model.eval()
-            print(f"CNN 모델 로드 완료: {self.model_path}")
-        except Exception as e:
-            print(f"CNN 모델 로드 실패: {e}")
-            print("경로를 확인하거나 모델 파일이 존재하는지 확인하세요.")
-            self.model = None
+        mark("load_sec")
+        print(f"CNN 모델 로드 완료: {path} (backend={self.backend}, quantize={self.quantize}, "
+              f"{format_timings(self.load_timings)})")
     
     def predict_roi(self, image: Image.Image, condition: str) -> Tuple[float, str | bool]:
         """
         ROI 이미지에 대한 예측 수행 (버튼: PASS or FAIL / Text: Language Code)
         """
-        if self.model is None or condition not in self.conditions:
-            return 0.0, False
-        
+        return self.predict_rois([image], [condition])[0]
+
+    def _forward_logits(self, x: torch.Tensor, conditions: List[str]):
+        """
+        백엔드별 추론으로 (btn_rows, btn_logits, txt_rows, txt_logits) 계산
+        (해당 조건의 샘플이 없으면 로짓은 None)
+        """
+        if self.backend == BACKEND_TORCH:
+            btn_rows, btn_logits, txt_rows, txt_logits, _ = self.model.forward_heads(x.to(self.device), conditions)
+            return btn_rows, btn_logits, txt_rows, txt_logits
+
+        if self.backend == BACKEND_ONNX:
+            btn_all, txt_all = self.session.run(None, {"pixel_values": x.numpy()})
+            btn_all, txt_all = torch.from_numpy(btn_all), torch.from_numpy(txt_all)
+        else:
+            btn_all, txt_all = self.model(x.to(self.device))
+
+        cond = ViTClassifier.encode_conditions(conditions, x.size(0), btn_all.device)
+        btn_rows = (cond == COND_BTN).nonzero(as_tuple=True)[0]
+        txt_rows = (cond == COND_TXT).nonzero(as_tuple=True)[0]
+        btn_logits = btn_all[btn_rows] if btn_rows.numel() > 0 else None
+        txt_logits = txt_all[txt_rows] if txt_rows.numel() > 0 else None
+        return btn_rows, btn_logits, txt_rows, txt_logits
+
+    def predict_rois(self, images: List[Image.Image], conditions: List[str]) -> List[Tuple[float, str | bool]]:
+        """
+        여러 ROI 이미지를 한 번에 예측 (predict_roi의 배치 버전)
+
+        Args:
+            images: ROI 이미지 리스트 (grayscale PIL 이미지)
+            conditions: 각 ROI의 조건 ('Btn_*' 또는 'Text'), images와 같은 길이
+
+        Returns:
+            ROI 순서대로 [(확률, Pass 여부 또는 언어 코드), ...]
+        """
+        results: List[Tuple[float, str | bool]] = [(0.0, False)] * len(images)
+        if not self.is_loaded or not images:
+            return results
+
+        # 지원하는 조건의 ROI만 추론 (나머지는 기본값 유지)
+        valid_idx = [i for i, c in enumerate(conditions) if c in self.conditions]
+        if not valid_idx:
+            return results
+
         try:
-            # 1. 이미지 전처리 및 디바이스 이동
-            x = self.transform(image).unsqueeze(0).to(DEVICE)
-            
-            # 2. 추론
             with torch.no_grad():
-                logits, _ = self.model(x, condition)
-                
-                # 3. 버튼 품질 검사 ('Btn' 조건)
-                if 'Btn' in condition:
-                    btn_logits = logits[:, :2] # Pass, Fail
-                    probabilities = torch.softmax(btn_logits, dim=1)
-                    
-                    predicted_idx = torch.argmax(btn_logits, dim=1).item()
-                    is_pass = (predicted_idx == 0) # 0이 Pass라고 가정
-                    prob = probabilities[0, predicted_idx].item()
-                    
-                    return prob, is_pass 
-                    
-                # 4. 텍스트 언어 감지 ('Text' 조건)
-                elif condition == 'Text':
-                    txt_logits = logits # 5개 언어 로짓
-                    probabilities = torch.softmax(txt_logits, dim=1)
-                    predicted_idx = torch.argmax(txt_logits, dim=1).item()
-                    
-                    # 5개 클래스 (CN, EN, JP, KR, TW)
-                    if 0 <= predicted_idx < len(LANG_LABEL):
-                        lang_code = LANG_LABEL[predicted_idx]
-                    else:
-                        lang_code = "Unknown"
-                        
-                    prob = probabilities[0, predicted_idx].item()
-                    
-                    return prob, lang_code # 확률과 언어 코드 str 반환
-                    
-                else:
-                    return 0.0, False # 예상치 못한 조건
+                # 1. 버튼/텍스트 ROI를 하나의 배치로 추론 (샘플별 헤드 선택)
+                x = torch.stack([self.transform(images[i]) for i in valid_idx])
+                btn_rows, btn_logits, txt_rows, txt_logits = self._forward_logits(
+                    x, [conditions[i] for i in valid_idx]
+                )
+
+                # 2. 버튼 품질 검사 (Pass, Fail)
+                if btn_logits is not None:
+                    probs, preds = torch.softmax(btn_logits, dim=1).max(dim=1)
+                    for row, prob, pred in zip(btn_rows.tolist(), probs.tolist(), preds.tolist()):
+                        results[valid_idx[row]] = (prob, pred == 0) # 0이 Pass라고 가정
+
+                # 3. 텍스트 언어 감지 (CN, EN, JP, KR, TW)
+                if txt_logits is not None:
+                    probs, preds = torch.softmax(txt_logits, dim=1).max(dim=1)
+                    for row, prob, pred in zip(txt_rows.tolist(), probs.tolist(), preds.tolist()):
+                        lang_code = LANG_LABEL[pred] if 0 <= pred < len(LANG_LABEL) else "Unknown"
+                        results[valid_idx[row]] = (prob, lang_code)
 
         except Exception as e:
-            print(f"CNN 예측 오류: {e}")
-            return 0.0, False 
+            print(f"CNN 배치 예측 오류: {e}")
+            return [(0.0, False)] * len(images)
+
+        return results
@@ -0,0 +1,326 @@
+"""
+추론 전용 워커 풀
+모델 추론을 asyncio 이벤트 루프 밖 (스레드 풀 또는 프로세스 풀)에서 실행
+shm 모드는 프로세스 풀에 이미지를 공유 메모리 링 버퍼로 전달 (pickle 전송 없음)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+EXECUTOR_MODES = ("thread", "process", "shm")
+PROCESS_MODES = ("process", "shm")
+
+# shm 모드에서 빈 슬롯을 기다리는 최대 시간 (초과 시 해당 이미지는 pickle로 전달)
+SHM_ACQUIRE_TIMEOUT_SEC = 5.0
+# 프로세스 워커가 모델 로드를 마칠 때까지 기다리는 최대 시간
+WORKER_READY_TIMEOUT_SEC = float(os.getenv("INFERENCE_WORKER_READY_TIMEOUT", "600"))
+
+
+def _set_torch_threads(num_threads: int):
+    """현재 워커의 torch intra-op 스레드 수 설정"""
+    import torch
+    torch.set_num_threads(num_threads)
+
+
+def _init_thread_worker(num_threads: int):
+    _set_torch_threads(num_threads)
+
+
+def _pin_worker_cpus(counter, num_threads: int):
+    """워커 순번에 따라 CPU 코어를 num_threads개씩 나눠서 고정 (Linux만 지원)"""
+    if counter is None or not hasattr(os, "sched_setaffinity"):
+        return
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    cpus = sorted(os.sched_getaffinity(0))
+    start = (index * num_threads) % len(cpus)
+    os.sched_setaffinity(0, cpus[start:start + num_threads] or cpus)
+
+
+# 프로세스 워커의 워밍업 결과, 공유 메모리 링 (워커 프로세스 안에서만 사용)
+_worker_warmup: Optional[Dict] = None
+_worker_ring = None
+
+
+def _init_process_worker(num_threads: int, yolo_path: str, cnn_path: str,
+                         ring_args: Optional[tuple] = None, cpu_counter=None):
+    """
+    프로세스 워커 초기화: (CPU 고정) 스레드 수 설정 후 모델을 한 번만 로드하고 워밍업
+    ring_args가 있으면 (shm 모드) API 프로세스의 공유 메모리 링에 연결
+    """
+    global _worker_warmup, _worker_ring
+    _pin_worker_cpus(cpu_counter, num_threads)
+    _set_torch_threads(num_threads)
+    if ring_args is not None:
+        from .shm_ring import SharedImageRing
+        _worker_ring = SharedImageRing.attach(*ring_args)
+    from . import inference
+    inference.initialize_models(yolo_path=yolo_path, cnn_path=cnn_path, num_threads=num_threads)
+    try:
+        _worker_warmup = inference.warmup_models()
+    except Exception as e:
+        _worker_warmup = {"error": f"{type(e).__name__}: {e}"}
+
+
+def _worker_ready() -> Dict:
+    """워커 시작 확인 (InferenceExecutor.start에서 워커마다 한 번 호출), 모델별 로드 결과 포함"""
+    inference = sys.modules.get(f"{__package__}.inference")
+    load = inference.model_load_info if inference is not None else {}
+    return {"pid": os.getpid(), "warmup": _worker_warmup, "load": load}
+
+
+def _analyze_images(images: List, options: List[Dict]) -> List[Dict]:
+    """
+    워커에서 실행하는 배치 분석 (inference 모듈은 여기서 처음 import)
+    API 프로세스가 process 모드에서 ML 라이브러리를 import하지 않도록 모듈 함수로 전달
+    """
+    from . import inference
+    return inference.analyze_images(images, options)
+
+
+def _reset_tracker(track_key: str):
+    """워커의 추적 상태 해제 (추적을 한 번도 쓰지 않은 워커는 tracking 모듈을 import하지 않음)"""
+    tracking = sys.modules.get(f"{__package__}.tracking")
+    if tracking is not None:
+        tracking.reset_tracker(track_key)
+
+
+def _analyze_shared(descriptors: List[Dict], options: List[Dict]) -> List[Dict]:
+    """shm 모드 워커의 배치 분석 (공유 메모리 슬롯의 이미지를 복사 없이 읽음)"""
+    return _analyze_images([_worker_ring.read(descriptor) for descriptor in descriptors], options)
+
+
+class InferenceExecutor:
+    """
+    추론 작업용 전용 Executor
+
+    - thread: API 프로세스의 모델을 쓰는 단일 추론 스레드
+      (YOLO predictor와 추적 상태가 스레드 안전하지 않으므로 워커는 항상 1개, 병렬 처리는 process / shm 모드)
+    - process: 워커 프로세스마다 initialize_models를 한 번 호출 (GIL 영향 없음)
+    - shm: process와 같고, 이미지는 공유 메모리 링 버퍼 슬롯으로 전달 (descriptor만 pickle)
+
+    워커마다 프로세스 1개짜리 풀(lane)을 따로 두고, track_key가 있는 이미지는 키로 정해지는
+    워커에서만 분석 (추적 상태가 워커 프로세스마다 따로 있으므로 같은 카메라는 항상 같은 워커)
+    track_key가 없는 이미지는 실행 중인 작업이 가장 적은 워커로 보냄
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 1, torch_threads: Optional[int] = None,
+                 ring_slots: Optional[int] = None, slot_mb: int = 32, pin_cpus: bool = False):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"지원하지 않는 INFERENCE_EXECUTOR 모드입니다: {mode} ({'/'.join(EXECUTOR_MODES)})")
+        self.mode = mode
+        self.workers = max(1, workers)
+        if mode == "thread" and self.workers > 1:
+            print(f"[WARN] thread 모드는 모델을 공유하므로 워커 1개로 실행합니다 "
+                  f"(INFERENCE_WORKERS={self.workers}, 병렬 추론은 INFERENCE_EXECUTOR=process 또는 shm)")
+            self.workers = 1
+        # 워커당 torch 스레드 수 (기본: CPU 코어를 워커 수로 균등 분할)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        # 워커 프로세스를 CPU 코어 구간에 고정 (process / shm 모드)
+        self.pin_cpus = pin_cpus
+        # shm 모드 링 버퍼 크기 (기본: 워커당 배치 8장 x 2)
+        self.ring_slots = ring_slots or self.workers * 16
+        self.slot_bytes = slot_mb * 1024 * 1024
+        self._ring = None
+        # 워커별 풀과 실행 중인 작업 수
+        self._lanes: List[Executor] = []
+        self._lane_load: List[int] = [0] * self.workers
+        # start / shutdown 직렬화 (백그라운드 모델 로드 중에 서버가 종료되어도 띄운 워커를 정리)
+        self._lifecycle_lock = threading.RLock()
+        # process 모드 워커별 워밍업 결과 ({"pid", "warmup"})
+        self.worker_warmup: List[Dict] = []
+
+    def start(self, yolo_path: str = "models/YOLO.pt", cnn_path: str = "models/CNN_classifier.pt"):
+        """워커 풀 생성 (process 모드에서는 워커별 모델 로드까지 완료)"""
+        with self._lifecycle_lock:
+            if self._lanes:
+                return
+
+            if self.uses_processes:
+                try:
+                    self._start_processes(yolo_path, cnn_path)
+                except BaseException:
+                    # 일부 워커만 시작된 경우 띄운 워커와 공유 메모리까지 정리
+                    self.shutdown()
+                    raise
+            else:
+                self._lanes = [ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix="inference",
+                    initializer=_init_thread_worker,
+                    initargs=(self.torch_threads,),
+                )]
+
+        print(f"추론 워커 풀 시작: mode={self.mode}, workers={self.workers}, torch_threads={self.torch_threads}")
+
+    def _start_processes(self, yolo_path: str, cnn_path: str):
+        # CUDA/torch와 fork 충돌을 피하기 위해 spawn 사용
+        context = multiprocessing.get_context("spawn")
+        ring_args = None
+        if self.mode == "shm":
+            from .shm_ring import SharedImageRing
+            self._ring = SharedImageRing(self.ring_slots, self.slot_bytes)
+            ring_args = (self._ring.name, self.ring_slots, self.slot_bytes)
+        cpu_counter = context.Value("i", 0) if self.pin_cpus else None
+        self._lanes = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_process_worker,
+                initargs=(self.torch_threads, yolo_path, cnn_path, ring_args, cpu_counter),
+            )
+            for _ in range(self.workers)
+        ]
+        # 워커를 미리 띄워서 첫 요청이 모델 로드 비용을 내지 않도록 함
+        # (워커 초기화에서 모델 로드와 워밍업까지 끝난 뒤 응답)
+        futures = [lane.submit(_worker_ready) for lane in self._lanes]
+        self.worker_warmup = [future.result(timeout=WORKER_READY_TIMEOUT_SEC) for future in futures]
+
+    @property
+    def uses_processes(self) -> bool:
+        """모델이 워커 프로세스에만 로드되는 모드인지 (process / shm)"""
+        return self.mode in PROCESS_MODES
+
+    def shutdown(self):
+        """워커 풀 종료 (시작 중이면 시작이 끝난 뒤 종료), 워커가 모두 끝난 뒤 공유 메모리 삭제"""
+        with self._lifecycle_lock:
+            lanes, self._lanes = self._lanes, []
+            for lane in lanes:
+                lane.shutdown(wait=True, cancel_futures=True)
+            if self._ring is not None:
+                self._ring.close()
+                self._ring = None
+
+    def lane_for(self, track_key: str) -> int:
+        """track_key의 추적 상태를 가진 워커 번호 (API 프로세스가 재시작되어도 같은 값)"""
+        return zlib.crc32(track_key.encode("utf-8")) % self.workers
+
+    def _idle_lane(self) -> int:
+        return min(range(self.workers), key=self._lane_load.__getitem__)
+
+    def _submit(self, lane: int, fn, *args) -> asyncio.Future:
+        future = asyncio.get_running_loop().run_in_executor(self._lanes[lane], fn, *args)
+        self._lane_load[lane] += 1
+        future.add_done_callback(lambda _: self._finish_lane_task(lane))
+        return future
+
+    def _finish_lane_task(self, lane: int):
+        self._lane_load[lane] -= 1
+
+    async def run(self, fn, *args, lane: Optional[int] = None):
+        """fn(*args)를 워커에서 실행하고 결과를 기다림 (lane 생략 시 가장 한가한 워커)"""
+        if not self._lanes:
+            self.start()
+        return await self._submit(self._idle_lane() if lane is None else lane, fn, *args)
+
+    async def analyze(self, images: List, options: List[Dict]) -> List[Dict]:
+        """
+        이미지 배치를 워커에서 분석 (inference.analyze_images)
+        track_key에 따라 워커별로 나눠 동시에 실행하고 원래 순서로 합침
+        """
+        if not self._lanes:
+            self.start()
+
+        groups: Dict[int, List[int]] = {}
+        idle_lane = self._idle_lane()
+        for index, option in enumerate(options):
+            track_key = option.get("track_key")
+            groups.setdefault(self.lane_for(track_key) if track_key else idle_lane, []).append(index)
+
+        lane_results = await asyncio.gather(*[
+            self._analyze_on_lane(lane, [images[i] for i in indices], [options[i] for i in indices])
+            for lane, indices in groups.items()
+        ])
+        results: List[Optional[Dict]] = [None] * len(images)
+        for indices, batch_results in zip(groups.values(), lane_results):
+            for index, result in zip(indices, batch_results):
+                results[index] = result
+        return results
+
+    async def _analyze_on_lane(self, lane: int, images: List, options: List[Dict]) -> List[Dict]:
+        """
+        워커 하나에서 배치 분석
+        shm 모드는 이미지를 링 버퍼 슬롯에 복사한 뒤 descriptor만 워커로 보냄
+        """
+        if self.mode != "shm":
+            return await self._submit(lane, _analyze_images, images, options)
+
+        write = asyncio.ensure_future(asyncio.to_thread(self._write_images, images))
+        try:
+            descriptors, slots = await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # 복사 중에 취소되어도 복사가 끝나면 가져간 슬롯 해제
+            write.add_done_callback(self._release_written_slots)
+            raise
+        future = self._submit(lane, _analyze_shared, descriptors, options)
+        try:
+            return await asyncio.shield(future)
+        finally:
+            # 요청이 취소되어도 워커가 슬롯을 다 읽을 때까지 해제하지 않음
+            if future.done():
+                self._release_slots(slots)
+            else:
+                future.add_done_callback(lambda _: self._release_slots(slots))
+
+    async def release_tracking(self, track_key: str):
+        """실시간 스트림이 끝난 track_key의 추적 상태를 그 키를 맡은 워커에서 해제"""
+        if not self._lanes:
+            return
+        await self.run(_reset_tracker, track_key, lane=self.lane_for(track_key))
+
+    def _write_images(self, images: List):
+        """이미지를 링 버퍼 슬롯에 복사 (빈 슬롯이 없으면 대기, 슬롯보다 크거나 시간 초과면 pickle로 전달)"""
+        ring = self._ring
+        descriptors = []
+        slots = []
+        for image in images:
+            slot = ring.acquire(timeout=SHM_ACQUIRE_TIMEOUT_SEC) if ring.fits(image) else None
+            if slot is None:
+                ring.fallbacks += 1
+                descriptors.append(ring.inline(image))
+                continue
+            slots.append(slot)
+            descriptors.append(ring.write(slot, image))
+        return descriptors, slots
+
+    def _release_written_slots(self, write: asyncio.Future):
+        if not write.cancelled() and write.exception() is None:
+            self._release_slots(write.result()[1])
+
+    def _release_slots(self, slots: List[int]):
+        if self._ring is None:
+            return
+        for slot in slots:
+            self._ring.release(slot)
+
+    def get_info(self) -> Dict:
+        info = {
+            "mode": self.mode,
+            "workers": self.workers,
+            "torch_threads_per_worker": self.torch_threads,
+            "running": bool(self._lanes),
+        }
+        if self.uses_processes:
+            info["pin_cpus"] = self.pin_cpus
+            info["tasks_per_worker"] = list(self._lane_load)
+        if self._ring is not None:
+            info["ring"] = self._ring.get_info()
+        return info
+
+
+# 서버 전역 추론 Executor (환경변수로 설정)
+inference_executor = InferenceExecutor(
+    mode=os.getenv("INFERENCE_EXECUTOR", "thread"),
+    workers=int(os.getenv("INFERENCE_WORKERS", "1")),
+    torch_threads=int(os.getenv("INFERENCE_TORCH_THREADS", "0")) or None,
+    ring_slots=int(os.getenv("SHM_RING_SLOTS", "0")) or None,
+    slot_mb=int(os.getenv("SHM_SLOT_MB", "32")),
+    pin_cpus=os.getenv("INFERENCE_PIN_CPUS", "0") == "1",
+)
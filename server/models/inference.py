@@ -4,19 +4,20 @@ YOLO, ConditionalViT (CNN) 모델을 연결하여 7단계 규칙 기반 Pass/Fai
 """
 
 import numpy as np
-import torch
 import time 
 from typing import Dict, List, Optional, Tuple 
-from PIL import Image, ImageDraw
+from PIL import Image
 from collections import Counter
-import io
 import os
 import traceback
 import base64
 import cv2 
 
 from .yolo_model import YOLOModel 
-from .cnn_model import CNNModel
+from .cnn_model import CNNModel, CheckpointMismatchError
+from .backends import DEFAULT_BACKEND, DEFAULT_QUANTIZE
+from .render import RENDER_NONE, RENDER_THUMBNAIL, RENDER_FULL, THUMBNAIL_MAX_DIM, DEFAULT_JPEG_QUALITY
+from . import tracking
 
 
 PRODUCT_SPEC = {
@@ -38,6 +39,8 @@ CLASS_MAP = { 0: 'Home', 1: 'Back', 2: 'ID', 3: 'Stat', 4: 'Monitor_Small',
 
 yolo_model = None
 cnn_model = None
+# 모델별 로드 결과 {"yolo": {"loaded", "timings", "error"}, "cnn": {...}} (model_status 응답용)
+model_load_info: Dict[str, Dict] = {}
 
 def classify_model(found_back, found_id, text_langs):
     # (1) 텍스트 언어 결정
@@ -91,283 +94,610 @@ def convert_numpy_types(data):
 def initialize_models(
     yolo_path: str = "models/YOLO.pt",
     cnn_path: str = "models/CNN_classifier.pt",
+    backend: Optional[str] = None,
+    num_threads: Optional[int] = None,
+    quantize: Optional[str] = None,
 ):
-    """모델 초기화 (서버 시작 시 호출)"""
+    """
+    모델 초기화 (서버 시작 시 호출)
+
+    Args:
+        backend: 추론 백엔드 (torch / onnx / torchscript, 생략 시 INFERENCE_BACKEND 환경변수)
+        num_threads: ONNX Runtime 세션의 intra-op 스레드 수 (워커별 스레드 예산)
+        quantize: CNN 양자화 모드 (none / dynamic / static, 생략 시 INFERENCE_QUANTIZE 환경변수)
+    """
     global yolo_model, cnn_model, DEVICE
+    backend = backend or DEFAULT_BACKEND
+    quantize = quantize or DEFAULT_QUANTIZE
     
     # YOLO 모델 초기화
     if yolo_model is None:
+        start = time.perf_counter()
         try:
-            yolo_model = YOLOModel(model_path=yolo_path) 
+            yolo_model = YOLOModel(model_path=yolo_path, backend=backend, num_threads=num_threads) 
             DEVICE = yolo_model.device
+            model_load_info["yolo"] = {"loaded": True, "timings": yolo_model.load_timings}
         except Exception as e:
-            print(f"YOLO 모델 로드 실패: {e}")
+            traceback.print_exc()
+            print(f"🚨 YOLO 모델 로드 실패: {e}")
+            model_load_info["yolo"] = {"loaded": False, "error": f"{type(e).__name__}: {e}"}
+        model_load_info["yolo"]["total_sec"] = round(time.perf_counter() - start, 4)
             
     # CNN/Text 모델 초기화
     if cnn_model is None:
+        start = time.perf_counter()
         try:
-            cnn_model = CNNModel(model_path=cnn_path)
+            cnn_model = CNNModel(model_path=cnn_path, backend=backend, num_threads=num_threads,
+                                 quantize=quantize)
+            model_load_info["cnn"] = {"loaded": True, "timings": cnn_model.load_timings}
             print("CNN/Text 모델 로드 완료.")
         except Exception as e:
-            print(f"CNN/Text 모델 로드 실패: {e}")
+            traceback.print_exc()
+            print(f"🚨 CNN/Text 모델 로드 실패: {e}")
+            model_load_info["cnn"] = {"loaded": False, "error": f"{type(e).__name__}: {e}"}
+            if isinstance(e, CheckpointMismatchError):
+                # 누락/불필요한 가중치 키 (/api/model_status의 load.cnn)
+                model_load_info["cnn"].update(e.get_info())
             cnn_model = None
+        model_load_info["cnn"]["total_sec"] = round(time.perf_counter() - start, 4)
             
     return yolo_model, cnn_model
 
 # ============================================================
-# 이미지 분석 메인 함수
+# 분석 단계별 함수 (전처리 → ROI 수집 → 판정/시각화)
 # ============================================================
-def analyze_image(image: np.ndarray, 
-    # 💡 [수정] 명도/조도 인수를 받도록 시그니처 수정
+BUTTON_CLASSES = ['Home', 'Back', 'ID', 'Stat']
+
+def _preprocess_image(image: np.ndarray, 
     brightness: float = 0.0, 
-    exposure_gain: float = 1.0) -> Dict:
+    exposure_gain: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, bool]:
     """
-    이미지 분석 메인 함수: 7단계 복합 검사 파이프라인 수행 및 결과 JSON 반환
+    입력 이미지 전처리 (입력은 cv2.imdecode 결과와 같은 BGR 배열, 복사하지 않고 그대로 사용)
+
+    Returns:
+        (원본 BGR (ROI Crop용), 명도/조도 적용된 BGR (시각화용), YOLO 입력 RGB,
+         시각화용 버퍼가 새로 할당된 것인지 여부 (True면 복사 없이 바로 그릴 수 있음))
     """
-    if yolo_model is None or cnn_model is None:
-        initialize_models()
-        if cnn_model is None:
-            raise RuntimeError("CNN/Text 모델이 로드되지 않았습니다.")
+    # 그레이스케일 / 알파 채널 입력만 3채널 BGR로 변환
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    elif image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+    original_img_bgr = image
+    processed_img_bgr = original_img_bgr
+    owns_processed = False
     
-    try:
+    brightness_int = int(brightness)
+ 
+    # 디폴트 값이 아닐 때 보정 (이 경우에만 새 버퍼 할당)
+    if brightness_int != 0 or exposure_gain != 1.0:
+         processed_img_bgr = cv2.convertScaleAbs(original_img_bgr, 
+                                             alpha=exposure_gain, 
+                                             beta=brightness_int)
+         owns_processed = True
 
-        print(f"[DEBUG] Brightness: {brightness}, Exposure: {exposure_gain}")
-        
-        # 입력 이미지를 RGB 포맷으로 변환
-        pil_img_temp = Image.fromarray(image).convert("RGB")
-        img_rgb = np.array(pil_img_temp) 
-        pil_img = pil_img_temp
-            
-        original_img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-        
-        # BGR 포맷으로 변환 (OpenCV 처리를 위함)
-        processed_img_bgr = original_img_bgr
-        
-        brightness_int = int(brightness)
-     
-        # 디폴트 값이 아닐 때 보정
-        if brightness_int != 0 or exposure_gain != 1.0:
-             processed_img_bgr = cv2.convertScaleAbs(original_img_bgr, 
-                                                 alpha=exposure_gain, 
-                                                 beta=brightness_int)
-
-        draw_img = processed_img_bgr.copy()
+    # 모델 입력 이미지를 RGB로 변환 (YOLO 모델이 RGB를 기대한다고 가정)
+    # 명도/조도 적용된 BGR 이미지를 RGB로 변환하여 모델에 전달
+    img_rgb_corrected = cv2.cvtColor(processed_img_bgr, cv2.COLOR_BGR2RGB)
+
+    return original_img_bgr, processed_img_bgr, img_rgb_corrected, owns_processed
+
+
+def _collect_rois(detections: List[Dict], image_bgr: np.ndarray):
+    """
+    유효한 YOLO 검출 결과와 CNN 입력 ROI 수집
+
+    Returns:
+        (rois, roi_crops, roi_conditions, roi_indices)
+        roi_indices[k]는 roi_crops[k]가 속한 rois의 인덱스
+    """
+    rois = []
+    roi_crops = []
+    roi_conditions = []
+    roi_indices = []
+    for detection in detections:
+        x1, y1, x2, y2 = map(int, detection["bbox"])
+        if x1 >= x2 or y1 >= y2: continue
+
+        base_cls = detection["class"].replace('Btn_', '')
+        if base_cls in BUTTON_CLASSES or base_cls == 'Text':
+            # Crop은 원본 (수정 전)에서 수행 (슬라이스 뷰, 그레이스케일 변환 시에만 ROI 크기로 할당)
+            # CNNModel에 전달할 때는 명도 조절이 필요없다고 가정 (모델이 Robust하다고 가정)
+            crop = image_bgr[max(y1, 0):y2, max(x1, 0):x2]
+            roi_crops.append(Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)))
+            roi_conditions.append(detection["class"])
+            roi_indices.append(len(rois))
+
+        rois.append((detection, (x1, y1, x2, y2)))
+
+    return rois, roi_crops, roi_conditions, roi_indices
+
+
+def _draw_annotations(draw_img: np.ndarray, overlay: List[Dict], title: str, is_pass: bool, fails: List[str],
+    scale: float = 1.0):
+    """
+    판정 결과 (BBox, 라벨, 제품명, PASS/FAIL, 실패 사유)를 이미지에 그리기
+
+    scale: 원본 대비 draw_img 크기 비율 (BBox 좌표에 적용, 글자는 너무 작아지지 않게 최소 크기 유지)
+    """
+    font = max(scale, 0.5)
+
+    def size(value):
+        return max(1, int(round(value * font)))
+
+    for item in overlay:
+        x1, y1, x2, y2 = (int(round(v * scale)) for v in item["bbox"])
+        final_label = item["label"]
+        color = tuple(item["color"])
+
+        # BBox 그리기
+        cv2.rectangle(draw_img, (x1, y1), (x2, y2), color, size(2))
+        cv2.putText(draw_img, final_label, (x1, y1 - size(10)), cv2.FONT_HERSHEY_SIMPLEX, 0.6 * font, (0, 0, 0), size(2), cv2.LINE_AA)
+        cv2.putText(draw_img, final_label, (x1, y1 - size(10)), cv2.FONT_HERSHEY_SIMPLEX, 0.6 * font, (255, 255, 255), 1, cv2.LINE_AA)
+
+    # 제품명 표시 
+    cv2.putText(draw_img, title, (size(10), size(40)), cv2.FONT_HERSHEY_SIMPLEX, 1.0 * font, (255, 255, 0), size(2)) # BGR: Cyan/Yellow
+
+    # 최종 상태 표시
+    if is_pass:
+        status_color = (0, 255, 0) # Green
+        cv2.putText(draw_img, "PASS", (size(10), size(90)), cv2.FONT_HERSHEY_SIMPLEX, 1.0 * font, status_color, size(3))
+    else:
+        status_color = (0, 0, 255) # Red
+        cv2.putText(draw_img, "FAIL", (size(10), size(90)), cv2.FONT_HERSHEY_SIMPLEX, 1.0 * font, status_color, size(3))
         
+        # 실패 사유 목록 출력
+        y = size(140)
+        for r in fails:
+            cv2.putText(draw_img, r, (size(10), y), cv2.FONT_HERSHEY_SIMPLEX, 0.6 * font, status_color, size(2))
+            y += size(30)
+
+
+def render_annotated_image(image_bgr: np.ndarray, overlay: List[Dict], title: str, is_pass: bool,
+    fails: List[str], render: str = RENDER_FULL, jpeg_quality: Optional[int] = None,
+    max_dim: Optional[int] = None, in_place: bool = False) -> Optional[str]:
+    """
+    판정 결과를 이미지에 그려서 base64 JPEG로 반환 (render가 none이면 아무 작업도 하지 않고 None)
+
+    축소가 필요하면 먼저 INTER_AREA로 줄인 뒤 작은 이미지에 그리므로 원본 크기 복사/인코딩 비용이 없음
+
+    Args:
+        in_place: image_bgr를 그대로 그려도 되는 버퍼이면 True (원본 크기로 그릴 때 복사 생략)
+    """
+    if render == RENDER_NONE:
+        return None
+    if render == RENDER_THUMBNAIL and max_dim is None:
+        max_dim = THUMBNAIL_MAX_DIM
+
+    height, width = image_bgr.shape[:2]
+    scale = 1.0
+    if max_dim is not None and max(height, width) > max_dim:
+        scale = max_dim / max(height, width)
+        draw_img = cv2.resize(image_bgr, (max(1, int(width * scale)), max(1, int(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+    else:
+        draw_img = image_bgr if in_place else image_bgr.copy()
+
+    _draw_annotations(draw_img, overlay, title, is_pass, fails, scale)
+
+    quality = DEFAULT_JPEG_QUALITY if jpeg_quality is None else jpeg_quality
+    _, buffer = cv2.imencode('.jpg', draw_img, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    return base64.b64encode(buffer).decode('utf-8')
+
+
+def _build_result(rois: List, roi_predictions: List, processed_img_bgr: np.ndarray,
+    owns_processed: bool = False, render: str = RENDER_FULL, jpeg_quality: Optional[int] = None,
+    max_dim: Optional[int] = None) -> Dict:
+    """
+    ROI별 CNN 예측으로 7단계 규칙 기반 판정 및 결과 이미지 생성
+
+    Args:
+        owns_processed: processed_img_bgr가 이 분석 전용 버퍼이면 True (복사 없이 그 위에 그림)
+        render / jpeg_quality / max_dim: 결과 이미지 렌더링 옵션 (render_annotated_image 참고)
+    """
+    # --- 2. YOLO 결과 플래그 및 CNN 데이터 수집 ---
+    found_home = False
+    found_stat = False
+    found_monitor = False
+    found_back = False
+    found_id = False
+    cnn_fail = False 
     
-        # 모델 입력 이미지를 RGB로 재변환 (YOLO 모델이 RGB를 기대한다고 가정)
-        # 명도/조도 적용된 BGR 이미지를 RGB로 변환하여 모델에 전달
-        img_rgb_corrected = cv2.cvtColor(processed_img_bgr, cv2.COLOR_BGR2RGB)
-            
-        # 1. YOLO 객체 검출
-        yolo_results = yolo_model.detect(img_rgb_corrected) 
-        
-        # --- 2. YOLO 결과 플래그 및 CNN 데이터 수집 ---
-        found_home = False
-        found_stat = False
-        found_monitor = False
-        found_back = False
-        found_id = False
-        cnn_fail = False 
-        
-        cnn_results = []
-        roi_pass_list = [] 
-        text_langs = []
-        yolo_detections = []
-        confidence_scores = []
-        cnn_button_status_map = {} 
-        button_classes = ['Home', 'Back', 'ID', 'Stat']
+    cnn_results = []
+    roi_pass_list = [] 
+    text_langs = []
+    yolo_detections = []
+    confidence_scores = []
+    cnn_button_status_map = {} 
+    overlay = []
+    
+    for (detection, (x1, y1, x2, y2)), prediction in zip(rois, roi_predictions):
+        cls_name = detection["class"]
+        bbox = detection["bbox"]
+        conf = detection["confidence"]
         
-        start_time_cnn_total = time.time() 
+        # --- 플래그 설정 ---
+        base_cls = cls_name.replace('Btn_', '')
+        if base_cls == 'Home': found_home = True
+        elif base_cls == 'Back': found_back = True
+        elif base_cls == 'ID': found_id = True
+        elif base_cls == 'Stat': found_stat = True
+        elif cls_name in ['Monitor_Small', 'Monitor_Big', 'Monitor']: found_monitor = True
 
-        for detection in yolo_results.get("detections", []):
-            cls_name = detection["class"]
-            bbox = detection["bbox"]
-            conf = detection["confidence"]
-            
-            x1, y1, x2, y2 = map(int, bbox)
-            if x1 >= x2 or y1 >= y2: continue
-                
-            # PIL 이미지는 원본 (수정 전)에서 Crop을 수행
-            # CNNModel에 전달할 때는 명도 조절이 필요없다고 가정 (모델이 Robust하다고 가정)
-            crop_pil = pil_img.crop((x1, y1, x2, y2)) 
-            
-            # --- 플래그 설정 ---
-            base_cls = cls_name.replace('Btn_', '')
-            if base_cls == 'Home': found_home = True
-            elif base_cls == 'Back': found_back = True
-            elif base_cls == 'ID': found_id = True
-            elif base_cls == 'Stat': found_stat = True
-            elif cls_name in ['Monitor_Small', 'Monitor_Big', 'Monitor']: found_monitor = True
-
-            # --- 3. CNN 수행 (버튼 & 텍스트) ---
-            current_status = None
-            prob = 0.0
+        current_status = None
+        prob = 0.0
+        
+        if base_cls in BUTTON_CLASSES:
+            prob, is_pass = prediction
+            current_status = "Pass" if is_pass else "Fail"
             
-            if base_cls in button_classes:
-                prob, is_pass = cnn_model.predict_roi(crop_pil.convert("L"), cls_name)
-                current_status = "Pass" if is_pass else "Fail"
-                
-                roi_pass_list.append(is_pass) 
-                if not is_pass:
-                    cnn_fail = True
-                
-                # CNN 상태 맵 업데이트
-                if base_cls in cnn_button_status_map and cnn_button_status_map[base_cls] == "Fail":
-                    pass
-                else:
-                    cnn_button_status_map[base_cls] = current_status
-                
-                cnn_results.append({
-                    "class": base_cls,
-                    "bbox": bbox,
-                    "probability": round(prob, 4), 
-                    "status": current_status
-                })
-                confidence_scores.append(prob * 100)
-
-            elif base_cls == 'Text':
-                prob, lang = cnn_model.predict_roi(crop_pil.convert("L"), cls_name)
-                current_status = lang if isinstance(lang, str) else "Unknown"
-                text_langs.append(current_status)
-                confidence_scores.append(prob * 100)
+            roi_pass_list.append(is_pass) 
+            if not is_pass:
+                cnn_fail = True
             
-            # --- 4. 시각화 데이터 준비 (명도/조도 적용된 draw_img에 그리기) ---
-            final_label = f"{base_cls} {current_status or ''}".strip()
+            # CNN 상태 맵 업데이트
+            if base_cls in cnn_button_status_map and cnn_button_status_map[base_cls] == "Fail":
+                pass
+            else:
+                cnn_button_status_map[base_cls] = current_status
             
-            # 색상 결정
-            if current_status == 'Pass': color = (0, 255, 0) # Green (BGR)
-            elif current_status == 'Fail': color = (0, 0, 255) # Red (BGR)
-            else: color = (0, 200, 255) # Default (Cyan/Yellow) (BGR)
-
-            # BBox 그리기
-            cv2.rectangle(draw_img, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(draw_img, final_label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2, cv2.LINE_AA)
-            cv2.putText(draw_img, final_label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
-
-            yolo_detections.append({
-                "class": base_cls, "bbox": bbox, "confidence": round(conf, 4)
+            cnn_results.append({
+                "class": base_cls,
+                "bbox": bbox,
+                "probability": round(prob, 4), 
+                "status": current_status
             })
-            confidence_scores.append(conf * 100)
-            
-        time_cnn_total = time.time() - start_time_cnn_total
-        print(f"[TIME CHECK] CNN 총 추론 시간: {time_cnn_total:.4f} 초")
+            confidence_scores.append(prob * 100)
 
-        # --- 5. 7가지 규칙 기반 판정 시작 ---
-        prod, model_err = classify_model(found_back, found_id, text_langs)
-        fails = []
+        elif base_cls == 'Text':
+            prob, lang = prediction
+            current_status = lang if isinstance(lang, str) else "Unknown"
+            text_langs.append(current_status)
+            confidence_scores.append(prob * 100)
+        
+        # --- 4. 시각화 데이터 준비 (그리기는 판정 후 필요할 때만) ---
+        final_label = f"{base_cls} {current_status or ''}".strip()
+        
+        # 색상 결정
+        if current_status == 'Pass': color = (0, 255, 0) # Green (BGR)
+        elif current_status == 'Fail': color = (0, 0, 255) # Red (BGR)
+        else: color = (0, 200, 255) # Default (Cyan/Yellow) (BGR)
 
-        # 1. 필수 요소 확인 (Rule A)
-        if not found_home: fails.append("Home Missing")
-        if not found_stat: fails.append("Stat Missing")
-        if not found_monitor: fails.append("Monitor Missing")
+        overlay.append({"bbox": [x1, y1, x2, y2], "label": final_label, "color": list(color)})
 
-        # 2. Back XOR ID (Rule B)
-        button_type = None
-        current_id_back_status = "Fail"
-        
-        if found_back and found_id: 
-            fails.append("Back and ID Both Present")
-        elif (not found_back) and (not found_id):
-            fails.append("Back/ID Missing")
-        elif found_back:
-            button_type = "Back"
-        elif found_id:
-            button_type = "ID"
-
-        # 3. Rule C: CNN Fail을 최종 Fail 목록에 명시적으로 추가 
-        if button_type is not None:
-            cnn_status = cnn_button_status_map.get(button_type, 'Fail')
+        yolo_detections.append({
+            "class": base_cls, "bbox": bbox, "confidence": round(conf, 4)
+        })
+        confidence_scores.append(conf * 100)
         
-            if cnn_status == "Pass" and prod is not None:
-                current_id_back_status = "Pass"
-                
-            if cnn_status == "Fail":
-                fails.append(f"{button_type} Button CNN Fail")
-            if cnn_button_status_map.get('Stat') == "Fail":
-                fails.append("Stat Button CNN Fail")
+    # --- 5. 7가지 규칙 기반 판정 시작 ---
+    prod, model_err = classify_model(found_back, found_id, text_langs)
+    fails = []
+
+    # 1. 필수 요소 확인 (Rule A)
+    if not found_home: fails.append("Home Missing")
+    if not found_stat: fails.append("Stat Missing")
+    if not found_monitor: fails.append("Monitor Missing")
+
+    # 2. Back XOR ID (Rule B)
+    button_type = None
+    current_id_back_status = "Fail"
+    
+    if found_back and found_id: 
+        fails.append("Back and ID Both Present")
+    elif (not found_back) and (not found_id):
+        fails.append("Back/ID Missing")
+    elif found_back:
+        button_type = "Back"
+    elif found_id:
+        button_type = "ID"
+
+    # 3. Rule C: CNN Fail을 최종 Fail 목록에 명시적으로 추가 
+    if button_type is not None:
+        cnn_status = cnn_button_status_map.get(button_type, 'Fail')
+    
+        if cnn_status == "Pass" and prod is not None:
+            current_id_back_status = "Pass"
             
-        # 4. 전체 CNN Fail 플래그 기반 Rule C 추가 (다른 버튼 포함)
-        if cnn_fail: 
-            if "Rule C: General Button Failure" not in fails:
-                 pass 
-                        
-        # 5. Text 조건 (Rule D)
-        text_count = len(text_langs)
-        if not (text_count == 0 or text_count >= 3): fails.append(f"Text Count Invalid (N={text_count})")
-
-        # 6. 모델 분류 결과 (Rule E)
-        if prod is None: fails.append(model_err)
-        
-        # 7. 최종 판정
-        is_pass = (len(fails) == 0)
-        final_status = "PASS" if is_pass else "FAIL" 
-        reason = "; ".join(fails) if fails else None
-        
-        # --- 7. 최종 결과 이미지에 요약 정보 추가 (명도/조도 적용된 draw_img에 그리기) ---
+        if cnn_status == "Fail":
+            fails.append(f"{button_type} Button CNN Fail")
+        if cnn_button_status_map.get('Stat') == "Fail":
+            fails.append("Stat Button CNN Fail")
         
-        # 제품명 표시 
-        title = prod if prod else "UNKNOWN"
-        cv2.putText(draw_img, title, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 0), 2) # BGR: Cyan/Yellow
-
-        # 최종 상태 표시
-        if is_pass:
-            status_color = (0, 255, 0) # Green
-            cv2.putText(draw_img, "PASS", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 1.0, status_color, 3)
-        else:
-            status_color = (0, 0, 255) # Red
-            cv2.putText(draw_img, "FAIL", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 1.0, status_color, 3)
-            
-            # 실패 사유 목록 출력
-            y = 140
-            for r in fails:
-                cv2.putText(draw_img, r, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
-                y += 30
+    # 4. 전체 CNN Fail 플래그 기반 Rule C 추가 (다른 버튼 포함)
+    if cnn_fail: 
+        if "Rule C: General Button Failure" not in fails:
+             pass 
+                    
+    # 5. Text 조건 (Rule D)
+    text_count = len(text_langs)
+    if not (text_count == 0 or text_count >= 3): fails.append(f"Text Count Invalid (N={text_count})")
 
-        # --- 8. Base64 인코딩 및 결과 반환 ---
-        
-        _, buffer = cv2.imencode('.jpg', draw_img)
-        annotated_image_str = base64.b64encode(buffer).decode('utf-8')
-
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
-
-        final_result = {
-            "status": final_status,
-            "reason": reason,
-            "confidence": round(avg_confidence, 2),
-            "details": {
-                "product_model": prod,
-                "language": Counter(text_langs).most_common(1)[0][0] if text_langs else None,
-                "model_status": "Pass" if prod else "Fail",
-                "text_count": text_count,
-                
-                # 이전 V1 코드를 참고하여 세분화된 상태 재구성
-                "home_status": cnn_button_status_map.get('Home', 'Fail'),
-                "id_back_status": cnn_button_status_map.get('ID', 'Fail') if found_id else cnn_button_status_map.get('Back', 'Fail'),
-                "status_status": cnn_button_status_map.get('Stat', 'Fail'),
-                "screen_status": "Pass" if found_monitor else "Fail",
-                
-                "yolo_detections": yolo_detections,
-                "cnn_results": cnn_results,
-                "annotated_image": annotated_image_str
-            }
+    # 6. 모델 분류 결과 (Rule E)
+    if prod is None: fails.append(model_err)
+    
+    # 7. 최종 판정
+    is_pass = (len(fails) == 0)
+    final_status = "PASS" if is_pass else "FAIL" 
+    reason = "; ".join(fails) if fails else None
+    
+    # --- 7. 최종 결과 이미지 생성 및 Base64 인코딩 (render가 none이면 생략) ---
+    # 명도/조도 보정으로 새로 만든 버퍼면 그대로, 원본 버퍼면 복사해서 그리기
+    annotated_image_str = render_annotated_image(
+        processed_img_bgr, overlay, prod if prod else "UNKNOWN", is_pass, fails,
+        render=render, jpeg_quality=jpeg_quality, max_dim=max_dim, in_place=owns_processed
+    )
+
+    avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
+
+    final_result = {
+        "status": final_status,
+        "reason": reason,
+        "confidence": round(avg_confidence, 2),
+        "details": {
+            "product_model": prod,
+            "language": Counter(text_langs).most_common(1)[0][0] if text_langs else None,
+            "model_status": "Pass" if prod else "Fail",
+            "text_count": text_count,
+            
+            # 이전 V1 코드를 참고하여 세분화된 상태 재구성
+            "home_status": cnn_button_status_map.get('Home', 'Fail'),
+            "id_back_status": cnn_button_status_map.get('ID', 'Fail') if found_id else cnn_button_status_map.get('Back', 'Fail'),
+            "status_status": cnn_button_status_map.get('Stat', 'Fail'),
+            "screen_status": "Pass" if found_monitor else "Fail",
+            
+            "yolo_detections": yolo_detections,
+            "cnn_results": cnn_results,
+            # 클라이언트가 원본 이미지 위에 직접 그릴 수 있도록 BBox/라벨/색상(BGR) 전달
+            "overlay": overlay,
+            "annotated_image": annotated_image_str
         }
-        return convert_numpy_types(final_result)
-        
+    }
+    return convert_numpy_types(final_result)
+
+
+def _error_result(e: Exception) -> Dict:
+    error_result = {
+        "status": "FAIL",
+        "reason": f"분석 중 오류 발생: {type(e).__name__} - {str(e)}",
+        "confidence": 0,
+        "details": {}
+    }
+    return convert_numpy_types(error_result)
+
+# ============================================================
+# 이미지 분석 메인 함수
+# ============================================================
+def analyze_image(image: np.ndarray, 
+    # 💡 [수정] 명도/조도 인수를 받도록 시그니처 수정
+    brightness: float = 0.0, 
+    exposure_gain: float = 1.0,
+    render: str = RENDER_FULL,
+    jpeg_quality: Optional[int] = None,
+    max_dim: Optional[int] = None) -> Dict:
+    """
+    이미지 분석 메인 함수: 7단계 복합 검사 파이프라인 수행 및 결과 JSON 반환
+    (image는 BGR 배열, render/jpeg_quality/max_dim은 결과 이미지 렌더링 옵션)
+    """
+    options = {
+        "brightness": brightness, "exposure_gain": exposure_gain,
+        "render": render, "jpeg_quality": jpeg_quality, "max_dim": max_dim
+    }
+    return analyze_images([image], [options])[0]
+
+
+def analyze_images(images: List[np.ndarray], options: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    여러 이미지를 한 번에 분석 (YOLO predict 1회 + 전체 ROI에 대한 CNN 배치 추론 1회)
+
+    Args:
+        images: 분석할 BGR 이미지 리스트 (cv2.imdecode 결과와 같은 채널 순서)
+        options: 이미지별 인수 ({"brightness": ..., "exposure_gain": ...,
+                 "render": ..., "jpeg_quality": ..., "max_dim": ..., "track_key": ...}), 생략 시 기본값
+                 track_key를 주면 실시간 모드로 같은 키의 이전 프레임 결과를 재사용하고
+                 결과에 다수결 안정화 판정("stable")을 추가
+
+    Returns:
+        이미지 순서대로 analyze_image와 같은 형식의 결과 리스트
+        (각 결과의 "timings"에 단계별 소요 시간(초) 기록, yolo/cnn은 배치 전체 시간)
+    """
+    if yolo_model is None or cnn_model is None:
+        initialize_models()
+        if cnn_model is None:
+            raise RuntimeError("CNN/Text 모델이 로드되지 않았습니다.")
+        if yolo_model is None:
+            raise RuntimeError("YOLO 모델이 로드되지 않았습니다.")
+
+    options = options or [{} for _ in images]
+    results: List[Optional[Dict]] = [None] * len(images)
+    prepared = [None] * len(images)
+    timings = [{} for _ in images]
+
+    # 0. 이미지별 전처리 (실패한 이미지만 오류 결과 처리)
+    for i, (image, opts) in enumerate(zip(images, options)):
+        start_time = time.perf_counter()
+        try:
+            prepared[i] = _preprocess_image(
+                image,
+                brightness=opts.get("brightness", 0.0),
+                exposure_gain=opts.get("exposure_gain", 1.0)
+            )
+        except Exception as e:
+            traceback.print_exc()
+            results[i] = _error_result(e)
+        timings[i]["preprocess_sec"] = time.perf_counter() - start_time
+
+    valid = [i for i in range(len(images)) if results[i] is None]
+    if not valid:
+        return results
+
+    # 실시간 모드 (track_key 지정) 이미지의 프레임 간 추적 상태
+    trackers = {
+        i: tracking.get_tracker(options[i]["track_key"]) for i in valid if options[i].get("track_key")
+    }
+
+    try:
+        # 1. YOLO 객체 검출 (배치, 화면 변화가 없는 실시간 프레임은 키프레임 결과 재사용)
+        start_time_yolo = time.perf_counter()
+        yolo_outputs = {}
+        for i, tracker in trackers.items():
+            cached = tracker.cached_detections(
+                prepared[i][0], (options[i].get("brightness", 0.0), options[i].get("exposure_gain", 1.0))
+            )
+            if cached is not None:
+                yolo_outputs[i] = cached
+        yolo_reused = set(yolo_outputs)
+
+        to_detect = [i for i in valid if i not in yolo_reused]
+        if to_detect:
+            for i, output in zip(to_detect, yolo_model.detect_batch([prepared[i][2] for i in to_detect])):
+                yolo_outputs[i] = output
+                if i in trackers:
+                    trackers[i].update_detections(output)
+        time_yolo = time.perf_counter() - start_time_yolo
+
+        start_time_cnn_total = time.perf_counter() 
+
+        # 2. 모든 이미지의 ROI를 모아서 CNN 배치 수행 (버튼 & 텍스트)
+        #    실시간 프레임은 이전 트랙과 Crop이 같은 ROI의 예측을 재사용하고 나머지만 추론
+        all_crops = []
+        all_conditions = []
+        per_image = {}
+        for i in valid:
+            rois, roi_crops, roi_conditions, roi_indices = _collect_rois(
+                yolo_outputs[i].get("detections", []), prepared[i][0]
+            )
+            plans = trackers[i].match_rois(rois, roi_crops, roi_indices) if i in trackers else None
+            needed = [k for k in range(len(roi_crops)) if plans is None or plans[k]["prediction"] is None]
+            per_image[i] = (rois, roi_indices, plans, needed, len(all_crops))
+            all_crops.extend(roi_crops[k] for k in needed)
+            all_conditions.extend(roi_conditions[k] for k in needed)
+
+        predictions = cnn_model.predict_rois(all_crops, all_conditions)
+
+        time_cnn_total = time.perf_counter() - start_time_cnn_total
+        print(f"[TIME CHECK] CNN 총 추론 시간: {time_cnn_total:.4f} 초 (이미지 {len(valid)}장, ROI {len(all_crops)}개)")
+
+        # 3. 이미지별 판정 및 결과 생성
+        for i in valid:
+            timings[i].update({
+                "yolo_sec": 0.0 if i in yolo_reused else time_yolo,
+                "cnn_sec": time_cnn_total,
+                "batch_size": len(valid)
+            })
+            start_time = time.perf_counter()
+            rois, roi_indices, plans, needed, offset = per_image[i]
+            crop_predictions = [plan["prediction"] for plan in plans] if plans is not None else [None] * len(roi_indices)
+            for j, k in enumerate(needed):
+                crop_predictions[k] = predictions[offset + j]
+            roi_predictions = [None] * len(rois)
+            for k, idx in enumerate(roi_indices):
+                roi_predictions[idx] = crop_predictions[k]
+            try:
+                results[i] = _build_result(
+                    rois, roi_predictions, prepared[i][1],
+                    owns_processed=prepared[i][3],
+                    render=options[i].get("render", RENDER_FULL),
+                    jpeg_quality=options[i].get("jpeg_quality"),
+                    max_dim=options[i].get("max_dim")
+                )
+                if i in trackers:
+                    tracker = trackers[i]
+                    track_ids = tracker.update_tracks(plans, crop_predictions)
+                    # 최근 프레임 다수결로 안정화한 판정
+                    results[i]["stable"] = tracker.vote(results[i]["status"], results[i]["details"]["product_model"])
+                    results[i]["details"]["tracking"] = {
+                        "yolo_reused": i in yolo_reused,
+                        "cnn_reused": len(roi_indices) - len(needed),
+                        "cnn_run": len(needed),
+                        "track_ids": track_ids
+                    }
+            except Exception as e:
+                traceback.print_exc()
+                results[i] = _error_result(e)
+            timings[i]["postprocess_sec"] = time.perf_counter() - start_time
+
     except Exception as e:
         traceback.print_exc()
-        error_result = {
-            "status": "FAIL",
-            "reason": f"분석 중 오류 발생: {type(e).__name__} - {str(e)}",
-            "confidence": 0,
-            "details": {}
-        }
-        return convert_numpy_types(error_result)
+        for i in valid:
+            if results[i] is None:
+                results[i] = _error_result(e)
+
+    for result, timing in zip(results, timings):
+        result["timings"] = {k: round(v, 4) if isinstance(v, float) else v for k, v in timing.items()}
+    return results
 
 
 def analyze_frame(image: np.ndarray, 
     brightness: float = 0.0, 
-    exposure_gain: float = 1.0) -> Dict: 
+    exposure_gain: float = 1.0,
+    **render_options) -> Dict: 
     """
     실시간 프레임 분석 (analyze_image에 인수를 전달)
     """
-    return analyze_image(image, brightness=brightness, exposure_gain=exposure_gain)
\ No newline at end of file
+    return analyze_image(image, brightness=brightness, exposure_gain=exposure_gain, **render_options)
+
+# ============================================================
+# 워밍업 (첫 요청의 초기화 비용을 서버 준비 단계에서 미리 지불)
+# ============================================================
+# 측정 반복 횟수 (0이면 워밍업 생략), 첫 실행을 cold, 마지막 실행을 warm으로 기록
+WARMUP_RUNS = int(os.getenv("WARMUP_RUNS", "2"))
+# YOLO 배치 크기 (스케줄러가 묶는 이미지 수)와 CNN ROI 배치 크기 (이미지당 ROI 6~8개 기준)
+WARMUP_YOLO_BATCHES = [int(v) for v in os.getenv("WARMUP_YOLO_BATCHES", "1,4").split(",") if v.strip()]
+WARMUP_ROI_BATCHES = [int(v) for v in os.getenv("WARMUP_ROI_BATCHES", "1,8,32").split(",") if v.strip()]
+# 더미 프레임 크기 (가로x세로, 라인 카메라 해상도)
+WARMUP_FRAME_SIZE = tuple(int(v) for v in os.getenv("WARMUP_FRAME_SIZE", "1920x1080").lower().split("x"))
+
+
+def _time_runs(fn, runs: int) -> Dict:
+    """fn을 runs번 실행하여 첫 실행 (cold) / 마지막 실행 (warm) 시간 (ms)"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"cold_ms": round(times[0], 2), "warm_ms": round(times[-1], 2)}
+
+
+def warmup_models(runs: Optional[int] = None) -> Dict:
+    """
+    더미 입력으로 YOLO (imgsz=YOLO_IMGSZ, 배치별), CNN (ROI 배치별), 전체 파이프라인을 실행
+    ultralytics fuse/predictor 준비, torch 커널 선택, 메모리 할당을 첫 실제 요청 전에 끝냄
+
+    Returns:
+        단계별 cold/warm 지연 시간 (ms)과 전체 소요 시간 (초)
+    """
+    runs = WARMUP_RUNS if runs is None else runs
+    if runs <= 0:
+        return {"skipped": True}
+    if yolo_model is None or cnn_model is None:
+        raise RuntimeError("워밍업 전에 모델이 로드되어야 합니다.")
+
+    started = time.perf_counter()
+    width, height = WARMUP_FRAME_SIZE
+    rng = np.random.default_rng(0)
+    frame_bgr = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+
+    report = {"runs": runs, "frame_size": [width, height], "yolo": {}, "cnn": {}}
+    for batch_size in WARMUP_YOLO_BATCHES:
+        images = [frame_rgb] * batch_size
+        report["yolo"][f"batch_{batch_size}"] = _time_runs(lambda: yolo_model.detect_batch(images), runs)
+
+    # 버튼/텍스트 헤드를 모두 거치도록 조건을 섞은 ROI
+    crop = Image.fromarray(rng.integers(0, 256, size=(64, 160), dtype=np.uint8))
+    for batch_size in WARMUP_ROI_BATCHES:
+        crops = [crop] * batch_size
+        conditions = [("Btn_Home", "Text")[k % 2] for k in range(batch_size)]
+        report["cnn"][f"batch_{batch_size}"] = _time_runs(lambda: cnn_model.predict_rois(crops, conditions), runs)
+
+    # 전처리 → 검출 → 판정 → 렌더링까지 (실제 요청 경로)
+    report["pipeline"] = _time_runs(
+        lambda: analyze_images([frame_bgr], [{"brightness": 10.0, "exposure_gain": 1.1, "render": RENDER_THUMBNAIL}]),
+        runs
+    )
+    report["total_sec"] = round(time.perf_counter() - started, 4)
+    print(f"모델 워밍업 완료 ({report['total_sec']:.2f}s): "
+          f"YOLO {report['yolo']}, CNN {report['cnn']}, pipeline {report['pipeline']}")
+    return report
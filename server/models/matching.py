@@ -0,0 +1,30 @@
+"""
+검출 결과 비교 헬퍼 (프레임 간 추적 / 제품 단위 통합 공용)
+ML 라이브러리 없이 import되어야 함 (API 프로세스의 live.units에서 사용)
+"""
+
+from collections import Counter
+from typing import List
+
+
+def iou(box_a, box_b) -> float:
+    """두 BBox (x1, y1, x2, y2)의 IoU"""
+    x1 = max(box_a[0], box_b[0])
+    y1 = max(box_a[1], box_b[1])
+    x2 = min(box_a[2], box_b[2])
+    y2 = min(box_a[3], box_b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    if inter == 0:
+        return 0.0
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def majority(values: List):
+    """최빈값 (동률이면 더 최근 값)"""
+    counts = Counter(values)
+    best = max(counts.values())
+    for value in reversed(values):
+        if counts[value] == best:
+            return value
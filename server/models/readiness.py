@@ -0,0 +1,88 @@
+"""
+모델 준비 상태
+서버는 모델 로드를 기다리지 않고 바로 요청을 받고, 모델은 백그라운드 작업에서 로드
+(상태는 /api/model_status와 /health로 확인, 준비 전 분석 요청은 ModelNotReadyError)
+
+pending → loading (import/모델 로드) → warming (더미 추론) → ready, 실패 시 failed
+"""
+
+import time
+from typing import Dict, Optional
+
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_WARMING = "warming"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class ModelNotReadyError(RuntimeError):
+    """모델 로드가 끝나지 않았거나 실패한 상태에서 분석 요청"""
+
+
+class ModelReadiness:
+    """백그라운드 모델 로드 진행 상태 (단계별 소요 시간 포함)"""
+
+    def __init__(self):
+        self.state = STATE_PENDING
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        # 워밍업 단계별 cold/warm 지연 시간 (inference.warmup_models 결과)
+        self.warmup: Optional[Dict] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY
+
+    def start(self):
+        self.state = STATE_LOADING
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.stages = {}
+        self.warmup = None
+
+    def record(self, stage: str, seconds: float):
+        """로드 단계 소요 시간 기록 (import_sec, models_sec, workers_sec 등)"""
+        self.stages[stage] = round(seconds, 4)
+
+    def set_warming(self):
+        self.state = STATE_WARMING
+
+    def set_ready(self):
+        self.state = STATE_READY
+        self.finished_at = time.time()
+
+    def set_failed(self, error: str):
+        self.state = STATE_FAILED
+        self.error = error
+        self.finished_at = time.time()
+
+    def require_ready(self):
+        """분석 요청 전에 호출 (준비 전이면 ModelNotReadyError)"""
+        if self.state == STATE_READY:
+            return
+        if self.state == STATE_FAILED:
+            raise ModelNotReadyError(f"모델 로드에 실패했습니다: {self.error}")
+        if self.state == STATE_WARMING:
+            raise ModelNotReadyError("모델 워밍업 중입니다. 잠시 후 다시 시도하세요.")
+        raise ModelNotReadyError("모델을 로드하는 중입니다. 잠시 후 다시 시도하세요.")
+
+    def get_info(self) -> Dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 4)
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "elapsed_sec": elapsed,
+            "stages": dict(self.stages),
+            "warmup": self.warmup,
+        }
+
+
+# 서버 전역 모델 준비 상태
+model_readiness = ModelReadiness()
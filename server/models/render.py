@@ -0,0 +1,28 @@
+"""
+결과 이미지 렌더링 옵션
+(ML 라이브러리 없이 API 계층에서 옵션을 검사할 수 있도록 inference와 분리)
+
+- none: 이미지를 그리거나 인코딩하지 않음 (판정 결과와 overlay 좌표만 반환)
+- thumbnail: 긴 변을 max_dim (기본 THUMBNAIL_MAX_DIM)으로 줄인 뒤 그리기
+- full: 원본 해상도로 그리기 (max_dim을 주면 그 크기로 제한)
+"""
+
+from typing import Optional
+
+RENDER_NONE = "none"
+RENDER_THUMBNAIL = "thumbnail"
+RENDER_FULL = "full"
+RENDER_MODES = (RENDER_NONE, RENDER_THUMBNAIL, RENDER_FULL)
+THUMBNAIL_MAX_DIM = 480
+DEFAULT_JPEG_QUALITY = 90
+
+
+def validate_render_options(render: str = RENDER_FULL, jpeg_quality: Optional[int] = None,
+    max_dim: Optional[int] = None):
+    """렌더링 옵션 검사 (잘못된 값이면 ValueError)"""
+    if render not in RENDER_MODES:
+        raise ValueError(f"지원하지 않는 render 모드입니다: {render} ({'/'.join(RENDER_MODES)})")
+    if jpeg_quality is not None and not 1 <= jpeg_quality <= 100:
+        raise ValueError(f"jpeg_quality는 1~100 사이여야 합니다: {jpeg_quality}")
+    if max_dim is not None and max_dim <= 0:
+        raise ValueError(f"max_dim은 0보다 커야 합니다: {max_dim}")
@@ -0,0 +1,274 @@
+"""
+분석 결과 캐시
+같은 이미지 바이트 + 같은 분석 옵션 + 같은 모델 파일이면 이전 판정을 그대로 반환
+(메모리 LRU + 선택적 디스크 계층, 모델 파일이 바뀌면 전체 무효화)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# 캐시 키에 포함하는 분석 옵션 (결과에 영향을 주는 값)
+CACHE_OPTION_KEYS = ("brightness", "exposure_gain", "render", "jpeg_quality", "max_dim")
+
+# 디스크 계층에서 현재 모델 버전을 기록하는 파일
+_MODEL_VERSION_FILE = "MODEL_VERSION"
+
+
+def model_fingerprint(paths: List[str], tag: str = "") -> str:
+    """
+    모델 파일 (경로, 크기, 수정 시각) 기반 버전 문자열 (파일이 바뀌면 달라짐)
+    tag: 파일 외에 결과에 영향을 주는 설정 (백엔드 / 양자화 모드 등)
+    """
+    digest = hashlib.sha256(tag.encode())
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    분석 결과 LRU 캐시
+
+    - 메모리: 최근 사용 순으로 max_entries / max_bytes까지 보관 (결과는 JSON 문자열로 저장)
+    - 디스크: disk_dir를 지정하면 메모리에서 밀려난 결과도 파일로 보관 (disk_max_bytes까지)
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024,
+                 disk_dir: Optional[str] = None, disk_max_bytes: int = 1024 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._model_paths: List[str] = []
+        self._model_tag = ""
+        self._model_version: Optional[str] = None
+
+        # 메트릭
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def set_model_files(self, paths: List[str], tag: str = ""):
+        """버전 확인에 사용할 모델 파일 경로와 추론 설정 태그 설정 (서버 시작 시 호출)"""
+        with self._lock:
+            self._model_paths = list(paths)
+            self._model_tag = tag
+            self._check_model_version()
+
+    def _check_model_version(self) -> str:
+        """모델 파일이 바뀌었으면 캐시 전체 무효화 (lock 안에서 호출)"""
+        version = model_fingerprint(self._model_paths, self._model_tag)
+        if version == self._model_version:
+            return version
+
+        if self._model_version is not None:
+            self.invalidations += 1
+            print(f"모델 파일 변경 감지: 결과 캐시 초기화 ({self._model_version} → {version})")
+        self._entries.clear()
+        self._bytes = 0
+        self._model_version = version
+        if self.disk_dir:
+            self._reset_disk(version)
+        return version
+
+    def _reset_disk(self, version: str, force: bool = False):
+        """디스크 계층이 다른 모델 버전이면 (force면 항상) 비우고, 같으면 현재 사용량 계산"""
+        version_path = os.path.join(self.disk_dir, _MODEL_VERSION_FILE)
+        stored = None
+        if os.path.exists(version_path):
+            with open(version_path, "r") as f:
+                stored = f.read().strip()
+        if force or stored != version:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+            os.makedirs(self.disk_dir, exist_ok=True)
+            with open(version_path, "w") as f:
+                f.write(version)
+        self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def make_key(self, contents: bytes, options: Optional[Dict] = None) -> str:
+        """이미지 바이트 해시 + 분석 옵션 + 모델 버전으로 캐시 키 생성"""
+        options = options or {}
+        params = json.dumps({key: options.get(key) for key in CACHE_OPTION_KEYS}, sort_keys=True)
+        digest = hashlib.sha256(contents)
+        digest.update(params.encode())
+        digest.update((self._model_version or "").encode())
+        return digest.hexdigest()
+
+    def lookup(self, contents: bytes, options: Optional[Dict] = None) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        캐시 조회
+
+        Returns:
+            (캐시 키, 결과) - 결과가 없으면 None (키는 put에 사용), 캐시 비활성이면 (None, None)
+        """
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            self._check_model_version()
+        key = self.make_key(contents, options)
+
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return key, json.loads(encoded)
+
+        encoded = self._read_disk(key)
+        with self._lock:
+            if encoded is None:
+                self.misses += 1
+                return key, None
+            self.disk_hits += 1
+            self._store_memory(key, encoded)
+        return key, json.loads(encoded)
+
+    def put(self, key: Optional[str], result: Dict):
+        """결과 저장 (key가 None이면 무시)"""
+        if key is None or not self.enabled:
+            return
+        encoded = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._store_memory(key, encoded)
+
+    def _store_memory(self, key: str, encoded: str):
+        """메모리 계층에 저장하고 한도를 넘으면 오래된 항목부터 디스크로 내림 (lock 안에서 호출)"""
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        self._entries[key] = encoded
+        self._bytes += len(encoded)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            old_key, old_encoded = self._entries.popitem(last=False)
+            self._bytes -= len(old_encoded)
+            self.evictions += 1
+            self._write_disk(old_key, old_encoded)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                encoded = f.read()
+        except OSError:
+            return None
+        # 최근 사용 파일이 나중에 정리되도록 수정 시각 갱신
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return encoded
+
+    def _write_disk(self, key: str, encoded: str):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 스레드마다 고유한 임시 파일에 쓴 뒤 교체
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[WARN] 결과 캐시 디스크 저장 실패: {e}")
+            return
+        self._disk_bytes += len(encoded.encode("utf-8"))
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _disk_files(self):
+        """(경로, 크기, 수정 시각) 목록"""
+        files = []
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return files
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict_disk(self):
+        """디스크 사용량이 한도의 90% 이하가 될 때까지 오래된 파일부터 삭제"""
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def clear(self):
+        """캐시 전체 삭제 (메모리 + 디스크)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.disk_dir:
+                self._reset_disk(self._check_model_version(), force=True)
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "model_version": self._model_version,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+                "disk_bytes": self._disk_bytes if self.disk_dir else 0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# 서버 전역 결과 캐시 (환경변수로 설정, RESULT_CACHE_SIZE=0이면 비활성)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    disk_dir=os.getenv("RESULT_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("RESULT_CACHE_DISK_MAX_MB", "1024")) * 1024 * 1024,
+)
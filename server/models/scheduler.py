@@ -0,0 +1,189 @@
+"""
+요청 간 마이크로 배치 추론 스케줄러
+여러 요청의 이미지를 짧은 시간 창(max_wait) 안에서 모아 한 번의 analyze_images 호출로 처리
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .executor import InferenceExecutor, inference_executor
+
+
+class InferenceScheduler:
+    """요청 큐를 모아 배치 추론 후 각 요청의 Future에 결과를 전달하는 스케줄러"""
+
+    def __init__(self, executor: InferenceExecutor, max_batch_size: int = 8, max_wait_ms: float = 10.0):
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # 큐 대기 중인 get (배치 창 시간 초과 후에도 유지하여 꺼낸 요청을 잃지 않음)
+        self._getter: Optional[asyncio.Future] = None
+        self._in_flight: set = set()
+        # 동시에 실행 중인 배치 수는 워커 수로 제한
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # 메트릭
+        self.total_requests = 0
+        self.total_batches = 0
+        self.last_batch_size = 0
+        self.batch_size_histogram = Counter()
+        self.total_queue_wait = 0.0
+        self.total_batch_time = 0.0
+
+    async def start(self):
+        """배치 루프 시작 (서버 시작 시 호출)"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.executor.workers)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """배치 루프 종료 (대기 중인 요청은 취소)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._getter is not None:
+            getter, self._getter = self._getter, None
+            if getter.done() and not getter.cancelled():
+                # 꺼냈지만 배치에 넣지 못한 요청
+                getter.result()[2].cancel()
+            else:
+                getter.cancel()
+        for task in list(self._in_flight):
+            task.cancel()
+        while not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def submit(self, image, **options) -> Dict:
+        """
+        이미지 한 장 (BGR numpy 배열)을 큐에 넣고 분석 결과를 기다림
+
+        options는 analyze_images의 이미지별 인수 (brightness, exposure_gain, render, jpeg_quality, max_dim)
+        """
+        if self._task is None:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self.total_requests += 1
+        await self._queue.put((image, options, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # 빈 워커가 생길 때까지 대기 (그동안 들어온 요청은 큐에 쌓여 다음 배치로 묶임)
+            await self._slots.acquire()
+
+            # 첫 요청이 올 때까지 대기 후, max_wait 동안 max_batch_size까지 모음
+            try:
+                batch = [await self._next_item()]
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                item = await self._next_item(max(0.0, deadline - loop.time()))
+                if item is None:
+                    break
+                batch.append(item)
+
+            task = asyncio.create_task(self._execute(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _next_item(self, timeout: Optional[float] = None):
+        """
+        큐에서 요청 하나를 꺼냄 (timeout 안에 없으면 None)
+
+        asyncio.wait_for(queue.get())는 시간 초과와 get 완료가 겹치면 꺼낸 요청을 버릴 수 있으므로
+        get 태스크를 시간 초과 후에도 유지하고 다음 호출에서 이어서 기다림
+        """
+        if self._getter is None:
+            try:
+                return self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                self._getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            return None
+        getter, self._getter = self._getter, None
+        return getter.result()
+
+    async def _execute(self, batch: List):
+        try:
+            await self._execute_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _execute_batch(self, batch: List):
+        # 이미 취소된 요청 (클라이언트 연결 종료 등)은 제외
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        for _, _, _, enqueued in batch:
+            self.total_queue_wait += started - enqueued
+
+        images = [item[0] for item in batch]
+        options = [item[1] for item in batch]
+        try:
+            results = await self.executor.analyze(images, options)
+        except asyncio.CancelledError:
+            # 스케줄러 종료로 취소된 배치
+            for _, _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, _, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        self.total_batch_time += time.perf_counter() - started
+        self.total_batches += 1
+        self.last_batch_size = len(batch)
+        self.batch_size_histogram[len(batch)] += 1
+
+    def get_metrics(self) -> Dict:
+        """큐 길이 및 배치 크기 메트릭"""
+        processed = sum(size * count for size, count in self.batch_size_histogram.items())
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_in_flight": len(self._in_flight),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "last_batch_size": self.last_batch_size,
+            "avg_batch_size": round(processed / self.total_batches, 2) if self.total_batches else 0.0,
+            "avg_queue_wait_ms": round(self.total_queue_wait / processed * 1000, 2) if processed else 0.0,
+            "avg_batch_time_ms": round(self.total_batch_time / self.total_batches * 1000, 2) if self.total_batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+        }
+
+
+# 서버 전역 스케줄러 (환경변수로 배치 창 설정)
+scheduler = InferenceScheduler(
+    inference_executor,
+    max_batch_size=int(os.getenv("INFERENCE_MAX_BATCH", "8")),
+    max_wait_ms=float(os.getenv("INFERENCE_MAX_WAIT_MS", "10")),
+)
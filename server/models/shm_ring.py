@@ -0,0 +1,115 @@
+"""
+공유 메모리 이미지 링 버퍼
+API 프로세스가 디코딩한 이미지 배열을 고정 크기 슬롯에 복사하고 워커 프로세스는 같은 메모리를
+numpy 배열로 바로 읽음 (이미지를 pickle로 직렬화해서 파이프로 보내지 않음)
+
+- API 프로세스: SharedImageRing(create=True)로 생성, acquire → write → (워커 분석) → release
+- 워커 프로세스: SharedImageRing.attach(name)으로 연결, read(descriptor)로 배열 뷰를 얻음
+슬롯은 해제된 순서대로 다시 사용 (링), 슬롯보다 큰 이미지는 descriptor에 배열을 그대로 담음
+"""
+
+import threading
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class SharedImageRing:
+    """고정 크기 슬롯 slots개로 된 공유 메모리 링 버퍼"""
+
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None, create: bool = True):
+        self.slots = max(1, slots)
+        self.slot_bytes = slot_bytes
+        self._owner = create
+        if create:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * slot_bytes)
+        else:
+            self._shm = self._attach(name)
+        self.name = self._shm.name
+
+        # 빈 슬롯 (API 프로세스에서만 사용)
+        self._free = deque(range(self.slots))
+        self._cond = threading.Condition()
+
+        # 메트릭
+        self.writes = 0
+        self.fallbacks = 0
+        self.waits = 0
+
+    @staticmethod
+    def _attach(name: str) -> shared_memory.SharedMemory:
+        """
+        기존 공유 메모리에 연결 (워커 프로세스)
+        해제(unlink)는 생성한 API 프로세스가 하므로 워커는 연결만 함
+        """
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python 3.12 이하: track 인수 없음
+            # spawn 워커는 API 프로세스의 resource_tracker를 같이 쓰므로 여기서 등록을 취소하면
+            # API 프로세스의 등록까지 지워짐 (같은 이름의 중복 등록은 무시되므로 그대로 둠)
+            return shared_memory.SharedMemory(name=name)
+
+    @classmethod
+    def attach(cls, name: str, slots: int, slot_bytes: int) -> "SharedImageRing":
+        return cls(slots, slot_bytes, name=name, create=False)
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+        """빈 슬롯 하나를 가져옴 (없으면 timeout까지 대기, 시간 초과 시 None)"""
+        with self._cond:
+            if not self._free:
+                self.waits += 1
+                if not self._cond.wait_for(lambda: self._free, timeout):
+                    return None
+            return self._free.popleft()
+
+    def release(self, slot: int):
+        with self._cond:
+            self._free.append(slot)
+            self._cond.notify()
+
+    def fits(self, image: np.ndarray) -> bool:
+        return image.nbytes <= self.slot_bytes
+
+    def write(self, slot: int, image: np.ndarray) -> Dict:
+        """이미지를 슬롯에 복사하고 워커에 보낼 descriptor 반환"""
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, image)
+        self.writes += 1
+        return {"slot": slot, "shape": image.shape, "dtype": image.dtype.str}
+
+    @staticmethod
+    def inline(image: np.ndarray) -> Dict:
+        """슬롯에 들어가지 않는 이미지 (descriptor에 배열을 그대로 담아 pickle로 전달)"""
+        return {"array": image}
+
+    def read(self, descriptor: Dict) -> np.ndarray:
+        """descriptor의 이미지 배열 (공유 메모리 뷰, 복사 없음, 슬롯이 해제되기 전까지만 유효)"""
+        if "array" in descriptor:
+            return descriptor["array"]
+        return np.ndarray(descriptor["shape"], dtype=np.dtype(descriptor["dtype"]),
+                          buffer=self._shm.buf, offset=descriptor["slot"] * self.slot_bytes)
+
+    def close(self):
+        """공유 메모리 연결 해제 (생성한 프로세스는 메모리도 삭제)"""
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_info(self) -> Dict:
+        with self._cond:
+            free = len(self._free)
+        return {
+            "name": self.name,
+            "slots": self.slots,
+            "slot_mb": round(self.slot_bytes / (1024 * 1024), 2),
+            "slots_in_use": self.slots - free,
+            "writes": self.writes,
+            "inline_fallbacks": self.fallbacks,
+            "slot_waits": self.waits,
+        }
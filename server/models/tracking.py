@@ -0,0 +1,182 @@
+"""
+실시간 모드 프레임 간 추적 및 판정 재사용
+카메라(track_key)별로 직전 결과를 기억하여
+- 화면이 거의 변하지 않았으면 YOLO 검출 결과를 재사용
+- IoU로 이어지는 ROI의 Crop이 그대로면 (perceptual hash) CNN 예측을 재사용
+- 최근 N 프레임의 판정을 다수결하여 깜빡임 없는 안정화 판정을 제공
+
+같은 track_key의 프레임은 실시간 세션이 한 번에 하나씩 처리한다고 가정
+(process 모드에서는 워커 프로세스마다 별도의 추적 상태를 가지므로 Executor가 같은 track_key를 항상 같은 워커로 보냄)
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .matching import iou, majority
+
+# 프레임 변화량 비교용 축소 크기와 임계값 (0~255 평균 절대 차이)
+FRAME_DIFF_SIZE = (64, 64)
+FRAME_DIFF_THRESHOLD = float(os.getenv("LIVE_FRAME_DIFF_THRESHOLD", "2.0"))
+# 화면 변화가 없어도 이 프레임 수마다 YOLO를 다시 실행
+MAX_YOLO_SKIP = int(os.getenv("LIVE_MAX_YOLO_SKIP", "5"))
+# 같은 대상으로 보는 최소 IoU
+IOU_THRESHOLD = 0.5
+# CNN 예측을 재사용하는 최대 hash 거리 (64비트 dHash 기준)
+HASH_DISTANCE_THRESHOLD = int(os.getenv("LIVE_HASH_DISTANCE", "4"))
+# 다수결 판정에 사용하는 최근 프레임 수
+VOTE_WINDOW = int(os.getenv("LIVE_VOTE_WINDOW", "5"))
+# 이 시간 동안 사용하지 않은 추적 상태는 삭제
+TRACKER_IDLE_TTL_SEC = 300.0
+
+
+def crop_hash(gray: np.ndarray) -> int:
+    """그레이스케일 Crop의 64비트 difference hash (밝기/크기 변화에 둔감)"""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hash_distance(hash_a: int, hash_b: int) -> int:
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class FrameTracker:
+    """카메라 하나의 프레임 간 추적 상태"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.last_used = time.time()
+
+        # YOLO를 마지막으로 실행한 프레임 (키프레임)의 축소 이미지와 검출 결과
+        self._keyframe: Optional[np.ndarray] = None
+        self._keyframe_options: Optional[Tuple] = None
+        self._detections: Optional[Dict] = None
+        self._yolo_skipped = 0
+
+        # 트랙: {"track_id", "class", "bbox", "hash", "prediction"}
+        self._tracks: List[Dict] = []
+        self._next_track_id = 1
+        self._votes = deque(maxlen=max(1, VOTE_WINDOW))
+
+    def cached_detections(self, image_bgr: np.ndarray, options: Tuple) -> Optional[Dict]:
+        """
+        키프레임과 거의 같은 화면이면 키프레임의 YOLO 결과 반환
+        None이면 YOLO를 실행해야 하며, 이 프레임이 새 키프레임이 됨 (update_detections로 결과 기록)
+        """
+        self.last_used = time.time()
+        gray = image_bgr if image_bgr.ndim == 2 else cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, FRAME_DIFF_SIZE, interpolation=cv2.INTER_AREA)
+
+        if (self._detections is not None and self._keyframe is not None
+                and options == self._keyframe_options and self._yolo_skipped < MAX_YOLO_SKIP
+                and float(cv2.absdiff(self._keyframe, thumb).mean()) <= FRAME_DIFF_THRESHOLD):
+            self._yolo_skipped += 1
+            return self._detections
+
+        self._keyframe = thumb
+        self._keyframe_options = options
+        self._detections = None
+        self._yolo_skipped = 0
+        return None
+
+    def update_detections(self, detections: Dict):
+        self._detections = detections
+
+    def match_rois(self, rois: List, roi_crops: List, roi_indices: List[int]) -> List[Dict]:
+        """
+        ROI를 이전 트랙과 IoU로 연결하고 CNN 예측을 재사용할 수 있는지 판단
+
+        Returns:
+            ROI별 계획 [{"track", "hash", "prediction"}] (prediction이 None이면 CNN 실행 필요)
+        """
+        plans = []
+        used = set()
+        for crop, idx in zip(roi_crops, roi_indices):
+            detection, box = rois[idx]
+            roi_hash = crop_hash(np.asarray(crop))
+
+            best, best_iou = None, IOU_THRESHOLD
+            for t, track in enumerate(self._tracks):
+                if t in used or track["class"] != detection["class"]:
+                    continue
+                overlap = iou(track["bbox"], box)
+                if overlap >= best_iou:
+                    best, best_iou = t, overlap
+
+            track = None
+            prediction = None
+            if best is not None:
+                used.add(best)
+                track = self._tracks[best]
+                if hash_distance(track["hash"], roi_hash) <= HASH_DISTANCE_THRESHOLD:
+                    prediction = track["prediction"]
+            plans.append({"track": track, "class": detection["class"], "bbox": box,
+                          "hash": roi_hash, "prediction": prediction})
+        return plans
+
+    def update_tracks(self, plans: List[Dict], predictions: List) -> List[int]:
+        """
+        이번 프레임의 ROI로 트랙 갱신 (재사용한 예측은 기준 hash 유지, 새로 예측하면 기준 갱신)
+
+        Returns:
+            ROI별 track_id
+        """
+        tracks = []
+        for plan, prediction in zip(plans, predictions):
+            previous = plan["track"]
+            reused = plan["prediction"] is not None
+            if previous is not None:
+                track_id = previous["track_id"]
+            else:
+                track_id = self._next_track_id
+                self._next_track_id += 1
+            tracks.append({
+                "track_id": track_id,
+                "class": plan["class"],
+                "bbox": plan["bbox"],
+                "hash": previous["hash"] if reused else plan["hash"],
+                "prediction": prediction,
+            })
+        self._tracks = tracks
+        return [track["track_id"] for track in tracks]
+
+    def vote(self, status: str, product_model: Optional[str]) -> Dict:
+        """최근 VOTE_WINDOW 프레임의 판정 다수결"""
+        self._votes.append((status, product_model))
+        statuses = [s for s, _ in self._votes]
+        models = [m for _, m in self._votes]
+        return {
+            "status": majority(statuses),
+            "product_model": majority(models),
+            "window": len(self._votes),
+            "votes": dict(Counter(statuses)),
+        }
+
+
+_trackers: Dict[str, FrameTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(key: str) -> FrameTracker:
+    """track_key의 추적 상태 (없으면 생성, 오래 사용하지 않은 상태는 정리)"""
+    now = time.time()
+    with _trackers_lock:
+        for old_key, tracker in list(_trackers.items()):
+            if now - tracker.last_used > TRACKER_IDLE_TTL_SEC:
+                _trackers.pop(old_key, None)
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = FrameTracker(key)
+            _trackers[key] = tracker
+        return tracker
+
+
+def reset_tracker(key: str):
+    with _trackers_lock:
+        _trackers.pop(key, None)
@@ -2,42 +2,69 @@
 YOLO 모델 로드 및 추론
 """
 
+import os
+import time
+
+# 로컬 모델 파일만 사용 (ultralytics의 온라인 확인/다운로드 비활성)
+os.environ.setdefault("YOLO_OFFLINE", "True")
+
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 import torch
 from ultralytics import YOLO
-import os
+
+from .backends import (
+    BACKEND_ONNX, BACKEND_TORCH, BACKEND_TORCHSCRIPT, check_backend, create_onnx_session, exported_model_path
+)
+
+# 검출 입력 크기 (export_models.py 변환 시에도 같은 값 사용)
+YOLO_IMGSZ = 800
 
 
 class YOLOModel:
     """YOLO 모델 래퍼 클래스"""
     
-    def __init__(self, model_path: str = "models/YOLO.pt"):
+    def __init__(self, model_path: str = "models/YOLO.pt", backend: str = BACKEND_TORCH,
+                 num_threads: Optional[int] = None):
         self.model_path = model_path
+        self.backend = check_backend(backend)
+        self.num_threads = num_threads
         self.model = None
+        # 로드 단계별 소요 시간 (초)
+        self.load_timings: Dict[str, float] = {}
         self.class_names = ['Btn_Home', 'Btn_Back', 'Btn_ID', 'Btn_Stat', 'Monitor', 'Text'] 
         
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.load_model()
     
     def load_model(self):
-        """모델 로드"""
-        try:
-            if os.path.exists(self.model_path):
-                self.model = YOLO(self.model_path)
-                print(f"YOLO 모델 로드 완료: {self.model_path}")
-            else:
-                print(f"YOLO 모델 파일을 찾을 수 없습니다: {self.model_path}")
-                print("기본 yolov8m.pt 모델을 사용합니다.")
-                self.model = YOLO("yolov8m.pt")
-        except Exception as e:
-            print(f"YOLO 모델 로드 실패: {e}")
-            print("기본 yolov8m.pt 모델을 사용합니다.")
-            try:
-                self.model = YOLO("yolov8m.pt")
-            except:
-                self.model = None
-    
+        """
+        모델 로드 (모델 파일이 없거나 읽을 수 없으면 예외 발생, 기본 모델을 내려받아 대체하지 않음)
+        """
+        self.load_timings = {}
+        start = time.perf_counter()
+        path = self.model_path if self.backend == BACKEND_TORCH else exported_model_path(self.model_path, self.backend)
+        if not os.path.exists(path):
+            hint = "" if self.backend == BACKEND_TORCH else f" 먼저 python export_models.py --format {self.backend}를 실행하세요."
+            raise FileNotFoundError(f"YOLO 모델 파일을 찾을 수 없습니다: {path}.{hint}")
+
+        self.model = YOLO(path, task="detect")
+        self.load_timings["load_sec"] = round(time.perf_counter() - start, 4)
+
+        if self.backend == BACKEND_ONNX:
+            # ONNX는 ultralytics가 만든 세션을 워커별 스레드 수를 적용한 세션으로 교체
+            # predictor는 첫 predict 때 만들어지므로 빈 이미지로 한 번 실행 후 세션 교체
+            start = time.perf_counter()
+            self.model.predict(source=np.zeros((YOLO_IMGSZ, YOLO_IMGSZ, 3), dtype=np.uint8),
+                               imgsz=YOLO_IMGSZ, device=self.device, verbose=False)
+            backend_model = getattr(self.model.predictor, "model", None)
+            if backend_model is not None and hasattr(backend_model, "session"):
+                backend_model.session = create_onnx_session(path, self.num_threads)
+            self.load_timings["session_sec"] = round(time.perf_counter() - start, 4)
+
+        timings = ", ".join(f"{stage.replace('_sec', '')} {sec:.2f}s" for stage, sec in self.load_timings.items())
+        print(f"YOLO 모델 로드 완료: {path} (backend={self.backend}, {timings})")
+
     def detect(self, image: np.ndarray, conf_threshold: float = 0.5) -> Dict:
         """
         이미지에서 객체 검출 (Flask 코드와 동일한 방식)
@@ -59,51 +86,70 @@ class YOLOModel:
                 "image_shape": [height, width]
             }
         """
-        if self.model is None:
-            return {
-                "detections": [],
-                "image_shape": list(image.shape[:2]) if len(image.shape) >= 2 else [0, 0]
-            }
+        return self.detect_batch([image], conf_threshold=conf_threshold)[0]
+
+    def detect_batch(self, images: List[np.ndarray], conf_threshold: float = 0.5) -> List[Dict]:
+        """
+        여러 이미지를 한 번의 predict 호출로 검출 (detect의 배치 버전)
+
+        Returns:
+            이미지 순서대로 detect와 같은 형식의 결과 리스트
+        """
+        if self.model is None or not images:
+            return [self._empty_result(image) for image in images]
         
         try:
-            results = self.model.predict(
-                source=image,
-                conf=conf_threshold,
-                imgsz=800,
-                device=self.device,
-                verbose=False
-            )
-            
-            detections = []
-            if results and len(results) > 0:
-                r = results[0]
-                boxes = r.boxes.xyxy.cpu().numpy().astype(int)
-                cls_ids = r.boxes.cls.cpu().numpy().astype(int)
-                confidences = r.boxes.conf.cpu().numpy()
-                
-                for (x1, y1, x2, y2), cls_id, conf in zip(boxes, cls_ids, confidences):
-                    if cls_id < len(self.class_names):
-                        cls_name = self.class_names[int(cls_id)]
-                    else:
-                        cls_name = f"class_{int(cls_id)}"
-                    
-                    detections.append({
-                        "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                        "class": cls_name,
-                        "confidence": float(conf)
-                    })
+            if self.backend == BACKEND_TORCHSCRIPT:
+                # TorchScript 변환 모델은 배치 크기 1로 고정되어 있어 이미지별로 실행
+                results = []
+                for image in images:
+                    results.extend(self.model.predict(
+                        source=image, conf=conf_threshold, imgsz=YOLO_IMGSZ, device=self.device, verbose=False
+                    ))
+            else:
+                results = self.model.predict(
+                    source=list(images),
+                    conf=conf_threshold,
+                    imgsz=YOLO_IMGSZ,
+                    device=self.device,
+                    verbose=False
+                )
             
-            return {
-                "detections": detections,
-                "image_shape": list(image.shape[:2]) if len(image.shape) >= 2 else [0, 0]
-            }
+            return [self._parse_result(r, image) for r, image in zip(results, images)]
         
         except Exception as e:
             print(f"YOLO 검출 오류: {e}")
             import traceback
             traceback.print_exc()
-            return {
-                "detections": [],
-                "image_shape": list(image.shape[:2]) if len(image.shape) >= 2 else [0, 0]
-            }
+            return [self._empty_result(image) for image in images]
+
+    def _parse_result(self, r, image: np.ndarray) -> Dict:
+        """ultralytics Results 하나를 detect 결과 형식으로 변환"""
+        boxes = r.boxes.xyxy.cpu().numpy().astype(int)
+        cls_ids = r.boxes.cls.cpu().numpy().astype(int)
+        confidences = r.boxes.conf.cpu().numpy()
+        
+        detections = []
+        for (x1, y1, x2, y2), cls_id, conf in zip(boxes, cls_ids, confidences):
+            if cls_id < len(self.class_names):
+                cls_name = self.class_names[int(cls_id)]
+            else:
+                cls_name = f"class_{int(cls_id)}"
+            
+            detections.append({
+                "bbox": [int(x1), int(y1), int(x2), int(y2)],
+                "class": cls_name,
+                "confidence": float(conf)
+            })
+        
+        return {
+            "detections": detections,
+            "image_shape": list(image.shape[:2]) if len(image.shape) >= 2 else [0, 0]
+        }
 
+    @staticmethod
+    def _empty_result(image: np.ndarray) -> Dict:
+        return {
+            "detections": [],
+            "image_shape": list(image.shape[:2]) if len(image.shape) >= 2 else [0, 0]
+        }
@@ -0,0 +1,274 @@
+# CNN(ViT) int8 양자화 및 정확도/속도 리포트 (cd server, python quantize_models.py --images samples/ --onnx)
+# 검사 이미지에서 ROI를 잘라 (또는 저장해 둔 ROI를 읽어) fp32 모델과 양자화 모델의
+# 버튼 PASS/FAIL · 텍스트 언어 판정 일치율과 추론 시간을 비교
+# 서버에서는 INFERENCE_QUANTIZE=dynamic (torch / onnx) 또는 static (onnx) 환경변수로 사용
+import argparse
+import csv
+import glob
+import io
+import os
+import random
+import sys
+import time
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+from models.backends import (
+    BACKEND_ONNX, BACKEND_TORCH, QUANTIZE_DYNAMIC, QUANTIZE_NONE, QUANTIZE_STATIC,
+    exported_model_path, quantized_model_path
+)
+from models.cnn_model import CNNModel
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+
+def _list_images(path: str) -> list:
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for pattern in IMAGE_PATTERNS:
+        files.extend(glob.glob(os.path.join(path, pattern)))
+    return sorted(files)
+
+
+def extract_rois(image_dir: str, yolo_path: str, conditions: list, save_dir: str = None) -> list:
+    """
+    검사 이미지에서 서버와 같은 방식 (YOLO 검출 → 원본 Crop → 그레이스케일)으로 ROI 수집
+    save_dir를 주면 <save_dir>/<조건>/ 아래에 PNG로 저장 (다음 실행에서 --rois로 재사용)
+    """
+    from models.inference import _collect_rois
+    from models.yolo_model import YOLOModel
+
+    yolo = YOLOModel(model_path=yolo_path)
+
+    rois = []
+    for path in _list_images(image_dir):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"  이미지를 읽을 수 없습니다: {path}")
+            continue
+        output = yolo.detect(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        _, crops, crop_conditions, _ = _collect_rois(output.get("detections", []), image)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for k, (crop, condition) in enumerate(zip(crops, crop_conditions)):
+            if condition not in conditions:
+                continue
+            rois.append((crop, condition))
+            if save_dir:
+                os.makedirs(os.path.join(save_dir, condition), exist_ok=True)
+                crop.save(os.path.join(save_dir, condition, f"{stem}_{k}.png"))
+    return rois
+
+
+def load_rois(roi_dir: str, conditions: list) -> list:
+    """저장된 ROI 읽기 (<roi_dir>/<조건>/*.png)"""
+    rois = []
+    for condition in conditions:
+        for path in _list_images(os.path.join(roi_dir, condition)):
+            rois.append((Image.open(path).convert("L"), condition))
+    return rois
+
+
+def build_onnx_models(cnn_path: str, calibration: list, transform, batch_size: int) -> list:
+    """
+    fp32 ONNX 모델로 dynamic / static int8 ONNX 모델 생성 (onnxruntime.quantization 필요)
+    static은 calibration ROI로 활성값 범위를 보정하고, MatMul/Gemm (Linear)만 양자화
+    """
+    try:
+        from onnxruntime.quantization import (
+            CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+        )
+    except ImportError:
+        raise RuntimeError("ONNX 양자화에는 onnxruntime 패키지가 필요합니다. (pip install onnxruntime)")
+
+    fp32_path = exported_model_path(cnn_path, BACKEND_ONNX)
+    if not os.path.exists(fp32_path):
+        from export_models import export_cnn
+        print(f"  fp32 ONNX 모델이 없어 먼저 변환합니다: {fp32_path}")
+        export_cnn(cnn_path, BACKEND_ONNX)
+
+    class RoiCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            batches = []
+            for start in range(0, len(calibration), batch_size):
+                chunk = calibration[start:start + batch_size]
+                batches.append(torch.stack([transform(crop) for crop, _ in chunk]).numpy())
+            self._batches = iter(batches)
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {"pixel_values": batch}
+
+    dynamic_path = quantized_model_path(cnn_path, QUANTIZE_DYNAMIC)
+    quantize_dynamic(fp32_path, dynamic_path, weight_type=QuantType.QInt8)
+    print(f"  dynamic int8 ONNX 생성: {dynamic_path}")
+
+    built = [(BACKEND_ONNX, QUANTIZE_DYNAMIC)]
+    if calibration:
+        static_path = quantized_model_path(cnn_path, QUANTIZE_STATIC)
+        quantize_static(
+            fp32_path, static_path, RoiCalibrationReader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            op_types_to_quantize=["MatMul", "Gemm"],
+        )
+        print(f"  static int8 ONNX 생성: {static_path} (calibration ROI {len(calibration)}개)")
+        built.append((BACKEND_ONNX, QUANTIZE_STATIC))
+    return built
+
+
+def model_size_mb(model: CNNModel) -> float:
+    """모델 가중치 크기 (MB)"""
+    if model.backend == BACKEND_TORCH:
+        buffer = io.BytesIO()
+        torch.save(model.model.state_dict(), buffer)
+        return buffer.tell() / (1024 * 1024)
+    if model.quantize != QUANTIZE_NONE:
+        path = quantized_model_path(model.model_path, model.quantize)
+    else:
+        path = exported_model_path(model.model_path, model.backend)
+    return os.path.getsize(path) / (1024 * 1024)
+
+
+def run_model(model: CNNModel, rois: list, batch_size: int):
+    """ROI 전체 예측과 배치별 추론 시간 (초)"""
+    predictions = []
+    batch_times = []
+    # 첫 배치 초기화 비용 제외
+    model.predict_rois([crop for crop, _ in rois[:batch_size]], [c for _, c in rois[:batch_size]])
+    for start in range(0, len(rois), batch_size):
+        chunk = rois[start:start + batch_size]
+        begin = time.perf_counter()
+        predictions.extend(model.predict_rois([crop for crop, _ in chunk], [c for _, c in chunk]))
+        batch_times.append(time.perf_counter() - begin)
+    return predictions, batch_times
+
+
+def compare(name: str, model: CNNModel, rois: list, baseline: list, baseline_ms: float, batch_size: int) -> dict:
+    """fp32 기준 예측과 판정 일치율 / 확률 차이 / 추론 시간 비교"""
+    predictions, batch_times = run_model(model, rois, batch_size)
+    btn_total = btn_agree = txt_total = txt_agree = 0
+    prob_diffs = []
+    disagreements = []
+    for k, ((_, condition), (prob, label), (base_prob, base_label)) in enumerate(zip(rois, predictions, baseline)):
+        prob_diffs.append(abs(prob - base_prob))
+        if 'Btn' in condition:
+            btn_total += 1
+            btn_agree += label == base_label
+        else:
+            txt_total += 1
+            txt_agree += label == base_label
+        if label != base_label:
+            disagreements.append((k, condition, base_label, label))
+
+    ms_per_roi = sum(batch_times) / len(rois) * 1000
+    return {
+        "model": name,
+        "size_mb": round(model_size_mb(model), 1),
+        "ms_per_roi": round(ms_per_roi, 2),
+        "p95_batch_ms": round(float(np.percentile(batch_times, 95)) * 1000, 1),
+        "speedup": round(baseline_ms / ms_per_roi, 2) if baseline_ms else 1.0,
+        "button_agreement": round(btn_agree / btn_total, 4) if btn_total else None,
+        "language_agreement": round(txt_agree / txt_total, 4) if txt_total else None,
+        "mean_prob_diff": round(float(np.mean(prob_diffs)), 4),
+        "max_prob_diff": round(float(np.max(prob_diffs)), 4),
+        "disagreements": disagreements,
+    }
+
+
+def print_report(rows: list, btn_count: int, txt_count: int):
+    print(f"\n평가 ROI: 버튼 {btn_count}개, 텍스트 {txt_count}개 (기준: torch fp32)")
+    header = f"{'model':<18}{'size(MB)':>10}{'ms/ROI':>9}{'p95 batch':>11}{'speedup':>9}{'PASS/FAIL':>11}{'language':>10}{'max Δprob':>11}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        btn = "-" if row["button_agreement"] is None else f"{row['button_agreement']:.2%}"
+        txt = "-" if row["language_agreement"] is None else f"{row['language_agreement']:.2%}"
+        print(f"{row['model']:<18}{row['size_mb']:>10}{row['ms_per_roi']:>9}{row['p95_batch_ms']:>11}"
+              f"{row['speedup']:>9}{btn:>11}{txt:>10}{row['max_prob_diff']:>11}")
+    for row in rows:
+        for k, condition, expected, actual in row["disagreements"][:10]:
+            print(f"  [{row['model']}] ROI #{k} ({condition}): fp32={expected}, int8={actual}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ViT 분류기 int8 양자화 및 fp32 대비 정확도/속도 리포트")
+    parser.add_argument("--cnn", default="models/CNN_classifier.pt")
+    parser.add_argument("--yolo", default="models/YOLO.pt")
+    parser.add_argument("--images", help="ROI를 잘라낼 검사 이미지 파일 또는 디렉터리")
+    parser.add_argument("--rois", help="저장된 ROI 디렉터리 (<조건>/*.png), --images와 함께 주면 추출한 ROI를 여기에 저장")
+    parser.add_argument("--onnx", action="store_true", help="dynamic / static int8 ONNX 모델도 생성해서 비교")
+    parser.add_argument("--calib-count", type=int, default=200, help="static 양자화 calibration에 사용할 ROI 수")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="PASS/FAIL · 언어 일치율이 이 값보다 낮으면 종료 코드 1")
+    parser.add_argument("--output", help="리포트 CSV 저장 경로")
+    args = parser.parse_args()
+
+    torch.set_num_threads(os.cpu_count() or 1)
+    baseline_model = CNNModel(model_path=args.cnn)
+
+    if args.images:
+        rois = extract_rois(args.images, args.yolo, baseline_model.conditions, save_dir=args.rois)
+    elif args.rois:
+        rois = load_rois(args.rois, baseline_model.conditions)
+    else:
+        parser.error("--images 또는 --rois 중 하나는 필요합니다.")
+    if not rois:
+        print("🚨 평가할 ROI가 없습니다.")
+        sys.exit(1)
+
+    # calibration ROI와 평가 ROI를 분리 (ROI가 적으면 전체로 평가)
+    random.Random(0).shuffle(rois)
+    calibration = rois[:args.calib_count] if args.onnx else []
+    evaluation = rois[len(calibration):] or rois
+    btn_count = sum('Btn' in condition for _, condition in evaluation)
+    print(f"ROI {len(rois)}개 (calibration {len(calibration)}개, 평가 {len(evaluation)}개)")
+
+    variants = [(BACKEND_TORCH, QUANTIZE_DYNAMIC)]
+    if args.onnx:
+        variants.append((BACKEND_ONNX, QUANTIZE_NONE))
+        variants.extend(build_onnx_models(args.cnn, calibration, baseline_model.transform, args.batch_size))
+
+    baseline, baseline_times = run_model(baseline_model, evaluation, args.batch_size)
+    baseline_ms = sum(baseline_times) / len(evaluation) * 1000
+    rows = [compare("torch fp32", baseline_model, evaluation, baseline, baseline_ms, args.batch_size)]
+    del baseline_model
+
+    for backend, quantize in variants:
+        name = f"{backend} {'fp32' if quantize == QUANTIZE_NONE else 'int8-' + quantize}"
+        try:
+            model = CNNModel(model_path=args.cnn, backend=backend, quantize=quantize)
+        except Exception as e:
+            print(f"  {name}: 모델 로드 실패로 건너뜁니다. ({e})")
+            continue
+        rows.append(compare(name, model, evaluation, baseline, baseline_ms, args.batch_size))
+
+    print_report(rows, btn_count, len(evaluation) - btn_count)
+
+    if args.output:
+        columns = [key for key in rows[0] if key != "disagreements"]
+        with open(args.output, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"리포트 저장: {args.output}")
+
+    failed = [
+        row["model"] for row in rows
+        if any(value is not None and value < args.min_agreement
+               for value in (row["button_agreement"], row["language_agreement"]))
+    ]
+    if failed:
+        print(f"🚨 fp32 대비 일치율이 {args.min_agreement:.0%} 미만: {', '.join(failed)}")
+        sys.exit(1)
+    print("✅ 양자화 리포트 완료")
+
+
+if __name__ == "__main__":
+    main()
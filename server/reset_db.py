@@ -2,7 +2,8 @@
 import sys
 import os
 
-from database.db import get_connection 
+from database.db import get_connection, init_db, ROLLUP_TABLES 
+from database.image_store import clear_images
 
 def clear_analysis_data():
     """SQLite DB의 analysis_results 테이블의 데이터와 AUTOINCREMENT 카운터를 초기화합니다."""
@@ -10,6 +11,7 @@ def clear_analysis_data():
     
     conn = None # 연결 객체 초기화
     try:
+        init_db()
         conn = get_connection() 
         cursor = conn.cursor()
         
@@ -18,8 +20,15 @@ def clear_analysis_data():
         
         # 2. AUTOINCREMENT 카운터를 1로 재설정 (ID를 0부터 다시 시작)
         cursor.execute("UPDATE sqlite_sequence SET seq = 0 WHERE name = 'analysis_results'")
+
+        # 통계 롤업 테이블도 함께 비움
+        for table in ROLLUP_TABLES:
+            cursor.execute(f"DELETE FROM {table}")
         
         conn.commit()
+
+        # 3. 결과 이미지 저장소 삭제
+        clear_images()
         print("✅ 분석 데이터가 초기화되었습니다. ID 카운터도 재설정되었습니다.")
 
     except Exception as e:
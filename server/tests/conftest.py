@@ -0,0 +1,13 @@
+import pytest
+
+from database import db, image_store
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """임시 디렉터리의 새 DB (쓰기 스레드와 이미지 저장소도 테스트마다 분리)"""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "results.db"))
+    monkeypatch.setattr(db, "_schema_ready", False)
+    monkeypatch.setattr(db, "_writer", db._ResultWriter())
+    monkeypatch.setattr(image_store, "IMAGE_STORE_DIR", str(tmp_path / "images"))
+    return db
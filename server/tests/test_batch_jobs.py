@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+from jobs.manager import JOB_CANCELLED, job_manager
+
+UPLOADS = [("files", (f"{i}.jpg", b"jpeg")) for i in range(3)]
+
+
+@pytest.fixture
+def hanging_analysis(monkeypatch):
+    """추론이 끝나지 않는 분석 함수로 교체하고 파일별 상태 ("started" → "cancelled") 목록 반환"""
+    started = []
+
+    async def analyze_contents(contents, options=None, timings=None):
+        index = len(started)
+        started.append("started")
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            started[index] = "cancelled"
+            raise
+
+    monkeypatch.setattr(main, "analyze_contents", analyze_contents)
+    return started
+
+
+async def cancel_running_batch(started, stream):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        request = asyncio.create_task(
+            client.post("/api/analyze-batch", params={"stream": stream}, files=UPLOADS)
+        )
+        while not started:
+            await asyncio.sleep(0.01)
+        job = job_manager.latest_job()
+        cancelled = await client.delete(f"/api/jobs/{job.id}")
+        response = await asyncio.wait_for(request, timeout=5)
+        return job, cancelled, response
+
+
+def test_cancel_stops_non_streaming_batch(hanging_analysis):
+    job, cancelled, response = asyncio.run(cancel_running_batch(hanging_analysis, stream=False))
+
+    assert cancelled.json()["status"] == JOB_CANCELLED
+    assert response.json() == {"results": [], "status": JOB_CANCELLED}
+    assert job.task.done()
+    assert hanging_analysis and set(hanging_analysis) == {"cancelled"}
+    assert job.completed_count == 0
+
+
+def test_cancel_stops_streaming_batch(hanging_analysis):
+    job, cancelled, response = asyncio.run(cancel_running_batch(hanging_analysis, stream=True))
+
+    assert cancelled.json()["status"] == JOB_CANCELLED
+    assert [json.loads(line) for line in response.text.splitlines()] == []
+    assert job.task.done()
+    assert hanging_analysis and set(hanging_analysis) == {"cancelled"}
+    assert job.completed_count == 0
+
+
+def test_non_streaming_batch_keeps_annotated_image_out_of_job(monkeypatch):
+    async def analyze_upload(filename, contents, semaphore, options=None):
+        return {"filename": filename, "status": "PASS", "details": {"annotated_image": "b64"},
+                "image_url": "/api/results/1/image"}
+
+    monkeypatch.setattr(main, "analyze_upload", analyze_upload)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/analyze-batch", files=UPLOADS)
+
+    response = asyncio.run(scenario())
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["details"] == {"annotated_image": "b64"} for r in results)
+
+    job = job_manager.get_job(response.headers["X-Job-Id"])
+    assert all(r["details"] == {} for r in job.results)
@@ -0,0 +1,77 @@
+import base64
+import json
+import sqlite3
+
+from database import image_store
+
+LEGACY_DETAILS = {
+    "product_model": "FM2-V160-000",
+    "language": "CN",
+    "text_count": 3,
+    "annotated_image": base64.b64encode(b"jpeg bytes").decode(),
+}
+
+
+def create_v1_database(path):
+    """마이그레이션 도입 전 (v1) 스키마의 DB와 기존 행"""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE analysis_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            status TEXT NOT NULL,
+            reason TEXT,
+            confidence REAL,
+            details TEXT,
+            timestamp TEXT NOT NULL
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO analysis_results (filename, status, reason, confidence, details, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("a.jpg", "FAIL", "NG", 80.0, json.dumps(LEGACY_DETAILS), "2024-05-01T10:15:00"),
+            ("b.jpg", "PASS", None, 90.0, None, "2024-05-01T11:00:00"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_fresh_database_reaches_latest_version(temp_db):
+    temp_db.init_db()
+    conn = temp_db.get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == temp_db.SCHEMA_VERSION
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row["name"] for row in conn.execute("PRAGMA index_list(analysis_results)")}
+    assert "idx_analysis_results_timestamp" in indexes
+    conn.close()
+
+
+def test_v1_database_migrated_in_place(temp_db):
+    create_v1_database(temp_db.DB_PATH)
+    temp_db.init_db()
+
+    conn = temp_db.get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == temp_db.SCHEMA_VERSION
+    row = conn.execute("SELECT * FROM analysis_results WHERE filename = 'a.jpg'").fetchone()
+
+    # v2: details 필드 승격
+    assert (row["product_model"], row["language"], row["text_count"]) == ("FM2-V160-000", "CN", 3)
+    # v3: 주석 이미지를 이미지 저장소로 이동
+    assert "annotated_image" not in json.loads(row["details"])
+    with open(image_store.image_path(row["image_ref"]), "rb") as f:
+        assert f.read() == b"jpeg bytes"
+    # v4: 기존 행으로 롤업 채우기
+    daily = conn.execute("SELECT status, count FROM result_rollups_daily ORDER BY status").fetchall()
+    assert [tuple(r) for r in daily] == [("FAIL", 1), ("PASS", 1)]
+    conn.close()
+
+
+def test_migrations_are_idempotent(temp_db, monkeypatch):
+    create_v1_database(temp_db.DB_PATH)
+    temp_db.init_db()
+    monkeypatch.setattr(temp_db, "_schema_ready", False)
+    temp_db.init_db()
+
+    stats = temp_db.get_statistics()
+    assert (stats["total"], stats["pass"], stats["fail"]) == (2, 1, 1)
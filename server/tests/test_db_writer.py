@@ -0,0 +1,56 @@
+import sqlite3
+from concurrent.futures import Future
+
+import pytest
+
+from database.db import _result_row
+
+
+def queue_rows(writer, rows):
+    """쓰기 스레드 시작 전에 큐에 넣어 한 배치로 처리되게 함"""
+    futures = []
+    for row in rows:
+        future = Future()
+        writer._queue.put((row, future))
+        futures.append(future)
+    writer._ensure_started()
+    return futures
+
+
+def count_rows(db):
+    conn = db.get_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM analysis_results").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_save_result_round_trip(temp_db):
+    saved = temp_db.save_result("a.jpg", "PASS", confidence=0.9, details={"product_model": "X1"})
+    assert saved["id"] == 1
+    assert saved["details"] == {"product_model": "X1"}
+    assert temp_db.get_statistics()["by_product_model"] == {"X1": {"total": 1, "pass": 1, "fail": 0}}
+
+
+def test_group_commit_writes_batch_in_one_transaction(temp_db):
+    writer = temp_db._writer
+    futures = queue_rows(writer, [_result_row(f"{i}.jpg", "PASS") for i in range(8)])
+    assert [future.result(timeout=5) for future in futures] == list(range(1, 9))
+    assert count_rows(temp_db) == 8
+
+
+def test_bad_row_fails_only_its_own_request(temp_db):
+    rows = [_result_row(f"{i}.jpg", "FAIL", reason="NG") for i in range(8)]
+    rows[3]["filename"] = None
+    futures = queue_rows(temp_db._writer, rows)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[3].result(timeout=5)
+    for index, future in enumerate(futures):
+        if index != 3:
+            assert future.result(timeout=5) > 0
+
+    assert count_rows(temp_db) == 7
+    # 실패한 행은 롤업에도 반영되지 않음
+    assert temp_db.get_statistics()["fail_reasons"] == {"NG": 7}
+
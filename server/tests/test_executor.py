@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from models import executor as executor_module
+from models.executor import InferenceExecutor
+
+
+def test_thread_mode_runs_single_worker():
+    # 스레드 모드는 모델 인스턴스를 공유하므로 워커 수를 1로 제한
+    executor = InferenceExecutor(mode="thread", workers=4, torch_threads=2)
+    assert executor.workers == 1
+    assert not executor.uses_processes
+
+
+def test_process_modes_keep_worker_count():
+    for mode in ("process", "shm"):
+        executor = InferenceExecutor(mode=mode, workers=3, torch_threads=1)
+        assert executor.workers == 3
+        assert executor.uses_processes
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode="gpu")
+
+
+def _fake_worker_init(*args):
+    # 모델 로드 없이 워커만 띄움
+    pass
+
+
+def _fake_analyze_images(images, options):
+    return [{"image": image, "pid": os.getpid(), "track_key": option.get("track_key")}
+            for image, option in zip(images, options)]
+
+
+def test_tracked_frames_stay_on_their_worker(monkeypatch):
+    monkeypatch.setattr(executor_module, "_init_process_worker", _fake_worker_init)
+    monkeypatch.setattr(executor_module, "_analyze_images", _fake_analyze_images)
+    executor = InferenceExecutor(mode="process", workers=3, torch_threads=1)
+
+    async def scenario():
+        results = []
+        for _ in range(5):
+            options = [{"track_key": f"cam-{i % 4}"} for i in range(8)] + [{}, {}]
+            results.append(await executor.analyze(list(range(10)), options))
+        return results
+
+    executor.start()
+    try:
+        rounds = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    worker_pids = [info["pid"] for info in executor.worker_warmup]
+    assert len(set(worker_pids)) == 3
+    for results in rounds:
+        # 워커별로 나눠 실행해도 결과는 입력 순서
+        assert [result["image"] for result in results] == list(range(10))
+        for result in results:
+            if result["track_key"]:
+                assert result["pid"] == worker_pids[executor.lane_for(result["track_key"])]
+
+
+def test_lane_for_is_stable_and_in_range():
+    executor = InferenceExecutor(mode="shm", workers=4, torch_threads=1)
+    lanes = {executor.lane_for(f"cam-{i}") for i in range(100)}
+    assert lanes == {0, 1, 2, 3}
+    assert executor.lane_for("cam-1") == InferenceExecutor(mode="process", workers=4).lane_for("cam-1")
+
+
+def _slow_fake_worker_init(*args):
+    time.sleep(0.5)
+
+
+def test_shutdown_during_start_stops_started_workers(monkeypatch):
+    # 백그라운드 모델 로드 중에 서버가 종료되는 경우
+    monkeypatch.setattr(executor_module, "_init_process_worker", _slow_fake_worker_init)
+    executor = InferenceExecutor(mode="shm", workers=2, torch_threads=1, ring_slots=2, slot_mb=1)
+
+    starter = threading.Thread(target=executor.start)
+    starter.start()
+    time.sleep(0.1)
+    executor.shutdown()
+    starter.join()
+
+    assert not executor.get_info()["running"]
+    assert "ring" not in executor.get_info()
+
+
+def test_cancelled_shm_write_releases_slots(monkeypatch):
+    monkeypatch.setattr(executor_module, "_init_process_worker", _fake_worker_init)
+    monkeypatch.setattr(executor_module, "_analyze_images", _fake_analyze_images)
+    executor = InferenceExecutor(mode="shm", workers=1, torch_threads=1, ring_slots=2, slot_mb=1)
+    write_images = executor._write_images
+
+    def slow_write_images(images):
+        time.sleep(0.2)
+        return write_images(images)
+
+    monkeypatch.setattr(executor, "_write_images", slow_write_images)
+
+    async def scenario():
+        task = asyncio.create_task(executor.analyze([np.zeros((8, 8), np.uint8)] * 2, [{}, {}]))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.4)
+        return executor.get_info()["ring"]["slots_in_use"]
+
+    executor.start()
+    try:
+        assert asyncio.run(scenario()) == 0
+    finally:
+        executor.shutdown()
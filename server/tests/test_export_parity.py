@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+pytest.importorskip("transformers")
+
+from models.backends import BACKEND_ONNX, BACKEND_TORCHSCRIPT
+from models.cnn_model import CNNModel, ViTClassifier, load_vit_config
+
+# 번들된 vit_config.json 구조를 작게 줄인 랜덤 초기화 ViT (학습한 가중치 파일 없이 변환 경로만 검증)
+TINY_VIT = {"hidden_size": 32, "num_hidden_layers": 2, "num_attention_heads": 2, "intermediate_size": 64}
+# export_models.py --atol 기본값
+LOGIT_ATOL = 1e-3
+
+
+@pytest.fixture
+def tiny_checkpoint(tmp_path):
+    config = load_vit_config()
+    for key, value in TINY_VIT.items():
+        setattr(config, key, value)
+    torch.manual_seed(0)
+    model = ViTClassifier(config).eval()
+    path = tmp_path / "CNN_classifier.pt"
+    torch.save({"state_dict": model.state_dict(), "vit_config": config.to_dict()}, path)
+    return str(path)
+
+
+@pytest.mark.parametrize("fmt", [BACKEND_ONNX, BACKEND_TORCHSCRIPT])
+def test_exported_vit_matches_eager(tiny_checkpoint, fmt):
+    if fmt == BACKEND_ONNX:
+        pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+    import export_models
+
+    path = export_models.export_cnn(tiny_checkpoint, fmt)
+    assert os.path.dirname(path) == os.path.dirname(tiny_checkpoint)
+
+    eager = CNNModel(model_path=tiny_checkpoint)
+    exported = CNNModel(model_path=tiny_checkpoint, backend=fmt)
+
+    torch.manual_seed(1)
+    x = torch.rand(8, 3, 224, 224) * 2 - 1
+    conditions = ["Btn_Home", "Text"] * 4
+    with torch.no_grad():
+        _, expected_btn, _, expected_txt = eager._forward_logits(x, conditions)
+        _, actual_btn, _, actual_txt = exported._forward_logits(x, conditions)
+
+    for expected, actual in ((expected_btn, actual_btn), (expected_txt, actual_txt)):
+        expected, actual = expected.cpu().numpy(), actual.cpu().numpy()
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=LOGIT_ATOL)
+        assert (actual.argmax(axis=1) == expected.argmax(axis=1)).all()
+
+    # 변환 스크립트의 출력 비교도 같은 결과
+    assert export_models.check_cnn_parity(tiny_checkpoint, fmt, LOGIT_ATOL)
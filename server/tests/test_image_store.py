@@ -0,0 +1,56 @@
+import base64
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from database import image_store
+
+JPEG = base64.b64encode(b"jpeg bytes").decode()
+
+
+def test_same_content_stored_once(temp_db):
+    first = image_store.save_base64_image(JPEG)
+    second = image_store.save_base64_image(JPEG)
+    assert first == second
+    assert os.path.exists(image_store.image_path(first))
+    assert image_store.save_base64_image("") is None
+
+
+def test_invalid_reference_rejected():
+    with pytest.raises(ValueError):
+        image_store.image_path("../results.db")
+
+
+def test_annotated_image_kept_out_of_results_table(temp_db):
+    saved = temp_db.save_result("a.jpg", "PASS", details={"annotated_image": JPEG, "language": "KR"})
+    assert saved["image_url"] == f"/api/results/{saved['id']}/image"
+
+    ref = temp_db.get_result_image_ref(saved["id"])
+    with open(image_store.image_path(ref), "rb") as f:
+        assert f.read() == b"jpeg bytes"
+    page = temp_db.get_results_page()
+    assert page["results"][0]["details"] == {"language": "KR"}
+    assert temp_db.get_result_image_ref(saved["id"] + 1) is None
+
+
+def test_concurrent_saves_of_same_content(temp_db):
+    data = os.urandom(2 * 1024 * 1024)
+    encoded = base64.b64encode(data).decode()
+    barrier = threading.Barrier(8)
+
+    def save():
+        barrier.wait()
+        return image_store.save_base64_image(encoded)
+
+    for _ in range(10):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            refs = list(pool.map(lambda _: save(), range(8)))
+        assert len(set(refs)) == 1
+        path = image_store.image_path(refs[0])
+        with open(path, "rb") as f:
+            assert f.read() == data
+        # 임시 파일이 남지 않음
+        assert os.listdir(os.path.dirname(path)) == [refs[0]]
+        os.remove(path)
@@ -0,0 +1,80 @@
+import asyncio
+
+from jobs.manager import JOB_CANCELLED, JOB_COMPLETED, JobManager
+
+
+def test_progress_and_incremental_results():
+    job = JobManager().create_job(3)
+    job.start()
+    job.add_result(2, {"filename": "c.jpg", "status": "PASS"})
+    job.add_result(0, {"filename": "a.jpg", "status": "ERROR"})
+
+    progress = job.get_progress()
+    assert (progress["completed_count"], progress["error_count"]) == (2, 1)
+    assert progress["progress_percent"] == 66.67
+    assert progress["last_processed_info"]["filename"] == "a.jpg"
+
+    first = job.get_results(limit=1)
+    assert [r["index"] for r in first["results"]] == [2]
+    rest = job.get_results(since=first["next_since"])
+    assert [r["index"] for r in rest["results"]] == [0]
+    assert rest["next_since"] == 2 and rest["is_running"]
+
+    job.finish()
+    assert job.get_progress()["eta_sec"] == 0.0
+
+
+def test_cancel_stops_task_and_ignores_late_results():
+    manager = JobManager()
+
+    async def scenario():
+        job = manager.create_job(2)
+        job.start()
+        job.task = asyncio.ensure_future(asyncio.sleep(60))
+        manager.cancel_job(job.id)
+        await asyncio.sleep(0)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.task.cancelled()
+    assert job.status == JOB_CANCELLED
+
+    job.add_result(0, {"filename": "late.jpg", "status": "PASS"})
+    assert job.results == [] and job.completed_count == 0
+
+
+def test_cancel_finished_job_is_noop():
+    manager = JobManager()
+    job = manager.create_job(1)
+    job.finish()
+    assert manager.cancel_job(job.id).status == JOB_COMPLETED
+    assert manager.cancel_job("missing") is None
+
+
+def test_evicts_oldest_finished_jobs():
+    manager = JobManager(max_finished_jobs=2)
+    jobs = [manager.create_job(1) for _ in range(3)]
+    for job in jobs:
+        job.finish()
+    running = manager.create_job(1)
+
+    assert manager.get_job(jobs[0].id) is None
+    assert manager.get_job(jobs[2].id) is jobs[2]
+    assert manager.latest_job() is running
+
+
+def test_stored_results_drop_annotated_image():
+    job = JobManager().create_job(2)
+    job.start()
+    result = {"filename": "a.jpg", "status": "PASS", "details": {"home_status": "PASS", "annotated_image": "b64"}}
+    assert job.add_result(0, result)
+    assert job.add_result(1, {"filename": "b.jpg", "status": "ERROR", "details": {}})
+
+    stored = job.get_results()["results"]
+    assert stored[0]["details"] == {"home_status": "PASS"}
+    assert stored[0]["index"] == 0
+    # 응답에 쓰는 원본 결과는 그대로
+    assert result["details"]["annotated_image"] == "b64"
+
+    job.finish()
+    assert not job.add_result(0, result)
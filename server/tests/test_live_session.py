@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from live.session import FrameSkipped, LiveSession, LiveSessionManager
+
+
+def test_rotate_track_key_returns_previous_key():
+    session = LiveSession("cam1", processor=None)
+    first = session.track_key
+    assert first.startswith("cam1:")
+    assert session.rotate_track_key() == first
+    assert session.track_key != first and session.track_key.startswith("cam1:")
+
+
+def test_close_hook_receives_session():
+    closed = []
+
+    async def on_close(session):
+        closed.append((session.camera_id, session.track_key))
+
+    async def processor(contents, options):
+        return {"status": "PASS"}
+
+    async def scenario():
+        session = LiveSession("cam1", processor, on_close)
+        await session.push(b"frame")
+        await session.close()
+        return session
+
+    session = asyncio.run(scenario())
+    assert closed == [("cam1", session.track_key)]
+
+
+def test_latest_frame_wins_while_processing():
+    release = None
+
+    async def processor(contents, options):
+        await release.wait()
+        return {"contents": contents}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        session = LiveSession("cam1", processor)
+        first = session.push(b"1")
+        await asyncio.sleep(0)
+        # 첫 프레임을 처리하는 동안 들어온 프레임은 최신 한 장만 남음
+        second = session.push(b"2")
+        third = session.push(b"3")
+        release.set()
+        results = await asyncio.gather(first, second, third, return_exceptions=True)
+        metrics = session.get_metrics()
+        await session.close()
+        return results, metrics
+
+    results, metrics = asyncio.run(scenario())
+    assert results[0]["contents"] == b"1" and results[0]["frame"] == 1
+    assert isinstance(results[1], FrameSkipped) and results[1].frame == 2
+    assert results[2]["contents"] == b"3" and results[2]["frame"] == 3
+    assert (metrics["received_frames"], metrics["processed_frames"], metrics["dropped_frames"]) == (3, 2, 1)
+
+
+def test_processor_error_reported_to_frame():
+    async def processor(contents, options):
+        raise ValueError("bad frame")
+
+    async def scenario():
+        session = LiveSession("cam1", processor)
+        with pytest.raises(ValueError):
+            await session.push(b"x", {"brightness": 0.0})
+        metrics = session.get_metrics()
+        await session.close()
+        return metrics
+
+    assert asyncio.run(scenario())["error_frames"] == 1
+
+
+def test_processor_receives_camera_and_frame():
+    seen = []
+
+    async def processor(contents, options):
+        seen.append(options)
+        return {}
+
+    async def scenario():
+        session = LiveSession("cam7", processor)
+        await session.push(b"x", {"save": True})
+        await session.close()
+
+    asyncio.run(scenario())
+    assert seen == [{"save": True, "camera_id": "cam7", "frame": 1}]
+
+
+def test_manager_reuses_and_evicts_idle_sessions():
+    closed = []
+
+    async def on_close(session):
+        closed.append(session.camera_id)
+
+    async def scenario():
+        manager = LiveSessionManager(idle_ttl_sec=60)
+        session = await manager.get_session("cam1", processor=None, on_close=on_close)
+        assert await manager.get_session("cam1", processor=None) is session
+        session.last_active -= 120
+        await manager.get_session("cam2", processor=None)
+        assert set(manager.get_metrics()) == {"cam2"}
+        await manager.close_all()
+
+    asyncio.run(scenario())
+    assert closed == ["cam1"]
@@ -0,0 +1,33 @@
+import pytest
+
+from main import check_model_load
+
+
+def test_check_model_load_reports_failed_models():
+    check_model_load({"yolo": {"loaded": True}, "cnn": {"loaded": True}})
+    with pytest.raises(RuntimeError, match="cnn: CheckpointMismatchError"):
+        check_model_load({"yolo": {"loaded": True},
+                          "cnn": {"loaded": False, "error": "CheckpointMismatchError: 누락 1개"}})
+
+
+def test_checkpoint_mismatch_lists_keys():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("torchvision")
+    pytest.importorskip("transformers")
+    from models.cnn_model import CheckpointMismatchError, ViTClassifier, build_classifier, load_vit_config
+
+    config = load_vit_config()
+    for key, value in {"hidden_size": 32, "num_hidden_layers": 1, "num_attention_heads": 2,
+                       "intermediate_size": 64}.items():
+        setattr(config, key, value)
+    state_dict = ViTClassifier(config).state_dict()
+    assert isinstance(build_classifier(dict(state_dict), config), ViTClassifier)
+
+    del state_dict["head_txt.bias"]
+    state_dict["classifier.weight"] = torch.zeros(1)
+    with pytest.raises(CheckpointMismatchError) as error:
+        build_classifier(state_dict, config)
+
+    info = error.value.get_info()
+    assert info["missing_keys"] == ["head_txt.bias"] and info["missing_keys_count"] == 1
+    assert info["unexpected_keys"] == ["classifier.weight"] and info["unexpected_keys_count"] == 1
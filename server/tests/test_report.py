@@ -0,0 +1,39 @@
+import csv
+import io
+
+from database.report import REPORT_HEADER, iter_csv, iter_file
+
+
+def parse(chunks):
+    return list(csv.reader(io.StringIO("".join(chunks))))
+
+
+def test_csv_streams_all_rows_in_chunks(temp_db):
+    for i in range(7):
+        temp_db.save_result(f"{i}.jpg", "PASS", confidence=90.0, details={"model_status": "OK", "language": "KR"})
+
+    chunks = list(iter_csv(temp_db.iter_results(chunk_size=2), flush_rows=3))
+    assert len(chunks) == 3
+    rows = parse(chunks)
+    assert rows[0] == REPORT_HEADER
+    assert [row[1] for row in rows[1:]] == [f"{i}.jpg" for i in reversed(range(7))]
+    assert rows[1][REPORT_HEADER.index("Text Language")] == "KR"
+
+
+def test_rows_without_details_marked_na(temp_db):
+    temp_db.save_result("broken.jpg", "ERROR", reason="decode")
+    rows = parse(iter_csv(temp_db.iter_results()))
+    assert rows[1][REPORT_HEADER.index("Home Button")] == "N/A"
+    assert rows[1][REPORT_HEADER.index("Fail Reason")] == "decode"
+
+
+def test_iter_results_filters_by_status(temp_db):
+    temp_db.save_result("a.jpg", "PASS")
+    temp_db.save_result("b.jpg", "FAIL", reason="NG")
+    assert [row["filename"] for row in temp_db.iter_results(status="FAIL")] == ["b.jpg"]
+
+
+def test_iter_file_reads_in_chunks_and_closes():
+    fileobj = io.BytesIO(b"x" * 10)
+    assert list(iter_file(fileobj, chunk_size=4)) == [b"xxxx", b"xxxx", b"xx"]
+    assert fileobj.closed
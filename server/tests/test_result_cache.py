@@ -0,0 +1,73 @@
+import os
+
+from models.result_cache import ResultCache, model_fingerprint
+
+RESULT = {"button_result": "OK", "language_result": "KR"}
+
+
+def make_cache(tmp_path, **kwargs):
+    model_path = tmp_path / "model.pt"
+    model_path.write_bytes(b"weights")
+    cache = ResultCache(**kwargs)
+    cache.set_model_files([str(model_path)])
+    return cache, model_path
+
+
+def test_key_depends_on_bytes_and_result_options(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    key = cache.make_key(b"image", {"brightness": 1.0})
+    assert key == cache.make_key(b"image", {"brightness": 1.0, "filename": "a.jpg"})
+    assert key != cache.make_key(b"image", {"brightness": 1.2})
+    assert key != cache.make_key(b"other", {"brightness": 1.0})
+
+
+def test_memory_hit_after_put(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    key, cached = cache.lookup(b"image")
+    assert cached is None
+    cache.put(key, RESULT)
+    assert cache.lookup(b"image") == (key, RESULT)
+    metrics = cache.get_metrics()
+    assert (metrics["memory_hits"], metrics["misses"]) == (1, 1)
+
+
+def test_evicted_entries_served_from_disk(tmp_path):
+    cache, _ = make_cache(tmp_path, max_entries=1, disk_dir=str(tmp_path / "cache"))
+    first_key, _ = cache.lookup(b"first")
+    cache.put(first_key, RESULT)
+    second_key, _ = cache.lookup(b"second")
+    cache.put(second_key, {"button_result": "NG"})
+
+    assert cache.lookup(b"first") == (first_key, RESULT)
+    assert cache.get_metrics()["disk_hits"] == 1
+
+
+def test_model_file_change_invalidates(tmp_path):
+    cache, model_path = make_cache(tmp_path, disk_dir=str(tmp_path / "cache"))
+    key, _ = cache.lookup(b"image")
+    cache.put(key, RESULT)
+
+    model_path.write_bytes(b"new weights")
+    os.utime(model_path, ns=(0, 0))
+    assert cache.lookup(b"image")[1] is None
+    assert cache.get_metrics()["invalidations"] == 1
+
+
+def test_fingerprint_includes_tag(tmp_path):
+    path = tmp_path / "model.pt"
+    path.write_bytes(b"weights")
+    assert model_fingerprint([str(path)], "torch/none") != model_fingerprint([str(path)], "onnx/none")
+
+
+def test_clear_removes_memory_and_disk_entries(tmp_path):
+    cache, _ = make_cache(tmp_path, max_entries=1, disk_dir=str(tmp_path / "cache"))
+    for contents in (b"first", b"second"):
+        key, _ = cache.lookup(contents)
+        cache.put(key, RESULT)
+
+    cache.clear()
+
+    for contents in (b"first", b"second"):
+        assert cache.lookup(contents)[1] is None
+    metrics = cache.get_metrics()
+    assert (metrics["memory_hits"], metrics["disk_hits"], metrics["disk_bytes"]) == (0, 0, 0)
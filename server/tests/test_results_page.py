@@ -0,0 +1,61 @@
+import pytest
+
+from database.db import SUMMARY_FIELDS, _result_row
+
+
+def insert(db, filename, status, timestamp, **details):
+    row = _result_row(filename, status, confidence=90.0, details=details or None)
+    row["timestamp"] = timestamp
+    return db._writer.submit(row).result(timeout=5)
+
+
+def collect(db, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        page = db.get_results_page(limit=limit, cursor=cursor, fields=("id", "filename"), **filters)
+        pages.append([item["filename"] for item in page["results"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def results_db(temp_db):
+    insert(temp_db, "a", "PASS", "2024-05-01T10:00:00", product_model="X1")
+    insert(temp_db, "b", "FAIL", "2024-05-01T11:00:00", product_model="X2")
+    # 같은 timestamp는 id 내림차순
+    insert(temp_db, "c", "PASS", "2024-05-02T09:00:00", product_model="X1")
+    insert(temp_db, "d", "PASS", "2024-05-02T09:00:00", product_model="X1")
+    insert(temp_db, "e", "FAIL", "2024-05-03T08:00:00", product_model="X2")
+    return temp_db
+
+
+def test_keyset_pages_cover_every_row_once(results_db):
+    assert collect(results_db, limit=2) == [["e", "d"], ["c", "b"], ["a"]]
+
+
+def test_filters_apply_across_pages(results_db):
+    assert collect(results_db, limit=1, status="FAIL") == [["e"], ["b"]]
+    assert collect(results_db, limit=5, product_model="X1", start_date="2024-05-02") == [["d", "c"]]
+    assert collect(results_db, limit=5, end_date="2024-05-01") == [["b", "a"]]
+
+
+def test_new_rows_do_not_shift_later_pages(results_db):
+    first = results_db.get_results_page(limit=2, fields=("filename",))
+    insert(results_db, "f", "PASS", "2024-05-04T00:00:00")
+    second = results_db.get_results_page(limit=2, cursor=first["next_cursor"], fields=("filename",))
+    assert [item["filename"] for item in second["results"]] == ["c", "b"]
+
+
+def test_summary_fields_return_promoted_columns_only(results_db):
+    item = results_db.get_results_page(limit=1, fields=SUMMARY_FIELDS)["results"][0]
+    assert item["filename"] == "e"
+    assert item["details"]["product_model"] == "X2"
+    assert item["image_url"] is None
+
+
+def test_invalid_fields_and_cursor_rejected(results_db):
+    with pytest.raises(ValueError):
+        results_db.get_results_page(fields=("password",))
+    with pytest.raises(ValueError):
+        results_db.get_results_page(cursor="not-a-cursor")
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from models.scheduler import InferenceScheduler
+
+
+class RecordingExecutor:
+    """배치 단위 호출을 기록하는 Executor (결과는 이미지 값을 그대로 돌려줌)"""
+
+    def __init__(self, workers=1, delay=0.0, error=None):
+        self.workers = workers
+        self.delay = delay
+        self.error = error
+        self.batches = []
+        self.running = 0
+        self.max_running = 0
+
+    async def analyze(self, images, options):
+        self.batches.append(list(images))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return [{"image": image, **option} for image, option in zip(images, options)]
+        finally:
+            self.running -= 1
+
+
+def run_with_scheduler(executor, coroutine_factory, **kwargs):
+    async def scenario():
+        scheduler = InferenceScheduler(executor, **kwargs)
+        try:
+            return scheduler, await coroutine_factory(scheduler)
+        finally:
+            await scheduler.stop()
+    return asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_one_batch():
+    executor = RecordingExecutor()
+
+    async def submit_all(scheduler):
+        return await asyncio.gather(*[scheduler.submit(i, brightness=i) for i in range(5)])
+
+    scheduler, results = run_with_scheduler(executor, submit_all, max_batch_size=8, max_wait_ms=50)
+    assert results == [{"image": i, "brightness": i} for i in range(5)]
+    assert executor.batches == [[0, 1, 2, 3, 4]]
+    metrics = scheduler.get_metrics()
+    assert (metrics["total_requests"], metrics["total_batches"], metrics["avg_batch_size"]) == (5, 1, 5.0)
+
+
+def test_batches_split_at_max_batch_size():
+    executor = RecordingExecutor()
+
+    async def submit_all(scheduler):
+        return await asyncio.gather(*[scheduler.submit(i) for i in range(7)])
+
+    run_with_scheduler(executor, submit_all, max_batch_size=3, max_wait_ms=50)
+    assert [len(batch) for batch in executor.batches] == [3, 3, 1]
+
+
+def test_in_flight_batches_limited_by_workers():
+    executor = RecordingExecutor(workers=2, delay=0.05)
+
+    async def submit_all(scheduler):
+        return await asyncio.gather(*[scheduler.submit(i) for i in range(6)])
+
+    run_with_scheduler(executor, submit_all, max_batch_size=1, max_wait_ms=0)
+    assert len(executor.batches) == 6
+    assert executor.max_running == 2
+
+
+def test_batch_error_reaches_every_request():
+    executor = RecordingExecutor(error=RuntimeError("boom"))
+
+    async def submit_all(scheduler):
+        return await asyncio.gather(*[scheduler.submit(i) for i in range(3)], return_exceptions=True)
+
+    _, results = run_with_scheduler(executor, submit_all, max_wait_ms=50)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_request_skipped():
+    executor = RecordingExecutor()
+
+    async def submit_and_cancel(scheduler):
+        cancelled = asyncio.create_task(scheduler.submit("cancelled"))
+        kept = asyncio.create_task(scheduler.submit("kept"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await kept
+
+    _, result = run_with_scheduler(executor, submit_and_cancel, max_wait_ms=50)
+    assert result == {"image": "kept"}
+    assert executor.batches == [["kept"]]
+
+
+def test_requests_arriving_at_batch_deadline_are_not_lost():
+    executor = RecordingExecutor()
+
+    async def submit_around_deadline(scheduler):
+        results = []
+        for attempt in range(100):
+            first = asyncio.ensure_future(scheduler.submit(("first", attempt)))
+            # 두 번째 요청이 배치 창 (2ms)이 끝나는 시점 전후에 도착
+            await asyncio.sleep(0.002 + (attempt % 7 - 3) * 0.0001)
+            second = asyncio.ensure_future(scheduler.submit(("second", attempt)))
+            results.append(await asyncio.wait_for(asyncio.gather(first, second), 1.0))
+        return results
+
+    _, results = run_with_scheduler(executor, submit_around_deadline, max_wait_ms=2)
+    assert len(results) == 100
+    assert sum(len(batch) for batch in executor.batches) == 200
+
+
+def test_stop_cancels_running_and_queued_requests():
+    executor = RecordingExecutor(delay=60)
+
+    async def submit_and_stop(scheduler):
+        running = asyncio.ensure_future(scheduler.submit("running"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(scheduler.submit("queued"))
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        await asyncio.wait({running, queued}, timeout=1.0)
+        return running.cancelled(), queued.cancelled()
+
+    _, cancelled = run_with_scheduler(executor, submit_and_stop, max_batch_size=1, max_wait_ms=0)
+    assert cancelled == (True, True)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from models.executor import InferenceExecutor
+from models.shm_ring import SharedImageRing
+
+
+@pytest.fixture
+def ring():
+    ring = SharedImageRing(slots=2, slot_bytes=64 * 64 * 3)
+    yield ring
+    ring.close()
+
+
+def test_worker_reads_written_image(ring):
+    image = np.random.randint(0, 255, (64, 64, 3), dtype=np.uint8)
+    slot = ring.acquire()
+    descriptor = ring.write(slot, image)
+
+    worker_ring = SharedImageRing.attach(ring.name, ring.slots, ring.slot_bytes)
+    try:
+        view = worker_ring.read(descriptor)
+        assert np.array_equal(view, image)
+        # 복사 없이 공유 메모리를 직접 가리킴
+        assert not view.flags.owndata
+        del view
+    finally:
+        worker_ring.close()
+    assert ring.get_info()["writes"] == 1
+
+
+def test_oversized_image_sent_inline(ring):
+    image = np.zeros((65, 64, 3), dtype=np.uint8)
+    assert not ring.fits(image)
+    assert ring.read(ring.inline(image)) is image
+
+
+def test_acquire_waits_for_free_slot(ring):
+    slots = [ring.acquire(), ring.acquire()]
+    assert ring.acquire(timeout=0.01) is None
+    ring.release(slots[0])
+    assert ring.acquire(timeout=0.01) == slots[0]
+    info = ring.get_info()
+    assert (info["slots_in_use"], info["slot_waits"]) == (2, 1)
+
+
+def test_executor_falls_back_to_pickling_when_image_too_large(ring):
+    executor = InferenceExecutor(mode="shm", workers=1, torch_threads=1)
+    executor._ring = ring
+    small = np.ones((8, 8, 3), dtype=np.uint8)
+    large = np.ones((128, 128, 3), dtype=np.uint8)
+
+    descriptors, slots = executor._write_images([small, large])
+    assert [("slot" in d, "array" in d) for d in descriptors] == [(True, False), (False, True)]
+    assert ring.get_info()["inline_fallbacks"] == 1
+
+    executor._release_slots(slots)
+    assert ring.get_info()["slots_in_use"] == 0
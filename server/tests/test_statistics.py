@@ -0,0 +1,66 @@
+from database.db import _result_row, _rollup_range
+
+
+def insert(db, status, timestamp, reason=None, confidence=90.0, **details):
+    row = _result_row("x.jpg", status, reason=reason, confidence=confidence, details=details or None)
+    row["timestamp"] = timestamp
+    db._writer.submit(row).result(timeout=5)
+
+
+def test_statistics_from_rollups(temp_db):
+    insert(temp_db, "PASS", "2024-05-01T10:00:00", confidence=100.0, product_model="X1", language="KR")
+    insert(temp_db, "FAIL", "2024-05-01T10:30:00", reason="button", confidence=50.0, product_model="X1")
+    insert(temp_db, "FAIL", "2024-05-02T09:00:00", reason="language", confidence=60.0, product_model="X2")
+    insert(temp_db, "FAIL", "2024-05-02T09:10:00", reason="language", confidence=70.0, product_model="X2")
+
+    stats = temp_db.get_statistics()
+    assert (stats["total"], stats["pass"], stats["fail"]) == (4, 1, 3)
+    assert stats["pass_rate"] == 25.0
+    assert stats["avg_confidence"] == 70.0
+    assert list(stats["fail_reasons"].items()) == [("language", 2), ("button", 1)]
+    assert stats["by_product_model"]["X2"] == {"total": 2, "pass": 0, "fail": 2}
+    assert stats["by_language"] == {
+        "KR": {"total": 1, "pass": 1, "fail": 0},
+        "Unknown": {"total": 3, "pass": 0, "fail": 3},
+    }
+
+
+def test_date_ranges_use_daily_or_hourly_buckets(temp_db):
+    insert(temp_db, "PASS", "2024-05-01T10:00:00")
+    insert(temp_db, "PASS", "2024-05-01T23:30:00")
+    insert(temp_db, "PASS", "2024-05-02T00:10:00")
+
+    assert temp_db.get_statistics(start_date="2024-05-01", end_date="2024-05-01")["total"] == 2
+    assert temp_db.get_statistics(start_date="2024-05-01T23:00:00")["total"] == 2
+    assert temp_db.get_statistics(end_date="2024-05-01T10:59:59")["total"] == 1
+    assert temp_db.get_statistics(start_date="2024-06-01")["total"] == 0
+
+
+def test_sub_hour_bounds_are_exact(temp_db):
+    for timestamp in ("2024-05-01T09:59:59", "2024-05-01T10:15:00", "2024-05-01T10:45:00",
+                      "2024-05-01T11:30:00", "2024-05-01T12:05:00", "2024-05-01T12:40:00"):
+        insert(temp_db, "PASS", timestamp)
+
+    # 시작/종료 시간의 일부만 포함되는 결과는 원본 테이블에서, 사이의 시간은 롤업에서
+    assert temp_db.get_statistics(start_date="2024-05-01T10:30:00", end_date="2024-05-01T12:10:00")["total"] == 3
+    assert temp_db.get_statistics(start_date="2024-05-01T10:15:00", end_date="2024-05-01T10:45:00")["total"] == 2
+    assert temp_db.get_statistics(start_date="2024-05-01T10:16:00", end_date="2024-05-01T10:44:00")["total"] == 0
+    assert temp_db.get_statistics(start_date="2024-05-01", end_date="2024-05-01T10:20:00")["total"] == 2
+    assert temp_db.get_statistics(start_date="2024-05-01T12:00:00", end_date="2024-05-01T10:00:00")["total"] == 0
+
+
+def test_date_only_end_includes_whole_day(temp_db):
+    insert(temp_db, "PASS", "2024-05-01T08:00:00")
+    insert(temp_db, "PASS", "2024-05-01T23:59:59.500000")
+    insert(temp_db, "PASS", "2024-05-02T00:00:00")
+
+    assert temp_db.get_statistics(end_date="2024-05-01")["total"] == 2
+    assert temp_db.get_statistics(start_date="2024-05-01T08:30:00", end_date="2024-05-01")["total"] == 1
+
+
+def test_rollup_range_selection():
+    assert _rollup_range("2024-05-01", None) == ("result_rollups_daily", [(">=", "2024-05-01")], [])
+    assert _rollup_range("2024-05-01T10:30:00", "2024-05-02") == \
+        ("result_rollups_hourly", [(">", "2024-05-01T10"), ("<=", "2024-05-02T23")], ["2024-05-01T10"])
+    assert _rollup_range("2024-05-01T10:30:00", "2024-05-01T10:40:00") == \
+        ("result_rollups_hourly", None, ["2024-05-01T10"])
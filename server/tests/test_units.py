@@ -0,0 +1,70 @@
+from live import units
+from live.units import UnitSegmenter, detection_similarity, flush_segmenter, get_segmenter
+from models.matching import iou, majority
+
+BOX_A = {"class": "button", "bbox": [0, 0, 10, 10]}
+BOX_B = {"class": "button", "bbox": [100, 100, 110, 110]}
+
+
+def frame(status, detections, confidence=90.0, reason=None):
+    return {
+        "status": status,
+        "reason": reason,
+        "confidence": confidence,
+        "details": {"yolo_detections": detections, "product_model": "X1"},
+    }
+
+
+def test_iou_and_majority():
+    assert iou([0, 0, 10, 10], [0, 0, 10, 10]) == 1.0
+    assert iou([0, 0, 10, 10], [5, 0, 15, 10]) == 50 / 150
+    assert iou([0, 0, 10, 10], [20, 20, 30, 30]) == 0.0
+    assert majority(["PASS", "FAIL", "PASS"]) == "PASS"
+    # 동률이면 더 최근 값
+    assert majority(["PASS", "FAIL"]) == "FAIL"
+
+
+def test_detection_similarity_matches_same_class_only():
+    assert detection_similarity([BOX_A], [BOX_A]) == 1.0
+    assert detection_similarity([BOX_A], [{**BOX_A, "class": "screen"}]) == 0.0
+    assert detection_similarity([BOX_A, BOX_B], [BOX_A]) == 0.5
+    assert detection_similarity([], [BOX_A]) == 0.0
+
+
+def test_unit_finishes_when_product_changes():
+    segmenter = UnitSegmenter("cam1")
+    assert segmenter.add(frame("PASS", [BOX_A], 80.0), frame=1) == []
+    assert segmenter.add(frame("FAIL", [BOX_A], 70.0, "NG"), frame=2) == []
+    assert segmenter.add(frame("PASS", [BOX_A], 95.0), frame=3) == []
+    assert segmenter.current_unit() == {"unit": 1, "frame_count": 3}
+
+    finished = segmenter.add(frame("PASS", [BOX_B]), frame=4)
+    assert len(finished) == 1
+    unit = finished[0]
+    assert unit["status"] == "PASS"
+    assert unit["confidence"] == round((80 + 70 + 95) / 3, 2)
+    assert unit["details"]["unit"]["status_votes"] == {"PASS": 2, "FAIL": 1}
+    assert (unit["details"]["unit"]["first_frame"], unit["details"]["unit"]["last_frame"]) == (1, 3)
+    assert unit["filename"].endswith("_cam1_unit1.jpg")
+    assert segmenter.current_unit() == {"unit": 2, "frame_count": 1}
+
+
+def test_unit_finishes_after_empty_frames(monkeypatch):
+    monkeypatch.setattr(units, "UNIT_EMPTY_FRAMES", 2)
+    segmenter = UnitSegmenter("cam1")
+    segmenter.add(frame("FAIL", [BOX_A], reason="NG"))
+    assert segmenter.add(frame("PASS", [])) == []
+    finished = segmenter.add(frame("PASS", []))
+    assert [(u["status"], u["reason"]) for u in finished] == [("FAIL", "NG")]
+    assert segmenter.current_unit() is None
+
+
+def test_error_frames_ignored_and_flush():
+    segmenter = get_segmenter("cam-flush")
+    segmenter.add({"status": "ERROR", "reason": "decode"})
+    assert segmenter.current_unit() is None
+    segmenter.add(frame("PASS", [BOX_A]))
+
+    unit = flush_segmenter("cam-flush")
+    assert unit["status"] == "PASS"
+    assert flush_segmenter("cam-flush") is None